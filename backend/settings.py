@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -93,6 +94,32 @@ DATABASES = {
 }
 
 
+# Caches
+# "shared" is the L2 behind services.cache_tier: one store for every worker
+# process. Set SHARED_CACHE_URL=redis://... in production; otherwise results
+# are shared through files under SHARED_CACHE_DIR.
+
+SHARED_CACHE_URL = os.getenv("SHARED_CACHE_URL", "")
+SHARED_CACHE_MAX_ENTRIES = int(os.getenv("SHARED_CACHE_MAX_ENTRIES", "10000"))
+
+if SHARED_CACHE_URL.startswith(("redis://", "rediss://", "unix://")):
+    _shared_cache = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": SHARED_CACHE_URL,
+    }
+else:
+    _shared_cache = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv("SHARED_CACHE_DIR", str(BASE_DIR / ".cache" / "shared")),
+        "OPTIONS": {"MAX_ENTRIES": SHARED_CACHE_MAX_ENTRIES},
+    }
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "shared": _shared_cache,
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,35 @@
+"""
+Benchmark main-content extraction on pathologically nested layouts.
+
+Usage: python scripts/bench_main_content.py [depth ...]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from seo_app.services.crawler import parse_page  # noqa: E402
+
+
+def nested_page(depth: int) -> str:
+    opening = "".join(f"<div>level {i} copy text" for i in range(depth))
+    return (
+        "<html><head><title>Nested</title></head><body>"
+        "<nav><a href='/'>Home</a> <a href='/about'>About</a></nav>"
+        f"{opening}{'</div>' * depth}</body></html>"
+    )
+
+
+def main(depths):
+    for depth in depths:
+        html = nested_page(depth)
+        start = time.perf_counter()
+        parsed = parse_page(html)
+        elapsed = time.perf_counter() - start
+        print(f"depth={depth:>6}  words={parsed['word_count']:>7}  {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main([int(d) for d in sys.argv[1:]] or [500, 1000, 3000, 6000])
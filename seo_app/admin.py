@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Page, PageAnalysis, Domain, Backlink, Keyword, Competitor
+
+from .models import Backlink, Competitor, CrawlJob, Domain, Keyword, Page, PageAnalysis
 
 # Register main models for admin UI
 admin.site.register(Page)
@@ -8,3 +9,4 @@ admin.site.register(Domain)
 admin.site.register(Backlink)
 admin.site.register(Keyword)
 admin.site.register(Competitor)
+admin.site.register(CrawlJob)
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from seo_app.services.crawl_jobs import new_worker_id, run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = "Process queued site crawl jobs (resumes interrupted jobs first)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the current queue and exit instead of polling forever.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5.0,
+            help="Seconds to wait between queue checks when idle.",
+        )
+
+    def handle(self, *args, **options):
+        worker = new_worker_id()
+        self.stdout.write(f"Crawl job worker {worker} started")
+        while True:
+            processed = run_pending_jobs(worker=worker)
+            if processed:
+                self.stdout.write(f"Processed {processed} crawl job(s)")
+            if options["once"]:
+                break
+            time.sleep(options["poll_interval"])
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-16 20:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("seo_app", "0004_crawljob_crawljoburl"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="page",
+            name="content_hash",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="page",
+            name="etag",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="page",
+            name="last_modified",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
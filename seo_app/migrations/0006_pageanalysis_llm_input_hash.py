@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-16 20:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("seo_app", "0005_page_fetch_validators"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pageanalysis",
+            name="llm_input_hash",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-16 20:48
+
+import datetime
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("seo_app", "0006_pageanalysis_llm_input_hash"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="keywordranking",
+            name="recorded_date",
+            field=models.DateField(default=datetime.date.today),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-16 21:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("seo_app", "0007_keywordranking_recorded_date_default"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="crawljob",
+            name="worker_id",
+            field=models.CharField(blank=True, max_length=100),
+        ),
+    ]
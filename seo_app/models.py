@@ -1,10 +1,36 @@
+from datetime import date
+
 from django.db import models
 
 
+class PageManager(models.Manager):
+    """Stores pages under their canonical URL (see services.url_canonicalizer)."""
+
+    def get_or_create(self, defaults=None, **kwargs):
+        url = kwargs.get("url")
+        if url is None or len(kwargs) > 1:
+            return super().get_or_create(defaults=defaults, **kwargs)
+
+        from .services.url_canonicalizer import canonicalize_url, equivalent_urls
+
+        # An existing http/https or trailing-slash spelling is the same page
+        page = self.filter(url__in=equivalent_urls(url)).order_by("id").first()
+        if page is not None:
+            return page, False
+        return super().get_or_create(defaults=defaults, url=canonicalize_url(url))
+
+
 class Page(models.Model):
     url = models.URLField(unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Validators from the last fetch, for incremental recrawls
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)  # HTTP date, as sent
+    content_hash = models.CharField(max_length=64, blank=True)  # sha256 of the HTML
+
+    objects = PageManager()
+
     def __str__(self):
         return self.url
 
@@ -37,6 +63,8 @@ class PageAnalysis(models.Model):
     llm_model = models.CharField(max_length=128, blank=True)  # e.g., "gpt-4o-mini"
     llm_suggestions = models.JSONField(default=dict, blank=True)
     llm_generated_at = models.DateTimeField(null=True, blank=True)  # <-- REQUIRED
+    # Hash of the prompt inputs (see services.llm_cache) the suggestions were built from
+    llm_input_hash = models.CharField(max_length=64, blank=True, db_index=True)
 
     def __str__(self):
         return f"Analysis for {self.page.url} @ {self.created_at}"
@@ -109,7 +137,7 @@ class KeywordRanking(models.Model):
     url = models.URLField()  # The ranking URL
     search_volume = models.IntegerField(default=0)  # Cached from Keyword
 
-    recorded_date = models.DateField(auto_now_add=True)
+    recorded_date = models.DateField(default=date.today)
 
     class Meta:
         unique_together = ("domain", "keyword", "recorded_date")
@@ -253,3 +281,66 @@ class AuditHistory(models.Model):
 
     def __str__(self):
         return f"{self.page.url} - {self.recorded_date} (Score: {self.score})"
+
+
+class CrawlJob(models.Model):
+    """Site crawl queued from the API and processed by the run_crawl_jobs worker"""
+
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    ]
+
+    base_url = models.URLField()
+    max_pages = models.IntegerField(default=500)
+    force_llm = models.BooleanField(default=False)
+
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default="queued", db_index=True
+    )
+    error = models.TextField(blank=True)
+    # Worker holding the job; updated_at is its heartbeat (see crawl_jobs)
+    worker_id = models.CharField(max_length=100, blank=True)
+
+    # Progress counters (updated as pages finish)
+    sitemaps_found = models.JSONField(default=list)
+    total_urls = models.IntegerField(default=0)
+    pages_analyzed = models.IntegerField(default=0)
+    pages_failed = models.IntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Crawl {self.base_url} ({self.status})"
+
+
+class CrawlJobURL(models.Model):
+    """URL discovered for a crawl job; pending rows are what is left on resume"""
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("success", "Success"),
+        ("error", "Error"),
+    ]
+
+    job = models.ForeignKey(CrawlJob, on_delete=models.CASCADE, related_name="urls")
+    position = models.IntegerField()  # order in the discovered URL list
+    url = models.URLField(max_length=2000)
+
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default="pending", db_index=True
+    )
+    result = models.JSONField(default=dict, blank=True)  # per-page crawl summary
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("job", "position")
+
+    def __str__(self):
+        return f"{self.url} ({self.status})"
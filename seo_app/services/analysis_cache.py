@@ -0,0 +1,156 @@
+# seo_app/services/analysis_cache.py
+"""
+Cache of page analysis results keyed by page content.
+- The key is a BLAKE2 hash of the whitespace-normalized HTML plus the URL's
+  directory (relative links and images resolve against it) and
+  RULESET_VERSION, so identical HTML served at many URLs is scored once
+- Entries hold the parse_page() dict and the basic (and, once computed,
+  advanced) rule results
+- In-process LRU (ANALYSIS_CACHE_SIZE entries), optionally backed by a shared
+  Django cache alias (ANALYSIS_CACHE_BACKEND) so workers share results
+
+Django is only imported when the shared backend is enabled: the crawl engine
+uses this module and must stay importable without it.
+"""
+
+import copy
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import urljoin
+
+from .url_canonicalizer import resolve_canonical
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever parse_page or the rule modules change what they return
+RULESET_VERSION = "2"
+
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "512"))  # 0 = off
+ANALYSIS_CACHE_BACKEND = os.getenv("ANALYSIS_CACHE_BACKEND", "")  # Django cache alias
+ANALYSIS_CACHE_TTL = int(os.getenv("ANALYSIS_CACHE_TTL", "86400"))  # shared, seconds
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def analysis_key(html: str, url: str) -> str:
+    normalized = _WHITESPACE_RE.sub(" ", html or "").strip()
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{RULESET_VERSION}\n{urljoin(url, '.')}\n".encode())
+    digest.update(normalized.encode("utf-8", "replace"))
+    return f"analysis:{digest.hexdigest()}"
+
+
+class AnalysisCache:
+    """Thread-safe LRU of analysis entries with an optional shared second level."""
+
+    def __init__(
+        self,
+        max_entries: int = ANALYSIS_CACHE_SIZE,
+        backend: str = ANALYSIS_CACHE_BACKEND,
+        ttl: int = ANALYSIS_CACHE_TTL,
+    ):
+        self.max_entries = max_entries
+        self.backend = backend
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 or bool(self.backend)
+
+    def _shared(self):
+        if not self.backend:
+            return None
+        try:
+            from django.core.cache import caches
+
+            return caches[self.backend]
+        except Exception as e:
+            logger.warning(f"Analysis cache backend '{self.backend}' unavailable: {e}")
+            return None
+
+    def _shared_get(self, key: str) -> Optional[dict]:
+        shared = self._shared()
+        if shared is None:
+            return None
+        try:
+            return shared.get(key)
+        except Exception as e:
+            logger.warning(f"Failed to read analysis from shared cache: {e}")
+            return None
+
+    def _remember(self, key: str, entry: dict):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: str, url: str) -> Optional[dict]:
+        """
+        Entry stored under `key` (see analysis_key), adapted to `url`, or None.
+        The entry is a copy: callers may modify it freely.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is None:
+            entry = self._shared_get(key)
+            if entry is not None:
+                self._remember(key, entry)
+
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return _for_url(copy.deepcopy(entry), url)
+
+    def set(self, key: str, url: str, entry: dict):
+        """Store {"parsed", "basic": (score, breakdown, issues), "advanced"?}."""
+        if not self.enabled:
+            return
+        entry = copy.deepcopy(dict(entry, url=url))
+        self._remember(key, entry)
+        shared = self._shared()
+        if shared is not None:
+            try:
+                shared.set(key, entry, self.ttl)
+            except Exception as e:
+                logger.warning(f"Failed to store analysis in shared cache: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        self.hits = self.misses = 0
+
+
+def _for_url(entry: dict, url: str) -> dict:
+    """Point URL-specific fields of an entry computed for another URL at `url`."""
+    source = entry.get("url")
+    parsed = entry.get("parsed") or {}
+    if source and source != url and parsed.get("canonical_url"):
+        # Resolved again as parse_page would for `url`: a page without an
+        # on-site <link rel=canonical> is its own canonical, one with it keeps
+        # pointing at the tag's target
+        parsed["canonical_url"] = resolve_canonical(
+            url, parsed.get("canonical_href", "")
+        )
+    entry["url"] = url
+    return entry
+
+
+analysis_cache = AnalysisCache()
@@ -11,28 +11,31 @@ Advanced SEO audit analyzer with expanded rule checks:
 """
 
 import re
+from typing import Union
 
-from bs4 import BeautifulSoup
+from .document import ParsedDocument, as_document
 
+HtmlSource = Union[str, ParsedDocument]
 
-def check_mobile_usability(html: str, base_url: str = "") -> tuple:
+
+def check_mobile_usability(html: HtmlSource, base_url: str = "") -> tuple:
     """
     Check mobile usability issues.
     Returns: (score, issues)
     """
-    soup = BeautifulSoup(html, "html.parser")
+    doc = as_document(html, base_url)
     issues = []
     points = 20
 
     # Check viewport meta tag
-    viewport = soup.find("meta", attrs={"name": "viewport"})
+    viewport = doc.meta_name("viewport")
     if not viewport:
         issues.append("Missing viewport meta tag for mobile optimization")
         points -= 5
 
     # Check for mobile-friendly font size (avoid too small fonts)
     # This is simplified; in reality would need CSS parsing
-    body_text = soup.body.get_text() if soup.body else ""
+    body_text = doc.body_text
     if len(body_text) > 100:
         # Assume reasonable if has content
         pass
@@ -41,7 +44,7 @@ def check_mobile_usability(html: str, base_url: str = "") -> tuple:
         points -= 5
 
     # Check for clickable elements spacing (buttons, links)
-    links = soup.find_all("a")
+    links = doc.links
     if links and len(links) > 0:
         # Simplified check: if tons of links, might be hard to click
         pass
@@ -49,17 +52,17 @@ def check_mobile_usability(html: str, base_url: str = "") -> tuple:
     return max(0, points), issues
 
 
-def check_schema_markup(html: str) -> tuple:
+def check_schema_markup(html: HtmlSource) -> tuple:
     """
     Check for schema markup (structured data).
     Returns: (score, issues)
     """
-    soup = BeautifulSoup(html, "html.parser")
+    doc = as_document(html)
     issues = []
     points = 15
 
     # Look for schema.org markup
-    schemas = soup.find_all("script", attrs={"type": "application/ld+json"})
+    schemas = doc.scripts_of_type("application/ld+json")
 
     if not schemas or len(schemas) == 0:
         issues.append("Missing schema.org structured data markup")
@@ -76,7 +79,7 @@ def check_schema_markup(html: str) -> tuple:
         found_schema = False
         for schema in schemas:
             for st in schema_types:
-                if st in schema.string:
+                if st in (schema.string or ""):
                     found_schema = True
                     break
 
@@ -102,29 +105,29 @@ def check_ssl_security(base_url: str) -> tuple:
     return points, issues
 
 
-def check_crawlability(html: str) -> tuple:
+def check_crawlability(html: HtmlSource) -> tuple:
     """
     Check crawlability issues.
     Returns: (score, issues)
     """
-    soup = BeautifulSoup(html, "html.parser")
+    doc = as_document(html)
     issues = []
     points = 15
 
     # Check for robots meta tag
-    robots = soup.find("meta", attrs={"name": "robots"})
+    robots = doc.meta_name("robots")
     if robots and "noindex" in robots.get("content", "").lower():
         issues.append("Page has 'noindex' directive - won't appear in search results")
         points = 0
 
     # Check for excessive JavaScript rendering (simplified)
-    scripts = soup.find_all("script")
+    scripts = doc.scripts
     if len(scripts) > 20:
         issues.append("High number of scripts - may slow crawling")
         points -= 5
 
     # Check for proper heading hierarchy
-    h1s = soup.find_all("h1")
+    h1s = doc.headings["h1"]
     if len(h1s) == 0:
         issues.append("No H1 tag found - critical for crawlability")
         points -= 10
@@ -135,16 +138,16 @@ def check_crawlability(html: str) -> tuple:
     return max(0, points), issues
 
 
-def check_broken_links(html: str, base_url: str = "") -> tuple:
+def check_broken_links(html: HtmlSource, base_url: str = "") -> tuple:
     """
     Identify potentially broken internal links (simplified check).
     Returns: (score, issues)
     """
-    soup = BeautifulSoup(html, "html.parser")
+    doc = as_document(html, base_url)
     issues = []
     points = 10
 
-    links = soup.find_all("a", href=True)
+    links = doc.links
     broken_count = 0
 
     for link in links:
@@ -167,20 +170,20 @@ def check_broken_links(html: str, base_url: str = "") -> tuple:
     return max(0, points), issues
 
 
-def check_open_graph_twitter_cards(html: str) -> tuple:
+def check_open_graph_twitter_cards(html: HtmlSource) -> tuple:
     """
     Check for Open Graph and Twitter Card metadata.
     Returns: (score, issues)
     """
-    soup = BeautifulSoup(html, "html.parser")
+    doc = as_document(html)
     issues = []
     points = 10
 
-    og_image = soup.find("meta", attrs={"property": "og:image"})
-    og_title = soup.find("meta", attrs={"property": "og:title"})
-    og_description = soup.find("meta", attrs={"property": "og:description"})
+    og_image = doc.meta_property("og:image")
+    og_title = doc.meta_property("og:title")
+    og_description = doc.meta_property("og:description")
 
-    twitter_card = soup.find("meta", attrs={"name": "twitter:card"})
+    twitter_card = doc.meta_name("twitter:card")
 
     if not og_image or not og_title or not og_description:
         issues.append("Missing Open Graph tags for social media sharing")
@@ -231,21 +234,27 @@ def check_readability(text: str) -> tuple:
     return max(0, points), issues
 
 
-def run_advanced_rules(parsed: dict, html: str = "", base_url: str = "") -> tuple:
+def run_advanced_rules(
+    parsed: dict, html: str = "", base_url: str = "", doc: ParsedDocument = None
+) -> tuple:
     """
     Run all advanced audit checks.
+    Pass `doc` (the ParsedDocument used by parse_page) to avoid re-parsing `html`.
     Returns: (total_points, breakdown, all_issues)
     """
+    if doc is None:
+        doc = ParsedDocument(html, base_url=base_url)
+
     breakdown = []
     all_issues = []
 
     # Mobile Usability (20 points)
-    score, issues = check_mobile_usability(html, base_url)
+    score, issues = check_mobile_usability(doc, base_url)
     breakdown.append(("mobile_usability", score, issues))
     all_issues.extend(issues)
 
     # Schema Markup (15 points)
-    score, issues = check_schema_markup(html)
+    score, issues = check_schema_markup(doc)
     breakdown.append(("schema_markup", score, issues))
     all_issues.extend(issues)
 
@@ -255,17 +264,17 @@ def run_advanced_rules(parsed: dict, html: str = "", base_url: str = "") -> tupl
     all_issues.extend(issues)
 
     # Crawlability (15 points)
-    score, issues = check_crawlability(html)
+    score, issues = check_crawlability(doc)
     breakdown.append(("crawlability", score, issues))
     all_issues.extend(issues)
 
     # Broken Links (10 points)
-    score, issues = check_broken_links(html, base_url)
+    score, issues = check_broken_links(doc, base_url)
     breakdown.append(("broken_links", score, issues))
     all_issues.extend(issues)
 
     # Social Media Tags (10 points)
-    score, issues = check_open_graph_twitter_cards(html)
+    score, issues = check_open_graph_twitter_cards(doc)
     breakdown.append(("social_tags", score, issues))
     all_issues.extend(issues)
 
@@ -16,10 +16,11 @@ import random
 from datetime import datetime
 from typing import Dict, List, Tuple
 
-from django.core.cache import cache
+from .cache_tier import TieredCache
 
 logger = logging.getLogger(__name__)
 CACHE_DURATION = 86400 * 7
+analysis_cache = TieredCache("backlink_analysis")
 
 
 class BacklinkAnalyzer:
@@ -31,35 +32,33 @@ class BacklinkAnalyzer:
     def analyze_domain(self, domain: str) -> Dict:
         """Return an analysis summary for a domain."""
         try:
-            cache_key = f"backlink_analysis:{domain}"
-            cached = cache.get(cache_key)
-            if cached:
-                return cached
-
-            total_links = self._estimate_total_backlinks(domain)
-            referring_domains = self._estimate_referring_domains(domain)
-            top_referrers = self._top_referrers(domain, limit=10)
-            anchor_texts = self._anchor_texts(domain, limit=10)
-            growth = self._estimate_backlink_growth(domain)
-            toxic_score = self._estimate_toxicity(domain)
-
-            result = {
-                "domain": domain,
-                "total_backlinks": total_links,
-                "referring_domains": referring_domains,
-                "top_referrers": top_referrers,
-                "anchor_texts": anchor_texts,
-                "growth": growth,
-                "toxic_score": toxic_score,
-                "last_analyzed": datetime.now().isoformat(),
-            }
-
-            cache.set(cache_key, result, CACHE_DURATION)
-            return result
+            return analysis_cache.get_or_compute(
+                domain, lambda: self._analyze_domain(domain), CACHE_DURATION
+            )
         except Exception as e:
             logger.error(f"Error in analyze_domain: {e}")
             return {"error": str(e), "domain": domain}
 
+    def _analyze_domain(self, domain: str) -> Dict:
+        """Compute analyze_domain's result (uncached)."""
+        total_links = self._estimate_total_backlinks(domain)
+        referring_domains = self._estimate_referring_domains(domain)
+        top_referrers = self._top_referrers(domain, limit=10)
+        anchor_texts = self._anchor_texts(domain, limit=10)
+        growth = self._estimate_backlink_growth(domain)
+        toxic_score = self._estimate_toxicity(domain)
+
+        return {
+            "domain": domain,
+            "total_backlinks": total_links,
+            "referring_domains": referring_domains,
+            "top_referrers": top_referrers,
+            "anchor_texts": anchor_texts,
+            "growth": growth,
+            "toxic_score": toxic_score,
+            "last_analyzed": datetime.now().isoformat(),
+        }
+
     def compare_link_gap(self, source: str, target: str) -> Dict:
         """Compare backlinks between source and target, find gaps."""
         source_links = set(
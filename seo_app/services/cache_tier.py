@@ -0,0 +1,412 @@
+# seo_app/services/cache_tier.py
+"""
+Two-level cache for expensive service results.
+- L1: in-process LRU (CACHE_L1_SIZE entries per namespace), entries kept at
+  most CACHE_L1_TTL seconds so other workers' updates show up quickly
+- L2: the shared Django cache alias CACHE_L2_ALIAS ("shared" in settings:
+  file-based by default, Redis when SHARED_CACHE_URL is set), so every
+  worker reuses a result computed once
+- L2 entries larger than CACHE_COMPRESS_MIN bytes pickled are stored as
+  zlib-compressed bytes, smaller ones as-is (the backend pickles them);
+  entries over CACHE_MAX_VALUE_BYTES stay in L1 only
+- Values are copied in and out of L1, so callers may modify what they get
+- Hits and misses are counted per namespace (cache_stats())
+- get_or_compute() coalesces concurrent misses for a key onto one
+  computation and, for CACHE_STALE_TTL seconds after an entry expires,
+  serves the stale value while one background refresh runs. Within a
+  process callers share a SingleFlight call; across workers the one that
+  wins a short-lived L2 lock computes while the others poll L2 for its
+  result (backing off up to CACHE_LOCK_WAIT seconds; then they take a
+  stale value if L2 has one, else compute themselves).
+  The lock is a cache add(), which only excludes other workers when the
+  backend makes it atomic (Redis, memcached, database); on the file-based
+  default it is skipped and each worker computes its own misses
+"""
+
+import copy
+import hashlib
+import logging
+import os
+import pickle
+import re
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.db import close_old_connections
+
+from .singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+CACHE_L1_SIZE = int(os.getenv("CACHE_L1_SIZE", "1024"))
+CACHE_L1_TTL = int(os.getenv("CACHE_L1_TTL", "300"))  # seconds
+CACHE_L2_ALIAS = os.getenv("CACHE_L2_ALIAS", "shared")
+CACHE_COMPRESS_MIN = int(os.getenv("CACHE_COMPRESS_MIN", "1024"))  # bytes
+CACHE_MAX_VALUE_BYTES = int(os.getenv("CACHE_MAX_VALUE_BYTES", str(1024 * 1024)))
+CACHE_STALE_TTL = int(os.getenv("CACHE_STALE_TTL", "86400"))  # seconds
+CACHE_REFRESH_WORKERS = int(os.getenv("CACHE_REFRESH_WORKERS", "2"))
+CACHE_LOCK_TIMEOUT = int(os.getenv("CACHE_LOCK_TIMEOUT", "30"))  # seconds
+CACHE_LOCK_WAIT = float(os.getenv("CACHE_LOCK_WAIT", "10"))  # seconds
+CACHE_LOCK_POLL = 0.05  # seconds, first poll; doubles up to CACHE_LOCK_POLL_MAX
+CACHE_LOCK_POLL_MAX = 1.0  # seconds
+
+# Backends whose add() is a check-then-set, useless as a cross-worker lock
+_NON_ATOMIC_ADD = (FileBasedCache,)
+
+# Keys the cache backends accept as-is; others are hashed for L2
+_SAFE_KEY = re.compile(r"[\x21-\x7e]{1,200}")
+
+
+def encode_value(entry: tuple) -> Tuple[Any, int]:
+    """
+    (what to store in L2, its size in bytes). Entries are tuples, so a bytes
+    value in L2 is always a compressed entry.
+    """
+    data = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(data) < CACHE_COMPRESS_MIN:
+        return entry, len(data)
+    compressed = zlib.compress(data, 6)
+    return compressed, len(compressed)
+
+
+def decode_value(stored: Any) -> Any:
+    if isinstance(stored, bytes):
+        return pickle.loads(zlib.decompress(stored))
+    return stored
+
+
+_refresher: Optional[ThreadPoolExecutor] = None
+_refresher_lock = threading.Lock()
+
+
+def _refresh_pool() -> ThreadPoolExecutor:
+    global _refresher
+    with _refresher_lock:
+        if _refresher is None:
+            _refresher = ThreadPoolExecutor(
+                max_workers=max(1, CACHE_REFRESH_WORKERS),
+                thread_name_prefix="cache-refresh",
+            )
+        return _refresher
+
+
+class TieredCache:
+    """L1 LRU + shared L2 for one namespace; keys are namespaced in L2."""
+
+    def __init__(
+        self,
+        namespace: str,
+        l1_size: int = CACHE_L1_SIZE,
+        l1_ttl: int = CACHE_L1_TTL,
+        alias: str = CACHE_L2_ALIAS,
+        stale_ttl: int = CACHE_STALE_TTL,
+    ):
+        self.namespace = namespace
+        self.l1_size = l1_size
+        self.l1_ttl = l1_ttl
+        self.alias = alias
+        self.stale_ttl = stale_ttl
+        self._l1: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._refreshing = set()
+        self.stats = {
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "errors": 0,
+            "stale_hits": 0,
+            "coalesced": 0,
+            "refreshes": 0,
+        }
+        _namespaces[namespace] = self
+
+    def _l2(self):
+        if not self.alias:
+            return None
+        try:
+            return caches[self.alias]
+        except Exception as e:
+            logger.warning(f"Cache alias '{self.alias}' unavailable: {e}")
+            return None
+
+    def _key(self, key: str) -> str:
+        if not _SAFE_KEY.fullmatch(key):
+            key = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+        return f"{self.namespace}:{key}"
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    # Entries are (fresh_until, value), fresh_until a wall-clock timestamp so
+    # every process agrees on it; both levels keep them CACHE_STALE_TTL longer
+
+    def _l1_get(self, key: str):
+        with self._lock:
+            item = self._l1.get(key)
+            if item is None:
+                return None
+            expires, entry = item
+            if expires < time.monotonic():
+                del self._l1[key]
+                return None
+            self._l1.move_to_end(key)
+        return entry[0], copy.deepcopy(entry[1])
+
+    def _l1_set(self, key: str, entry: tuple, ttl: int):
+        if self.l1_size <= 0:
+            return
+        expires = time.monotonic() + min(ttl, self.l1_ttl)
+        entry = (entry[0], copy.deepcopy(entry[1]))
+        with self._lock:
+            self._l1[key] = (expires, entry)
+            self._l1.move_to_end(key)
+            while len(self._l1) > self.l1_size:
+                self._l1.popitem(last=False)
+
+    def _l2_entry(self, key: str) -> Optional[tuple]:
+        l2 = self._l2()
+        if l2 is None:
+            return None
+        try:
+            stored = l2.get(self._key(key))
+            entry = decode_value(stored) if stored is not None else None
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"Shared cache read failed for {self._key(key)}: {e}")
+            return None
+        if not isinstance(entry, tuple) or len(entry) != 2:
+            return None
+        return entry
+
+    def _lookup(self, key: str) -> Optional[tuple]:
+        """The (fresh_until, value) entry for `key`, fresh or stale."""
+        entry = self._l1_get(key)
+        if entry is not None:
+            self._count("l1_hits")
+            return entry
+
+        entry = self._l2_entry(key)
+        if entry is None:
+            self._count("misses")
+            return None
+        self._count("l2_hits")
+        # Shared entries carry their own TTL; L1 only holds them briefly
+        self._l1_set(key, entry, self.l1_ttl)
+        return entry
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """The fresh value for `key`, else `default`."""
+        entry = self._lookup(key)
+        if entry is None or entry[0] < time.time():
+            return default
+        return entry[1]
+
+    def set(self, key: str, value: Any, ttl: int):
+        self._count("sets")
+        entry = (time.time() + ttl, value)
+        self._l1_set(key, entry, ttl + self.stale_ttl)
+        l2 = self._l2()
+        if l2 is None:
+            return
+        try:
+            stored, size = encode_value(entry)
+            if size > CACHE_MAX_VALUE_BYTES:
+                logger.warning(f"Not sharing {self._key(key)}: {size} bytes")
+                return
+            l2.set(self._key(key), stored, ttl + self.stale_ttl)
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"Shared cache write failed for {self._key(key)}: {e}")
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        ttl: int,
+        cacheable: Callable[[Any], bool] = bool,
+    ) -> Any:
+        """
+        Cached value for `key`, computing it on a miss. Concurrent misses
+        share one `compute` call: in this process through SingleFlight,
+        across workers through the L2 lock. A stale entry is returned as is
+        while a background refresh replaces it. Results that fail
+        `cacheable` (by default: falsy ones) are returned but not stored.
+        """
+        entry = self._lookup(key)
+        if entry is not None:
+            fresh_until, value = entry
+            if fresh_until < time.time():
+                self._count("stale_hits")
+                self._refresh(key, compute, ttl, cacheable)
+            return value
+
+        def load():
+            # A caller that just finished the same key may have stored it
+            entry = self._l1_get(key)
+            if entry is not None and entry[0] >= time.time():
+                return entry[1]
+            token = self._acquire_lock(key)
+            if token is None:
+                # Another worker is computing it; wait for its result
+                entry = self._wait_for_l2(key)
+                if entry is not None:
+                    fresh = entry[0] >= time.time()
+                    self._count("coalesced" if fresh else "stale_hits")
+                    self._l1_set(key, entry, self.l1_ttl)
+                    return entry[1]
+                return self._compute_and_store(key, compute, ttl, cacheable)
+            try:
+                return self._compute_and_store(key, compute, ttl, cacheable)
+            finally:
+                self._release_lock(key, token)
+
+        value, shared = self._flight.do(key, load)
+        if shared:
+            self._count("coalesced")
+        # Every caller of a coalesced call gets the same object; hand out copies
+        return copy.deepcopy(value)
+
+    def _refresh(self, key: str, compute: Callable[[], Any], ttl: int, cacheable):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            self.stats["refreshes"] += 1
+
+        def refresh():
+            # Only one worker refreshes; the others keep serving stale
+            token = self._acquire_lock(key)
+            if token is None:
+                with self._lock:
+                    self._refreshing.discard(key)
+                return
+            # Outside the request cycle: computes that use the ORM get a
+            # usable connection, and it is closed once they are done
+            close_old_connections()
+            try:
+                self._flight.do(
+                    key, lambda: self._compute_and_store(key, compute, ttl, cacheable)
+                )
+            except Exception as e:
+                logger.warning(f"Background refresh of {self._key(key)} failed: {e}")
+            finally:
+                close_old_connections()
+                self._release_lock(key, token)
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        _refresh_pool().submit(refresh)
+
+    def _compute_and_store(self, key: str, compute, ttl: int, cacheable) -> Any:
+        value = compute()
+        if cacheable(value):
+            self.set(key, value, ttl)
+        return value
+
+    def _lock_key(self, key: str) -> str:
+        return self._key(f"lock:{key}")
+
+    def _acquire_lock(self, key: str) -> Optional[str]:
+        """
+        Take the cross-worker lock for `key`: the holder's token, or None
+        while another worker holds it. Always granted without an L2 or when
+        its add() is not atomic.
+        """
+        token = uuid.uuid4().hex
+        l2 = self._l2()
+        if l2 is None or isinstance(l2, _NON_ATOMIC_ADD):
+            return token
+        try:
+            if l2.add(self._lock_key(key), token, CACHE_LOCK_TIMEOUT):
+                return token
+            return None
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"Shared cache lock failed for {self._key(key)}: {e}")
+            return token
+
+    def _release_lock(self, key: str, token: str):
+        """
+        Release the lock if `token` still holds it: once CACHE_LOCK_TIMEOUT has
+        passed it may belong to another worker.
+        """
+        l2 = self._l2()
+        if l2 is None:
+            return
+        lock_key = self._lock_key(key)
+        try:
+            if l2.get(lock_key) == token:
+                l2.delete(lock_key)
+        except Exception as e:
+            logger.warning(f"Shared cache unlock failed for {self._key(key)}: {e}")
+
+    def _wait_for_l2(self, key: str) -> Optional[tuple]:
+        """
+        Poll L2 for a fresh entry for `key`, backing off, for up to
+        CACHE_LOCK_WAIT seconds. If the lock holder has not finished by then,
+        the stale entry L2 holds (if any) is returned instead.
+        """
+        deadline = time.monotonic() + CACHE_LOCK_WAIT
+        delay = CACHE_LOCK_POLL
+        while True:
+            locked = self._locked(key)
+            entry = self._l2_entry(key)
+            if entry is not None and entry[0] >= time.time():
+                return entry
+            if not locked:
+                return None  # the lock holder gave up (e.g. compute raised)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return entry
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, CACHE_LOCK_POLL_MAX)
+
+    def _locked(self, key: str) -> bool:
+        l2 = self._l2()
+        try:
+            return l2 is not None and l2.get(self._lock_key(key)) is not None
+        except Exception:
+            return False
+
+    def delete(self, key: str):
+        with self._lock:
+            self._l1.pop(key, None)
+        l2 = self._l2()
+        if l2 is not None:
+            try:
+                l2.delete(self._key(key))
+            except Exception as e:
+                logger.warning(f"Shared cache delete failed for {self._key(key)}: {e}")
+
+    def clear_local(self):
+        """Drop this process' L1 entries and counters (L2 is untouched)."""
+        with self._lock:
+            self._l1.clear()
+            self.stats = dict.fromkeys(self.stats, 0)
+
+
+_namespaces: Dict[str, TieredCache] = {}
+
+
+def cache_stats(namespace: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Per-namespace counters for this process, with the combined hit rate."""
+    stats = {}
+    for name, tier in list(_namespaces.items()):
+        if namespace and name != namespace:
+            continue
+        counts = dict(tier.stats)
+        lookups = counts["l1_hits"] + counts["l2_hits"] + counts["misses"]
+        hits = counts["l1_hits"] + counts["l2_hits"]
+        counts["hit_rate"] = round(hits / lookups, 3) if lookups else 0.0
+        stats[name] = counts
+    return stats
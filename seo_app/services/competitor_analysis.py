@@ -14,13 +14,15 @@ import os
 from datetime import datetime
 from typing import Dict, List, Optional
 
-from django.core.cache import cache
+from .cache_tier import TieredCache
 
 logger = logging.getLogger(__name__)
 
 # Configuration
 SERPAPI_KEY = os.getenv("SERPAPI_KEY", "")
 CACHE_DURATION = 86400 * 7  # Cache for 7 days
+analysis_cache = TieredCache("competitor_analysis")
+strategy_cache = TieredCache("competitor_strategies")
 
 
 class CompetitorAnalyzer:
@@ -35,26 +37,9 @@ class CompetitorAnalyzer:
         Returns domain metrics, estimated traffic, backlink count, content quality.
         """
         try:
-            cache_key = f"competitor_analysis:{domain}"
-            cached = cache.get(cache_key)
-            if cached:
-                return cached
-
-            result = {
-                "domain": domain,
-                "estimated_monthly_traffic": self._estimate_traffic(domain),
-                "estimated_backlinks": self._estimate_backlinks(domain),
-                "domain_authority": self._estimate_domain_authority(domain),
-                "content_quality_score": self._analyze_content_quality(domain),
-                "main_keywords": self._extract_main_keywords(domain),
-                "top_pages": self._get_top_pages(domain),
-                "traffic_sources": self._estimate_traffic_sources(domain),
-                "social_signals": self._estimate_social_signals(domain),
-                "last_analyzed": datetime.now().isoformat(),
-            }
-
-            cache.set(cache_key, result, CACHE_DURATION)
-            return result
+            return analysis_cache.get_or_compute(
+                domain, lambda: self._analyze_competitor(domain), CACHE_DURATION
+            )
 
         except Exception as e:
             logger.error(f"Error analyzing competitor: {e}")
@@ -63,6 +48,21 @@ class CompetitorAnalyzer:
                 "domain": domain,
             }
 
+    def _analyze_competitor(self, domain: str) -> Dict:
+        """Compute analyze_competitor's result (uncached)."""
+        return {
+            "domain": domain,
+            "estimated_monthly_traffic": self._estimate_traffic(domain),
+            "estimated_backlinks": self._estimate_backlinks(domain),
+            "domain_authority": self._estimate_domain_authority(domain),
+            "content_quality_score": self._analyze_content_quality(domain),
+            "main_keywords": self._extract_main_keywords(domain),
+            "top_pages": self._get_top_pages(domain),
+            "traffic_sources": self._estimate_traffic_sources(domain),
+            "social_signals": self._estimate_social_signals(domain),
+            "last_analyzed": datetime.now().isoformat(),
+        }
+
     def compare_competitors(self, domains: List[str]) -> Dict:
         """
         Compare multiple competitor domains side-by-side.
@@ -94,28 +94,26 @@ class CompetitorAnalyzer:
         Analyzes keywords, content, backlink sources, etc.
         """
         try:
-            cache_key = f"competitor_strategies:{domain}"
-            cached = cache.get(cache_key)
-            if cached:
-                return cached
-
-            result = {
-                "domain": domain,
-                "seo_strategy": self._analyze_seo_strategy(domain),
-                "content_strategy": self._analyze_content_strategy(domain),
-                "link_building_sources": self._get_link_building_sources(domain),
-                "keyword_strategy": self._analyze_keyword_strategy(domain),
-                "target_audience": self._estimate_target_audience(domain),
-                "market_opportunities": self._identify_opportunities(domain),
-            }
-
-            cache.set(cache_key, result, CACHE_DURATION)
-            return result
+            return strategy_cache.get_or_compute(
+                domain, lambda: self._competitor_strategies(domain), CACHE_DURATION
+            )
 
         except Exception as e:
             logger.error(f"Error getting competitor strategies: {e}")
             return {"error": str(e), "domain": domain}
 
+    def _competitor_strategies(self, domain: str) -> Dict:
+        """Compute get_competitor_strategies' result (uncached)."""
+        return {
+            "domain": domain,
+            "seo_strategy": self._analyze_seo_strategy(domain),
+            "content_strategy": self._analyze_content_strategy(domain),
+            "link_building_sources": self._get_link_building_sources(domain),
+            "keyword_strategy": self._analyze_keyword_strategy(domain),
+            "target_audience": self._estimate_target_audience(domain),
+            "market_opportunities": self._identify_opportunities(domain),
+        }
+
     def track_serp_positions(self, domain: str, keywords: List[str]) -> Dict:
         """
         Track competitor's SERP positions for given keywords.
@@ -0,0 +1,471 @@
+# seo_app/services/crawl_engine.py
+"""
+Concurrent crawl engine used by the sitemap crawler.
+- I/O stage: thread pool fetching pages, limited per host with a politeness delay
+- CPU stage: process pool running parse_page + run_all_rules
+- Results are yielded on the caller's thread, which stays the only DB writer
+- AsyncCrawlEngine does the fetch stage on one asyncio loop with httpx, for
+  high fan-out crawls where a thread per request wastes memory
+- Pages whose HTML is in the analysis cache skip the CPU stage
+
+This module must not import Django: the CPU stage runs in spawned worker
+processes that only import what analyze_html needs.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import (
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+from urllib.parse import urlparse
+
+from .analysis_cache import analysis_cache, analysis_key
+from .analyzer_rules import run_all_rules
+from .crawler import fetch_html, fetch_html_async, parse_page
+from .http_client import async_client
+
+logger = logging.getLogger(__name__)
+
+CRAWL_FETCH_WORKERS = int(os.getenv("CRAWL_FETCH_WORKERS", "8"))
+CRAWL_PER_HOST_LIMIT = int(os.getenv("CRAWL_PER_HOST_LIMIT", "4"))
+CRAWL_POLITENESS_DELAY = float(os.getenv("CRAWL_POLITENESS_DELAY", "0"))  # seconds
+# 0 analyzes pages on the caller's thread instead of in worker processes
+CRAWL_CPU_WORKERS = int(
+    os.getenv("CRAWL_CPU_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+# In-flight request cap for the asyncio engine (per-host cap still applies)
+CRAWL_ASYNC_CONCURRENCY = int(os.getenv("CRAWL_ASYNC_CONCURRENCY", "200"))
+
+
+def analyze_html(html: str, url: str) -> tuple:
+    """
+    CPU stage: parse a page and run the basic rules.
+    Returns (parsed, score, breakdown, issues) with parsed["issues"] filled in.
+    """
+    parsed = parse_page(html, base_url=url)
+    score, breakdown, issues = run_all_rules(parsed)
+    parsed["issues"] = issues
+    return parsed, score, breakdown, issues
+
+
+def _cpu_executor(cpu_workers: int) -> Optional[Executor]:
+    if cpu_workers <= 0:
+        return None
+    # spawn keeps worker processes free of the parent's threads and DB
+    # connections (and is the only start method on Windows anyway)
+    return ProcessPoolExecutor(
+        max_workers=cpu_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+class HostThrottle:
+    """Per-host concurrency limit plus a minimum delay between request starts."""
+
+    def __init__(self, per_host_limit: int, delay: float = 0.0):
+        self.per_host_limit = max(1, per_host_limit)
+        self.delay = max(0.0, delay)
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._next_start: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, url: str):
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            sem = self._semaphores.get(host)
+            if sem is None:
+                sem = threading.BoundedSemaphore(self.per_host_limit)
+                self._semaphores[host] = sem
+        sem.acquire()
+        try:
+            if self.delay:
+                with self._lock:
+                    now = time.monotonic()
+                    start = max(now, self._next_start.get(host, now))
+                    self._next_start[host] = start + self.delay
+                if start > now:
+                    time.sleep(start - now)
+            yield
+        finally:
+            sem.release()
+
+
+@dataclass
+class CrawlResult:
+    """Outcome for one URL. `error` is set when fetching or analysis failed."""
+
+    index: int
+    url: str
+    fetch: Optional[dict] = None
+    parsed: Optional[dict] = None
+    score: int = 0
+    breakdown: List[tuple] = field(default_factory=list)
+    issues: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    # Set when the page matched the validators passed to iter_results (304 or
+    # identical content hash); parsed/score are then left empty
+    unchanged: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _is_unchanged(fetch_res: dict, validator: Optional[dict]) -> bool:
+    if fetch_res.get("not_modified"):
+        return True
+    previous_hash = (validator or {}).get("content_hash")
+    return bool(previous_hash) and fetch_res.get("content_hash") == previous_hash
+
+
+def _cached_outcome(fetch_res: dict) -> Tuple[Optional[str], Optional[tuple]]:
+    """(cache key, analyze_html-style outcome or None) for a fetched page."""
+    if not analysis_cache.enabled:
+        return None, None
+    key = analysis_key(fetch_res["html"], fetch_res["url"])
+    entry = analysis_cache.get(key, fetch_res["url"])
+    if entry is None:
+        return key, None
+    score, breakdown, issues = entry["basic"]
+    parsed = entry["parsed"]
+    parsed["issues"] = issues
+    return key, (parsed, score, breakdown, issues)
+
+
+def _remember_outcome(key: Optional[str], fetch_res: dict, outcome: tuple):
+    if key is None:
+        return
+    parsed, score, breakdown, issues = outcome
+    analysis_cache.set(
+        key, fetch_res["url"], {"parsed": parsed, "basic": (score, breakdown, issues)}
+    )
+
+
+def _conditional_kwargs(validator: Optional[dict]) -> dict:
+    if not validator:
+        return {}
+    return {
+        "etag": validator.get("etag") or None,
+        "last_modified": validator.get("last_modified") or None,
+    }
+
+
+class CrawlEngine:
+    """
+    Fetch and analyze a list of URLs concurrently.
+
+    iter_results() yields CrawlResult objects in completion order on the
+    calling thread; callers persist them there so DB writes stay serialized.
+    """
+
+    def __init__(
+        self,
+        fetch_workers: int = CRAWL_FETCH_WORKERS,
+        cpu_workers: int = CRAWL_CPU_WORKERS,
+        per_host_limit: int = CRAWL_PER_HOST_LIMIT,
+        politeness_delay: float = CRAWL_POLITENESS_DELAY,
+        fetch: Callable[[str], dict] = fetch_html,
+    ):
+        self.fetch_workers = max(1, fetch_workers)
+        self.cpu_workers = max(0, cpu_workers)
+        self.throttle = HostThrottle(per_host_limit, politeness_delay)
+        self.fetch = fetch
+
+    def _fetch(self, url: str, validator: dict = None) -> dict:
+        with self.throttle.slot(url):
+            return self.fetch(url, **_conditional_kwargs(validator))
+
+    def _cpu_executor(self) -> Optional[Executor]:
+        return _cpu_executor(self.cpu_workers)
+
+    def iter_results(
+        self,
+        urls: Iterable[str],
+        validators: Dict[str, dict] = None,
+        tick: float = None,
+    ) -> Iterator[Optional[CrawlResult]]:
+        """
+        `validators` maps a URL to the etag / last_modified / content_hash of
+        its previous fetch, for conditional requests and unchanged detection.
+        With `tick`, None is yielded whenever nothing finished for `tick`
+        seconds, so the caller can do deadline work (like flushing a partial
+        write batch) while the crawl is slow.
+        """
+        urls = list(urls)
+        validators = validators or {}
+        if not urls:
+            return
+
+        io_pool = ThreadPoolExecutor(
+            max_workers=self.fetch_workers, thread_name_prefix="crawl-fetch"
+        )
+        cpu_pool = self._cpu_executor()
+        pending: Dict[Future, tuple] = {}
+        try:
+            for index, url in enumerate(urls):
+                future = io_pool.submit(self._fetch, url, validators.get(url))
+                pending[future] = ("fetch", index, url, None, None)
+
+            while pending:
+                done, _ = wait(list(pending), timeout=tick, return_when=FIRST_COMPLETED)
+                if not done:
+                    yield None
+                for future in done:
+                    stage, index, url, fetch_res, key = pending.pop(future)
+                    if stage == "fetch":
+                        result, key = self._on_fetched(
+                            future, index, url, cpu_pool, validators.get(url)
+                        )
+                        if isinstance(result, Future):
+                            pending[result] = (
+                                "analyze",
+                                index,
+                                url,
+                                future.result(),
+                                key,
+                            )
+                        else:
+                            yield result
+                    else:
+                        yield self._analysis_result(index, url, fetch_res, future, key)
+        finally:
+            io_pool.shutdown(wait=False, cancel_futures=True)
+            if cpu_pool is not None:
+                cpu_pool.shutdown(wait=False, cancel_futures=True)
+
+    def _on_fetched(
+        self, future: Future, index: int, url: str, cpu_pool, validator: dict = None
+    ):
+        """
+        Returns (CrawlResult or analysis Future, analysis cache key). Pages
+        found in the analysis cache never reach the CPU stage.
+        """
+        try:
+            fetch_res = future.result()
+        except Exception as e:
+            return CrawlResult(index=index, url=url, error=str(e)), None
+        if not fetch_res["ok"]:
+            return (
+                CrawlResult(
+                    index=index, url=url, fetch=fetch_res, error=fetch_res["error"]
+                ),
+                None,
+            )
+        if _is_unchanged(fetch_res, validator):
+            return (
+                CrawlResult(index=index, url=url, fetch=fetch_res, unchanged=True),
+                None,
+            )
+        key, cached = _cached_outcome(fetch_res)
+        if cached is not None:
+            return _outcome_result(index, url, fetch_res, cached), key
+        if cpu_pool is not None:
+            future = cpu_pool.submit(analyze_html, fetch_res["html"], fetch_res["url"])
+            return future, key
+        return self._analysis_result(index, url, fetch_res, key=key), key
+
+    def _analysis_result(
+        self,
+        index: int,
+        url: str,
+        fetch_res: dict,
+        future: Future = None,
+        key: str = None,
+    ) -> CrawlResult:
+        """Collect the CPU stage output, running it inline when no pool is used."""
+        try:
+            if future is not None:
+                outcome = future.result()
+            else:
+                outcome = analyze_html(fetch_res["html"], fetch_res["url"])
+        except Exception as e:
+            logger.warning(f"Analysis failed for {url}: {e}")
+            return CrawlResult(index=index, url=url, fetch=fetch_res, error=str(e))
+        _remember_outcome(key, fetch_res, outcome)
+        return _outcome_result(index, url, fetch_res, outcome)
+
+
+def _outcome_result(index: int, url: str, fetch_res: dict, outcome: tuple):
+    parsed, score, breakdown, issues = outcome
+    return CrawlResult(
+        index=index,
+        url=url,
+        fetch=fetch_res,
+        parsed=parsed,
+        score=score,
+        breakdown=breakdown,
+        issues=issues,
+    )
+
+
+class AsyncCrawlEngine:
+    """
+    asyncio counterpart of CrawlEngine: every fetch runs on one event loop
+    through a shared httpx client, bounded by a global and a per-host
+    semaphore. The CPU stage still runs in the process pool.
+
+    Use iter_results() from async code, or iter_results_sync() to consume the
+    results on a plain thread (the loop is paused while the caller persists).
+    """
+
+    def __init__(
+        self,
+        concurrency: int = CRAWL_ASYNC_CONCURRENCY,
+        cpu_workers: int = CRAWL_CPU_WORKERS,
+        per_host_limit: int = CRAWL_PER_HOST_LIMIT,
+        politeness_delay: float = CRAWL_POLITENESS_DELAY,
+        fetch=fetch_html_async,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.cpu_workers = max(0, cpu_workers)
+        self.per_host_limit = max(1, per_host_limit)
+        self.politeness_delay = max(0.0, politeness_delay)
+        self.fetch = fetch
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._next_start: Dict[str, float] = {}
+
+    async def fetch_one(
+        self, url: str, client, limit: asyncio.Semaphore, validator: dict = None
+    ) -> dict:
+        host = urlparse(url).netloc.lower()
+        host_sem = self._host_semaphores.get(host)
+        if host_sem is None:
+            host_sem = asyncio.Semaphore(self.per_host_limit)
+            self._host_semaphores[host] = host_sem
+        # Host slot (and politeness delay) first: waiting on a busy host must
+        # not hold one of the global slots other hosts could use
+        async with host_sem:
+            if self.politeness_delay:
+                now = time.monotonic()
+                start = max(now, self._next_start.get(host, now))
+                self._next_start[host] = start + self.politeness_delay
+                if start > now:
+                    await asyncio.sleep(start - now)
+            async with limit:
+                return await self.fetch(
+                    url, client=client, **_conditional_kwargs(validator)
+                )
+
+    async def _crawl_one(
+        self, index, url, client, limit, cpu_pool, validator=None
+    ) -> CrawlResult:
+        try:
+            fetch_res = await self.fetch_one(url, client, limit, validator)
+        except Exception as e:
+            return CrawlResult(index=index, url=url, error=str(e))
+        if not fetch_res["ok"]:
+            return CrawlResult(
+                index=index, url=url, fetch=fetch_res, error=fetch_res["error"]
+            )
+        if _is_unchanged(fetch_res, validator):
+            return CrawlResult(index=index, url=url, fetch=fetch_res, unchanged=True)
+        key, cached = _cached_outcome(fetch_res)
+        if cached is not None:
+            return _outcome_result(index, url, fetch_res, cached)
+        loop = asyncio.get_running_loop()
+        try:
+            if cpu_pool is not None:
+                outcome = await loop.run_in_executor(
+                    cpu_pool, analyze_html, fetch_res["html"], fetch_res["url"]
+                )
+            else:
+                outcome = await asyncio.to_thread(
+                    analyze_html, fetch_res["html"], fetch_res["url"]
+                )
+        except Exception as e:
+            logger.warning(f"Analysis failed for {url}: {e}")
+            return CrawlResult(index=index, url=url, fetch=fetch_res, error=str(e))
+        _remember_outcome(key, fetch_res, outcome)
+        return _outcome_result(index, url, fetch_res, outcome)
+
+    async def iter_results(
+        self,
+        urls: Iterable[str],
+        validators: Dict[str, dict] = None,
+        tick: float = None,
+    ) -> AsyncIterator[Optional[CrawlResult]]:
+        """
+        Yield results in completion order; closing the iterator cancels the rest.
+        `validators` and `tick` work as in CrawlEngine.iter_results.
+        """
+        urls = list(urls)
+        validators = validators or {}
+        if not urls:
+            return
+
+        limit = asyncio.Semaphore(self.concurrency)
+        cpu_pool = _cpu_executor(self.cpu_workers)
+        async with async_client(max_connections=self.concurrency) as client:
+            tasks = [
+                asyncio.create_task(
+                    self._crawl_one(i, u, client, limit, cpu_pool, validators.get(u))
+                )
+                for i, u in enumerate(urls)
+            ]
+            try:
+                remaining = set(tasks)
+                while remaining:
+                    done, remaining = await asyncio.wait(
+                        remaining, timeout=tick, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if not done:
+                        yield None
+                    for task in done:
+                        yield task.result()
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                if cpu_pool is not None:
+                    cpu_pool.shutdown(wait=False, cancel_futures=True)
+
+    def iter_results_sync(
+        self,
+        urls: Iterable[str],
+        validators: Dict[str, dict] = None,
+        tick: float = None,
+    ) -> Iterator[Optional[CrawlResult]]:
+        return iterate_async(self.iter_results(urls, validators, tick))
+
+
+def iterate_async(agen: AsyncIterator) -> Iterator:
+    """
+    Drive an async iterator from synchronous code on a private event loop.
+    The loop only runs while the next item is awaited, so the caller can do
+    blocking work (like ORM writes) between items on its own thread.
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(agen.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        try:
+            loop.run_until_complete(agen.aclose())
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            loop.close()
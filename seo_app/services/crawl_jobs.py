@@ -0,0 +1,238 @@
+# seo_app/services/crawl_jobs.py
+"""
+Background site crawls.
+- submit_crawl_job() queues a CrawlJob from the API
+- run_crawl_job() discovers URLs once (stored as CrawlJobURL rows) and then
+  crawls whatever is still pending, so a killed worker resumes where it stopped
+- Workers lease jobs: worker_id names the holder and updated_at is its
+  heartbeat, renewed with every saved batch and every CRAWL_JOB_HEARTBEAT
+  seconds in between (discovery and the final wait for LLM suggestions save
+  none); a running job is only taken over once its heartbeat is older than
+  CRAWL_JOB_LEASE_TIMEOUT seconds
+- run_pending_jobs() is the loop used by the run_crawl_jobs management command
+"""
+
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import timedelta
+from typing import List, Optional, Tuple
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import CrawlJob, CrawlJobURL
+from .sitemap_crawler import discover_page_urls, iter_crawled_pages
+
+logger = logging.getLogger(__name__)
+
+CRAWL_JOB_LEASE_TIMEOUT = int(os.getenv("CRAWL_JOB_LEASE_TIMEOUT", "300"))  # seconds
+CRAWL_JOB_HEARTBEAT = int(
+    os.getenv("CRAWL_JOB_HEARTBEAT", str(max(1, CRAWL_JOB_LEASE_TIMEOUT // 3)))
+)  # seconds
+
+
+class LeaseLost(Exception):
+    """Another worker took over the job after this worker's heartbeat expired."""
+
+
+def submit_crawl_job(
+    base_url: str, max_pages: int = 500, force_llm: bool = False
+) -> CrawlJob:
+    return CrawlJob.objects.create(
+        base_url=base_url, max_pages=max_pages, force_llm=force_llm
+    )
+
+
+def new_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def claim_next_job(worker: str) -> Optional[CrawlJob]:
+    """
+    Lease the next job to `worker`. Running jobs whose heartbeat (updated_at)
+    is older than CRAWL_JOB_LEASE_TIMEOUT (worker killed) are resumed before
+    new queued jobs are started. Both are claimed with a conditional update,
+    so two workers never take the same job.
+    """
+    now = timezone.now()
+    expired = now - timedelta(seconds=CRAWL_JOB_LEASE_TIMEOUT)
+    stale = CrawlJob.objects.filter(status="running", updated_at__lt=expired)
+    for job in stale.order_by("started_at")[:5]:
+        claimed = CrawlJob.objects.filter(
+            pk=job.pk, status="running", updated_at=job.updated_at
+        ).update(worker_id=worker, updated_at=now)
+        if claimed:
+            logger.info(f"Crawl job {job.pk}: lease of {job.worker_id!r} expired")
+            job.refresh_from_db()
+            return job
+
+    for job in CrawlJob.objects.filter(status="queued").order_by("created_at")[:5]:
+        claimed = CrawlJob.objects.filter(pk=job.pk, status="queued").update(
+            status="running", started_at=now, worker_id=worker, updated_at=now
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def _heartbeat(job: CrawlJob, worker: str, **fields):
+    """Update `job` and renew the lease; raises LeaseLost if `worker` lost it."""
+    renewed = CrawlJob.objects.filter(pk=job.pk, worker_id=worker).update(
+        updated_at=timezone.now(), **fields
+    )
+    if not renewed:
+        raise LeaseLost(f"Crawl job {job.pk} was claimed by another worker")
+
+
+class _LeaseKeeper:
+    """
+    Renews `worker`'s lease on `job` every `interval` seconds from a daemon
+    thread while the `with` block runs; stops once the lease is lost.
+    """
+
+    def __init__(self, job: CrawlJob, worker: str, interval: float = None):
+        self.job = job
+        self.worker = worker
+        self.interval = CRAWL_JOB_HEARTBEAT if interval is None else interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"crawl-job-{job.pk}-lease", daemon=True
+        )
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    _heartbeat(self.job, self.worker)
+                except LeaseLost as e:
+                    logger.warning(f"{e}; heartbeat of worker {self.worker} stops")
+                    return
+                except Exception as e:
+                    logger.warning(f"Crawl job {self.job.pk}: heartbeat failed: {e}")
+        finally:
+            # This thread's own database connection
+            connection.close()
+
+
+def _record(job: CrawlJob, worker: str, rows: List[Tuple[CrawlJobURL, dict]]):
+    """Store page summaries on their URL rows and bump the job's counters."""
+    now = timezone.now()
+    counts = {"pages_analyzed": 0, "pages_failed": 0}
+    for row, summary in rows:
+        row.status = summary["status"]
+        row.result = summary
+        row.updated_at = now
+        counts["pages_analyzed" if row.status == "success" else "pages_failed"] += 1
+    with transaction.atomic():
+        _heartbeat(job, worker, **{k: F(k) + n for k, n in counts.items() if n})
+        CrawlJobURL.objects.bulk_update(
+            [row for row, _ in rows], ["status", "result", "updated_at"]
+        )
+
+
+def _discover(job: CrawlJob) -> bool:
+    """Store the job's URL list. Returns False when nothing could be discovered."""
+    discovery = discover_page_urls(job.base_url, max_pages=job.max_pages)
+    job.sitemaps_found = discovery["sitemaps_found"]
+    if not discovery["ok"]:
+        job.status = "failed"
+        job.error = discovery["error"]
+        job.finished_at = timezone.now()
+        job.save(update_fields=["sitemaps_found", "status", "error", "finished_at"])
+        return False
+
+    with transaction.atomic():
+        CrawlJobURL.objects.bulk_create(
+            [
+                CrawlJobURL(job=job, position=i, url=url)
+                for i, url in enumerate(discovery["page_urls"])
+            ]
+        )
+        job.total_urls = len(discovery["page_urls"])
+        job.save(update_fields=["sitemaps_found", "total_urls"])
+    return True
+
+
+def run_crawl_job(job: CrawlJob, worker: str = None) -> CrawlJob:
+    """
+    Crawl every pending URL of `job` as `worker`, recording progress with
+    each saved batch. Without `worker` (e.g. from a shell) the job is taken
+    over by a new worker id. Stops quietly if the lease is lost.
+    """
+    if worker is None:
+        worker = new_worker_id()
+        job.status = "running"
+        job.worker_id = worker
+        job.started_at = job.started_at or timezone.now()
+        job.save(update_fields=["status", "worker_id", "started_at", "updated_at"])
+
+    try:
+        with _LeaseKeeper(job, worker):
+            if not job.urls.exists() and not _discover(job):
+                return job
+
+            pending = list(job.urls.filter(status="pending").order_by("position"))
+            if pending:
+                logger.info(f"Crawl job {job.pk}: {len(pending)} URLs pending")
+            _heartbeat(job, worker)
+
+            # Saved pages are recorded in the transaction that stores their
+            # analyses; errors and skipped pages are recorded as they arrive
+            recorded = set()
+
+            def on_saved(saved):
+                _record(job, worker, [(pending[i], summary) for i, summary in saved])
+                recorded.update(index for index, _ in saved)
+
+            pages = iter_crawled_pages(
+                [row.url for row in pending], force_llm=job.force_llm, on_saved=on_saved
+            )
+            try:
+                for index, summary in pages:
+                    if index not in recorded:
+                        _record(job, worker, [(pending[index], summary)])
+            finally:
+                pages.close()
+    except LeaseLost as e:
+        logger.warning(f"{e}; worker {worker} stops")
+        job.refresh_from_db()
+        return job
+    except Exception as e:
+        logger.error(f"Crawl job {job.pk} failed: {e}")
+        CrawlJob.objects.filter(pk=job.pk, worker_id=worker).update(
+            status="failed", error=str(e), finished_at=timezone.now()
+        )
+        job.refresh_from_db()
+        return job
+
+    CrawlJob.objects.filter(pk=job.pk, worker_id=worker).update(
+        status="completed", finished_at=timezone.now()
+    )
+    job.refresh_from_db()
+    return job
+
+
+def run_pending_jobs(limit: int = None, worker: str = None) -> int:
+    """Drain the queue as `worker`; returns how many jobs were processed."""
+    worker = worker or new_worker_id()
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim_next_job(worker)
+        if job is None:
+            break
+        run_crawl_job(job, worker)
+        processed += 1
+    return processed
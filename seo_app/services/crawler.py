@@ -1,11 +1,15 @@
 # seo_app/services/crawler.py
+import hashlib
 import re
 from urllib.parse import urljoin
 
+import httpx
 import requests
-from bs4 import BeautifulSoup
 
-DEFAULT_HEADERS = {"User-Agent": "SEO-AI-Checker/1.0 (+https://example.com)"}
+from .document import ParsedDocument
+from .http_client import async_client, http_get
+from .singleflight import SingleFlight
+from .url_canonicalizer import resolve_canonical
 
 
 def _clean(text: str) -> str:
@@ -14,24 +18,70 @@ def _clean(text: str) -> str:
     return re.sub(r"\s+", " ", text).strip()
 
 
-def fetch_html(url: str, timeout: int = 15):
+def content_hash(html: str) -> str:
+    """Fingerprint of a page body, used to spot unchanged pages on recrawl."""
+    return hashlib.sha256((html or "").encode("utf-8", "replace")).hexdigest()
+
+
+def conditional_headers(etag: str = None, last_modified: str = None) -> dict:
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    return headers
+
+
+def _fetch_result(resp, url: str, html: str = None) -> dict:
+    not_modified = resp.status_code == 304
+    return {
+        "ok": True,
+        "status_code": resp.status_code,
+        "url": url,
+        "html": html,
+        "error": None,
+        "not_modified": not_modified,
+        "etag": resp.headers.get("ETag", ""),
+        "last_modified": resp.headers.get("Last-Modified", ""),
+        "content_hash": None if not_modified else content_hash(html),
+    }
+
+
+# Concurrent fetches of the same URL (e.g. several users auditing one page)
+_fetches = SingleFlight()
+
+
+def fetch_html(
+    url: str, timeout: int = 15, etag: str = None, last_modified: str = None
+):
     """
     Fetch a URL and return a dict: { ok, status_code, url, html, error }
+    plus the response's etag / last_modified validators and content_hash.
     - Normalizes URL to include scheme (prefers https:// if missing).
+    - Pass the validators from a previous fetch to make a conditional request;
+      a 304 comes back as ok with not_modified=True and html=None.
+    - Calls made while an identical fetch is in flight wait for it and get
+      a copy of its result instead of requesting the page again.
     """
     if not url.startswith("http://") and not url.startswith("https://"):
         url = "https://" + url  # prefer https by default
 
+    result, _ = _fetches.do(
+        (url, etag, last_modified),
+        lambda: _fetch_html(url, timeout, etag, last_modified),
+    )
+    return dict(result)
+
+
+def _fetch_html(url: str, timeout: int, etag: str, last_modified: str):
     try:
-        resp = requests.get(url, headers=DEFAULT_HEADERS, timeout=timeout)
+        resp = http_get(
+            url, timeout=timeout, headers=conditional_headers(etag, last_modified)
+        )
+        if resp.status_code == 304:
+            return _fetch_result(resp, url)
         resp.raise_for_status()
-        return {
-            "ok": True,
-            "status_code": resp.status_code,
-            "url": resp.url,
-            "html": resp.text,
-            "error": None,
-        }
+        return _fetch_result(resp, resp.url, resp.text)
     except requests.exceptions.RequestException as exc:
         return {
             "ok": False,
@@ -42,32 +92,83 @@ def fetch_html(url: str, timeout: int = 15):
         }
 
 
-def parse_page(html: str, base_url: str = ""):
+async def fetch_html_async(
+    url: str,
+    client: httpx.AsyncClient = None,
+    timeout: int = 15,
+    etag: str = None,
+    last_modified: str = None,
+):
+    """
+    Async variant of fetch_html with the same return dict.
+    Pass a shared `client` (see http_client.async_client) to reuse connections.
+    """
+    if not url.startswith("http://") and not url.startswith("https://"):
+        url = "https://" + url  # prefer https by default
+
+    if client is None:
+        async with async_client(max_connections=1, timeout=timeout) as own_client:
+            return await fetch_html_async(
+                url,
+                client=own_client,
+                timeout=timeout,
+                etag=etag,
+                last_modified=last_modified,
+            )
+
+    try:
+        resp = await client.get(
+            url, timeout=timeout, headers=conditional_headers(etag, last_modified)
+        )
+        # httpx treats every non-2xx status as an error, 304 included
+        if resp.status_code == 304:
+            return _fetch_result(resp, url)
+        resp.raise_for_status()
+        return _fetch_result(resp, str(resp.url), resp.text)
+    except httpx.HTTPError as exc:
+        response = getattr(exc, "response", None)
+        return {
+            "ok": False,
+            "status_code": getattr(response, "status_code", None),
+            "url": url,
+            "html": None,
+            "error": str(exc),
+        }
+
+
+def parse_page(
+    html: str, base_url: str = "", doc: ParsedDocument = None, backend: str = None
+):
     """
     Parse HTML and return a structured dict with title, meta_description,
-    headings, images (absolute src + alt), word_count, and issues (simple rules).
+    headings, images (absolute src + alt), word_count, canonical_url (the
+    on-site <link rel="canonical"> target, else the page URL), canonical_href
+    (the tag's href as written, "" without one) and issues.
+    Pass `doc` to reuse a ParsedDocument instead of parsing `html` again, or
+    `backend` to override the HTML_PARSER_BACKEND setting.
     """
-    soup = BeautifulSoup(html or "", "html.parser")
+    if doc is None:
+        doc = ParsedDocument(html, base_url=base_url, backend=backend)
+    html = doc.html
+    base_url = base_url or doc.base_url
+    soup = doc.soup
 
     # Title
-    title_tag = soup.find("title")
-    title = _clean(title_tag.get_text()) if title_tag else ""
+    title = _clean(doc.title_tag.get_text()) if doc.title_tag else ""
 
     # Meta description (name="description" or og:description)
     md = ""
-    desc = soup.find("meta", attrs={"name": lambda v: v and v.lower() == "description"})
+    desc = doc.meta_name("description")
     if desc and desc.get("content"):
         md = _clean(desc["content"])
     else:
-        og = soup.find(
-            "meta", attrs={"property": lambda v: v and v.lower() == "og:description"}
-        )
+        og = doc.meta_property("og:description")
         if og and og.get("content"):
             md = _clean(og["content"])
 
     # Headings
     def get_headings(tag):
-        return [_clean(h.get_text()) for h in soup.find_all(tag)]
+        return [_clean(h.get_text()) for h in doc.headings[tag]]
 
     h1 = get_headings("h1")
     h2 = get_headings("h2")
@@ -75,27 +176,25 @@ def parse_page(html: str, base_url: str = ""):
 
     # Images: absolute src + alt
     images = []
-    for img in soup.find_all("img"):
+    for img in doc.images:
         src = img.get("src") or img.get("data-src") or ""
         if src:
             src = urljoin(base_url, src)
         images.append({"src": src, "alt": (img.get("alt") or "").strip()})
 
-    # Attempt to extract main text: prefer <main>, <article>, then biggest div/section, fallback to body
+    # Attempt to extract main text: prefer <main>, <article>, then the best-scoring
+    # div/section (text minus link text, computed in one pass), fallback to body
     def extract_main_text():
         main = soup.find("main") or soup.find("article")
         if main:
             t = _clean(main.get_text(separator=" ", strip=True))
             if len(t) > 50:
                 return t
-        # choose largest div/section
-        best = ""
-        for tag in soup.find_all(["div", "section"], recursive=True):
-            t = _clean(tag.get_text(separator=" ", strip=True))
-            if len(t) > len(best):
-                best = t
-        if len(best) > 50:
-            return best
+        block = doc.main_content_block()
+        if block is not None:
+            t = _clean(block.get_text(separator=" ", strip=True))
+            if len(t) > 50:
+                return t
         body = soup.body
         return _clean(body.get_text(separator=" ", strip=True)) if body else ""
 
@@ -164,6 +263,10 @@ def parse_page(html: str, base_url: str = ""):
         "images": images,
         "word_count": word_count,
         "main_text": main_text,  # For readability analysis
+        "canonical_url": (
+            resolve_canonical(base_url, doc.canonical_href) if base_url else ""
+        ),
+        "canonical_href": doc.canonical_href,
         "issues": issues,
         "raw_html_snippet": (html or "")[:8000],
     }
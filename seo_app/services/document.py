@@ -0,0 +1,183 @@
+# seo_app/services/document.py
+"""
+Parsed HTML document shared by the crawler and the rule analyzers.
+
+The HTML of a fetched page is parsed once into a ParsedDocument and every
+consumer (parse_page, the advanced checks, the BFS link extractor) reads the
+indexes built here instead of re-parsing the markup.
+"""
+
+import logging
+import os
+from functools import cached_property, lru_cache
+from typing import Dict, List, Optional, Union
+
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+from bs4.builder import builder_registry
+
+logger = logging.getLogger(__name__)
+
+HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+CONTENT_BLOCK_TAGS = ("div", "section")
+
+# String types that count as visible text (comments, scripts, styles and
+# doctypes are NavigableString subclasses and are skipped, as in get_text()).
+TEXT_STRING_TYPES = (NavigableString, CData)
+
+# Parser backends map to BeautifulSoup tree builders. "python" is the stdlib
+# html.parser (always available); "lxml" is C-backed and several times faster.
+PARSER_BACKENDS = {
+    "python": "html.parser",
+    "lxml": "lxml",
+}
+DEFAULT_PARSER_BACKEND = "python"
+HTML_PARSER_BACKEND = os.getenv("HTML_PARSER_BACKEND", DEFAULT_PARSER_BACKEND)
+
+
+@lru_cache(maxsize=None)
+def get_parser_features(backend: str = None) -> str:
+    """
+    Resolve a backend name to the BeautifulSoup features string.
+    Falls back to html.parser when the requested backend is unknown or its
+    library is not installed.
+    """
+    backend = (backend or HTML_PARSER_BACKEND).strip().lower()
+    features = PARSER_BACKENDS.get(backend)
+    if features is None:
+        logger.warning(f"Unknown HTML parser backend '{backend}', using html.parser")
+        return PARSER_BACKENDS[DEFAULT_PARSER_BACKEND]
+    if builder_registry.lookup(features) is None:
+        logger.warning(
+            f"HTML parser backend '{backend}' not installed, using html.parser"
+        )
+        return PARSER_BACKENDS[DEFAULT_PARSER_BACKEND]
+    return features
+
+
+class ParsedDocument:
+    """
+    A single parse of an HTML page plus precomputed lookups:
+    - meta tags by name and by property (lowercased keys, first tag wins)
+    - scripts, links (<a href>), images and headings in document order
+    - the first <link rel="canonical" href> tag
+    """
+
+    def __init__(self, html: str, base_url: str = "", backend: str = None):
+        self.html = html or ""
+        self.base_url = base_url
+        self.soup = BeautifulSoup(self.html, get_parser_features(backend))
+
+        self.title_tag: Optional[Tag] = None
+        self.canonical_tag: Optional[Tag] = None
+        self.meta_by_name: Dict[str, Tag] = {}
+        self.meta_by_property: Dict[str, Tag] = {}
+        self.scripts: List[Tag] = []
+        self.links: List[Tag] = []
+        self.images: List[Tag] = []
+        self.headings: Dict[str, List[Tag]] = {h: [] for h in HEADING_TAGS}
+
+        self._build_indexes()
+
+    def _build_indexes(self):
+        for tag in self.soup.find_all(True):
+            name = tag.name
+            if name == "meta":
+                meta_name = tag.get("name")
+                if meta_name:
+                    self.meta_by_name.setdefault(meta_name.strip().lower(), tag)
+                meta_prop = tag.get("property")
+                if meta_prop:
+                    self.meta_by_property.setdefault(meta_prop.strip().lower(), tag)
+            elif name == "script":
+                self.scripts.append(tag)
+            elif name == "a":
+                if tag.has_attr("href"):
+                    self.links.append(tag)
+            elif name == "img":
+                self.images.append(tag)
+            elif name in self.headings:
+                self.headings[name].append(tag)
+            elif name == "title" and self.title_tag is None:
+                self.title_tag = tag
+            elif name == "link" and self.canonical_tag is None:
+                rel = tag.get("rel") or []
+                if isinstance(rel, str):
+                    rel = rel.split()
+                if "canonical" in (r.lower() for r in rel) and tag.get("href"):
+                    self.canonical_tag = tag
+
+    def meta_name(self, name: str) -> Optional[Tag]:
+        """Return the first <meta name="..."> tag (case-insensitive)."""
+        return self.meta_by_name.get(name.lower())
+
+    def meta_property(self, prop: str) -> Optional[Tag]:
+        """Return the first <meta property="..."> tag (case-insensitive)."""
+        return self.meta_by_property.get(prop.lower())
+
+    def scripts_of_type(self, script_type: str) -> List[Tag]:
+        script_type = script_type.lower()
+        return [
+            s
+            for s in self.scripts
+            if (s.get("type") or "").strip().lower() == script_type
+        ]
+
+    @property
+    def canonical_href(self) -> str:
+        return (
+            (self.canonical_tag.get("href") or "").strip() if self.canonical_tag else ""
+        )
+
+    @cached_property
+    def body_text(self) -> str:
+        body = self.soup.body
+        return body.get_text() if body else ""
+
+    def main_content_block(self) -> Optional[Tag]:
+        """
+        Pick the div/section with the most non-link text.
+        Scores come from one bottom-up pass, so deeply nested layouts stay
+        linear instead of calling get_text() on every block.
+        """
+        stats = block_text_stats(self.soup)
+        best, best_score = None, 0
+        for tag in self.soup.find_all(CONTENT_BLOCK_TAGS):
+            text_len, link_len = stats[id(tag)]
+            # text length weighted by (1 - link density)
+            score = text_len - link_len
+            if score > best_score:
+                best, best_score = tag, score
+        return best
+
+
+def block_text_stats(root: Tag) -> Dict[int, tuple]:
+    """
+    Compute (text_length, link_text_length) for every tag under `root` in a
+    single bottom-up pass. Keys are id(tag).
+    """
+    tags = [root]
+    tags.extend(t for t in root.descendants if isinstance(t, Tag))
+    stats = {}
+    # Reverse document order visits every child before its parent
+    for tag in reversed(tags):
+        text_len = link_len = 0
+        for child in tag.contents:
+            if isinstance(child, Tag):
+                child_text, child_link = stats[id(child)]
+                text_len += child_text
+                link_len += child_link
+            elif type(child) in TEXT_STRING_TYPES:
+                text_len += len(child.strip())
+        if tag.name == "a":
+            link_len = text_len
+        stats[id(tag)] = (text_len, link_len)
+    return stats
+
+
+def as_document(
+    source: Union[str, ParsedDocument], base_url: str = ""
+) -> ParsedDocument:
+    """Accept either raw HTML or an already parsed document."""
+    if isinstance(source, ParsedDocument):
+        return source
+    return ParsedDocument(source, base_url=base_url)
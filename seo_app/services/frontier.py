@@ -0,0 +1,118 @@
+# seo_app/services/frontier.py
+"""
+Crawl frontier shared by the sitemap and BFS crawlers.
+- URLs are canonicalized before insertion and compared by dedupe_key (see
+  url_canonicalizer), so tracking-param, http/https and trailing-slash
+  variants of a page are only queued once
+- SeenURLs answers "have we had this URL?" in O(1): an exact set by default,
+  or a fixed-size Bloom filter (CRAWL_FRONTIER_BLOOM_CAPACITY) for
+  million-URL sites, where a tiny false-positive rate only skips a URL
+- CrawlFrontier is a FIFO of (url, depth) that accepts each URL once
+"""
+
+import hashlib
+import math
+import os
+from collections import deque
+from typing import Callable, Optional, Tuple
+
+from .url_canonicalizer import canonicalize_url, dedupe_key
+
+# 0 = exact in-memory set; > 0 = Bloom filter sized for this many URLs
+CRAWL_FRONTIER_BLOOM_CAPACITY = int(os.getenv("CRAWL_FRONTIER_BLOOM_CAPACITY", "0"))
+CRAWL_FRONTIER_BLOOM_ERROR_RATE = float(
+    os.getenv("CRAWL_FRONTIER_BLOOM_ERROR_RATE", "0.001")
+)
+
+
+class BloomFilter:
+    """Fixed-memory probabilistic set: no false negatives, rare false positives."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.num_bits = max(
+            8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        )
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, key: str) -> bool:
+        """Insert `key`; returns False if it was (probably) present already."""
+        added = False
+        for pos in self._positions(key):
+            byte, bit = divmod(pos, 8)
+            if not self._bits[byte] & (1 << bit):
+                self._bits[byte] |= 1 << bit
+                added = True
+        return added
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self._bits[pos // 8] & (1 << (pos % 8)) for pos in self._positions(key)
+        )
+
+
+class SeenURLs:
+    """Set of URLs (compared by dedupe key) backed by a set or a BloomFilter."""
+
+    def __init__(
+        self,
+        bloom_capacity: int = CRAWL_FRONTIER_BLOOM_CAPACITY,
+        normalize: Callable[[str], str] = canonicalize_url,
+        key: Callable[[str], str] = dedupe_key,
+    ):
+        self.normalize = normalize
+        self.key = key
+        if bloom_capacity > 0:
+            self._seen = BloomFilter(bloom_capacity, CRAWL_FRONTIER_BLOOM_ERROR_RATE)
+        else:
+            self._seen = set()
+        self.count = 0
+
+    def add(self, url: str) -> Optional[str]:
+        """Record `url`; returns its normalized form if new, else None."""
+        key = self.key(url)
+        if isinstance(self._seen, set):
+            if key in self._seen:
+                return None
+            self._seen.add(key)
+        elif not self._seen.add(key):
+            return None
+        self.count += 1
+        return self.normalize(url)
+
+    def __contains__(self, url: str) -> bool:
+        return self.key(url) in self._seen
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class CrawlFrontier:
+    """FIFO of (url, depth) in which every normalized URL is queued at most once."""
+
+    def __init__(self, seen: SeenURLs = None):
+        self.seen = seen if seen is not None else SeenURLs()
+        self._queue = deque()
+
+    def add(self, url: str, depth: int = 0) -> bool:
+        key = self.seen.add(url)
+        if key is None:
+            return False
+        self._queue.append((key, depth))
+        return True
+
+    def pop(self) -> Tuple[str, int]:
+        return self._queue.popleft()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def __bool__(self) -> bool:
+        return bool(self._queue)
@@ -0,0 +1,219 @@
+# seo_app/services/http_client.py
+"""
+Shared HTTP client for outbound requests.
+- One requests.Session per process, safe to use from worker threads
+- Per-host keep-alive connection pools (HTTP_POOL_CONNECTIONS / HTTP_POOL_MAXSIZE)
+- Advertises every content encoding urllib3 can decode (gzip, deflate,
+  brotli from requirements.txt, and zstd when that package is installed)
+- TTL cache for DNS lookups made when a pool opens a new connection
+- async_client() builds an httpx.AsyncClient for the asyncio crawl path
+  (HTTP/2 is used when the optional `h2` package is installed)
+"""
+
+import importlib.util
+import ipaddress
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, List, Tuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import (
+    ConnectTimeoutError,
+    NameResolutionError,
+    NewConnectionError,
+)
+from urllib3.util import connection as urllib3_connection
+from urllib3.util.request import ACCEPT_ENCODING
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "SEO-AI-Checker/1.0 (+https://example.com)"
+DEFAULT_HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept-Encoding": ACCEPT_ENCODING,
+}
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "32"))  # hosts kept
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))  # connections per host
+HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))  # seconds, 0 = off
+
+
+class DNSCache:
+    """Thread-safe TTL cache of getaddrinfo() results keyed by (host, port)."""
+
+    def __init__(self, ttl: int = HTTP_DNS_CACHE_TTL):
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, int], Tuple[float, List[tuple]]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, host: str, port: int) -> List[tuple]:
+        key = (host, port)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
+
+        infos = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        with self._lock:
+            self._entries[key] = (now + self.ttl, infos)
+        return infos
+
+    def evict(self, host: str, port: int):
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+dns_cache = DNSCache()
+
+
+def _is_ip_address(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+        return True
+    except ValueError:
+        return False
+
+
+class _CachedDNSConnectionMixin:
+    """
+    Resolve through dns_cache before opening a socket. Failures raise the
+    same urllib3 errors as its own connect path; when every cached address
+    fails the entry is evicted, so the next connection resolves afresh.
+    """
+
+    def _new_conn(self):
+        host = self._dns_host
+        if dns_cache.ttl <= 0 or _is_ip_address(host):
+            return super()._new_conn()
+        try:
+            infos = dns_cache.resolve(host, self.port)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+
+        error = None
+        for _family, _type, _proto, _canonname, sockaddr in infos:
+            try:
+                sock = urllib3_connection.create_connection(
+                    (sockaddr[0], self.port),
+                    self.timeout,
+                    source_address=self.source_address,
+                    socket_options=self.socket_options,
+                )
+            except OSError as e:
+                error = e
+                continue
+            sys.audit("http.client.connect", self, self.host, self.port)
+            return sock
+
+        dns_cache.evict(host, self.port)
+        if isinstance(error, socket.timeout):
+            raise ConnectTimeoutError(
+                self,
+                f"Connection to {self.host} timed out. "
+                f"(connect timeout={self.timeout})",
+            ) from error
+        raise NewConnectionError(
+            self, f"Failed to establish a new connection: {error}"
+        ) from error
+
+
+class _HTTPConnection(_CachedDNSConnectionMixin, HTTPConnection):
+    pass
+
+
+class _HTTPSConnection(_CachedDNSConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _HTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _HTTPConnection
+
+
+class _HTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _HTTPSConnection
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools use the DNS cache."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _HTTPConnectionPool,
+            "https": _HTTPSConnectionPool,
+        }
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    # Crawls hit many unrelated sites; never carry cookies between requests
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    adapter = PooledHTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def reset_session():
+    """Close pooled connections (e.g. after fork) and start a fresh session."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+    dns_cache.clear()
+
+
+def http_get(url: str, timeout: float = 15, **kwargs) -> requests.Response:
+    """GET through the shared session. Extra headers are merged with the defaults."""
+    return get_session().get(url, timeout=timeout, **kwargs)
+
+
+def async_client(max_connections: int = 100, timeout: float = 15) -> httpx.AsyncClient:
+    """
+    Build an AsyncClient for one crawl run (clients are bound to an event loop,
+    so unlike get_session() this is not shared). httpx negotiates its own
+    Accept-Encoding, so only the User-Agent is set here.
+    """
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        headers={"User-Agent": USER_AGENT},
+        follow_redirects=True,
+        timeout=timeout,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        ),
+    )
@@ -0,0 +1,85 @@
+# seo_app/services/incremental.py
+"""
+Incremental recrawls.
+- load_previous() finds the stored Page and latest PageAnalysis for each URL
+- URLs whose sitemap <lastmod> is not newer than that analysis are skipped
+  without a request
+- the rest are fetched with If-None-Match / If-Modified-Since; a 304 or an
+  unchanged content hash reuses the previous analysis instead of a new one
+"""
+
+import os
+from dataclasses import dataclass
+from datetime import datetime, time
+from datetime import timezone as dt_timezone
+from typing import Dict, List, Optional
+
+from django.db.models import Max
+from django.utils.dateparse import parse_date, parse_datetime
+
+from ..models import Page, PageAnalysis
+from .persistence import find_pages
+from .url_canonicalizer import dedupe_key
+
+CRAWL_INCREMENTAL = os.getenv("CRAWL_INCREMENTAL", "false").lower() == "true"
+
+
+@dataclass
+class PreviousCrawl:
+    page: Page
+    analysis: PageAnalysis
+
+    @property
+    def validator(self) -> dict:
+        """Arguments for CrawlEngine.iter_results(validators=...)."""
+        return {
+            "etag": self.page.etag,
+            "last_modified": self.page.last_modified,
+            "content_hash": self.page.content_hash,
+        }
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[datetime]:
+    """Parse a sitemap <lastmod> (W3C datetime or plain date) as an aware datetime."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            parsed = datetime.combine(day, time.max) if day else None
+    except ValueError:
+        return None
+    if parsed is not None and parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt_timezone.utc)
+    return parsed
+
+
+def load_previous(urls: List[str]) -> Dict[str, PreviousCrawl]:
+    """Stored page + latest analysis for each URL that has been analyzed before."""
+    pages = find_pages(urls)
+    if not pages:
+        return {}
+    latest_ids = (
+        PageAnalysis.objects.filter(page__in=pages.values())
+        .values("page")
+        .annotate(latest=Max("id"))
+        .values_list("latest", flat=True)
+    )
+    analyses = {
+        pa.page_id: pa for pa in PageAnalysis.objects.filter(id__in=list(latest_ids))
+    }
+
+    previous = {}
+    for url in urls:
+        page = pages.get(dedupe_key(url))
+        if page is not None and page.pk in analyses:
+            previous[url] = PreviousCrawl(page=page, analysis=analyses[page.pk])
+    return previous
+
+
+def is_fresh(previous: PreviousCrawl, lastmod: Optional[str]) -> bool:
+    """True when the sitemap says the page has not changed since its analysis."""
+    modified = parse_lastmod(lastmod)
+    return modified is not None and modified <= previous.analysis.created_at
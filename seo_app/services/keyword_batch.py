@@ -0,0 +1,145 @@
+# seo_app/services/keyword_batch.py
+"""
+Bulk keyword research.
+- Keywords are normalized (trimmed, lowercased, whitespace collapsed) and
+  deduplicated in input order; up to KEYWORD_BULK_MAX per request
+- Cached results are yielded first, straight from the keyword cache
+- Misses go to search_keywords on a pool of KEYWORD_BULK_WORKERS threads;
+  with SERPAPI_KEY set each miss also takes a token from a
+  SERPAPI_RATE_PER_MIN bucket shared by every bulk request in the process
+- Results are yielded as they finish, ready for NDJSON streaming
+"""
+
+import csv
+import io
+import logging
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List
+
+from .keyword_research import KeywordResearcher, search_cache
+from .rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+KEYWORD_BULK_MAX = int(os.getenv("KEYWORD_BULK_MAX", "10000"))
+KEYWORD_BULK_WORKERS = int(os.getenv("KEYWORD_BULK_WORKERS", "4"))
+SERPAPI_RATE_PER_MIN = float(os.getenv("SERPAPI_RATE_PER_MIN", "60"))
+MAX_KEYWORD_LENGTH = 500
+
+serpapi_bucket = TokenBucket.per_minute(SERPAPI_RATE_PER_MIN)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_keyword(keyword: Any) -> str:
+    return _WHITESPACE.sub(" ", str(keyword or "")).strip().lower()
+
+
+def dedupe_keywords(keywords: Iterable[Any]) -> List[str]:
+    """Normalized keywords in first-seen order, without blanks or overlong ones."""
+    seen = {}
+    for keyword in keywords:
+        keyword = normalize_keyword(keyword)
+        if keyword and len(keyword) <= MAX_KEYWORD_LENGTH:
+            seen.setdefault(keyword, None)
+    return list(seen)
+
+
+def parse_keyword_csv(text: str) -> List[str]:
+    """
+    Keywords from CSV text: the "keyword" column when the header has one,
+    otherwise the first column of every row.
+    """
+    rows = [row for row in csv.reader(io.StringIO(text)) if row]
+    if not rows:
+        return []
+    header = [cell.strip().lower() for cell in rows[0]]
+    if "keyword" in header:
+        column = header.index("keyword")
+        rows = rows[1:]
+    else:
+        column = 0
+    return [row[column] for row in rows if len(row) > column]
+
+
+def iter_bulk_research(
+    keywords: List[str],
+    researcher: KeywordResearcher = None,
+    workers: int = KEYWORD_BULK_WORKERS,
+    bucket: TokenBucket = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield a "start" record, then one "keyword" record per keyword (cache hits
+    first) and a closing "done" record with counts. `keywords` should
+    already be deduplicated (see dedupe_keywords).
+    """
+    researcher = researcher or KeywordResearcher()
+    if bucket is None and researcher.serpapi_key:
+        bucket = serpapi_bucket
+
+    misses = []
+    hits = []
+    for keyword in keywords:
+        cached = search_cache.get(keyword)
+        if cached:
+            hits.append((keyword, cached))
+        else:
+            misses.append(keyword)
+
+    yield {
+        "type": "start",
+        "total": len(keywords),
+        "cached": len(hits),
+        "to_research": len(misses),
+    }
+    for keyword, data in hits:
+        yield {"type": "keyword", "keyword": keyword, "cached": True, "data": data}
+
+    errors = 0
+    pool = ThreadPoolExecutor(
+        max_workers=max(1, workers), thread_name_prefix="keyword-bulk"
+    )
+    try:
+        pending = {}
+        queue = iter(misses)
+        while True:
+            # Keep at most `workers` lookups in flight
+            for keyword in queue:
+                if bucket is not None:
+                    delay = bucket.try_acquire()
+                    while delay:
+                        time.sleep(delay)
+                        delay = bucket.try_acquire()
+                pending[pool.submit(researcher.search_keywords, keyword)] = keyword
+                if len(pending) >= max(1, workers):
+                    break
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                keyword = pending.pop(future)
+                data = future.result()
+                if "error" in data:
+                    errors += 1
+                    yield {"type": "error", "keyword": keyword, "error": data["error"]}
+                else:
+                    yield {
+                        "type": "keyword",
+                        "keyword": keyword,
+                        "cached": False,
+                        "data": data,
+                    }
+    finally:
+        # Also runs when the client disconnects mid-stream
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    yield {
+        "type": "done",
+        "total": len(keywords),
+        "cached": len(hits),
+        "researched": len(misses) - errors,
+        "errors": errors,
+    }
@@ -0,0 +1,217 @@
+# seo_app/services/keyword_classifier.py
+"""
+Precompiled keyword classifier behind KeywordResearcher's heuristics.
+- Every term of every rule list is folded into one regex alternation
+  (longest terms first, whole words), so a keyword is scanned once and
+  comes back with the set of rules it triggers
+- Single-word noun terms of PLURAL_MIN_LENGTH or more letters also match
+  their plural ("reviews", "tools"); short words ("in", "vs", "buy"),
+  non-nouns and phrases match exactly
+- A matched phrase also triggers the rules of shorter terms it contains
+  ("best price" counts as "best" too), as overlapping matches are not
+  reported separately
+- score_keywords() classifies a list with a single scan over the joined
+  keywords, for bulk scoring
+"""
+
+import re
+from bisect import bisect_right
+from typing import Any, Dict, FrozenSet, List
+
+RULES: Dict[str, List[str]] = {
+    # Search volume buckets (checked in this order)
+    "volume_informational": ["how to", "what is", "best", "guide"],
+    "volume_commercial": ["buy", "shop", "price", "cost"],
+    "volume_local": ["near me", "local", "in", "near"],
+    # Difficulty adjustments
+    "brand": ["amazon", "ebay", "apple", "google", "facebook"],
+    "how_to": ["how to", "guide", "tutorial"],
+    "hard_transactional": ["buy", "cheap", "best price"],
+    "local": ["near me", "in", "local"],
+    # Search intent (checked in this order)
+    "intent_transactional": [
+        "buy",
+        "shop",
+        "order",
+        "price",
+        "cost",
+        "cheap",
+        "deal",
+        "discount",
+        "coupon",
+    ],
+    "intent_navigational": ["login", "account", "official", "website", "app"],
+    "intent_commercial": ["best", "top", "review", "comparison", "vs", "alternative"],
+    # CPC verticals (checked in this order)
+    "cpc_finance": ["insurance", "lawyer", "mortgage", "loan"],
+    "cpc_software": ["software", "app", "tool"],
+    "cpc_health": ["health", "medical", "doctor"],
+    "cpc_shopping": ["buy", "shop", "order"],
+}
+
+# Terms long enough to take a plural that are not nouns ("bests", "nears")
+NOT_NOUNS = frozenset({"best", "cheap", "local", "medical", "near", "official"})
+PLURAL_MIN_LENGTH = 4
+
+# (rule, base CPC, CPC added per difficulty point)
+CPC_RATES = [
+    ("cpc_finance", 5.0, 0.1),
+    ("cpc_software", 2.5, 0.05),
+    ("cpc_health", 2.0, 0.08),
+    ("cpc_shopping", 1.5, 0.03),
+]
+
+
+def _term_pattern(term: str) -> str:
+    # Not across "\n": match_rules_batch joins keywords with it
+    return r"[^\S\n]+".join(re.escape(word) for word in term.split())
+
+
+def _plural(term: str) -> str:
+    """The plural `term` also matches as, or "" when it matches exactly."""
+    if " " in term or len(term) < PLURAL_MIN_LENGTH or term in NOT_NOUNS:
+        return ""
+    return term + ("es" if term.endswith(("s", "x", "z", "ch", "sh")) else "s")
+
+
+def _compile(rules: Dict[str, List[str]]):
+    terms = sorted(
+        {t for words in rules.values() for t in words}, key=len, reverse=True
+    )
+    direct = {t: {r for r, words in rules.items() if t in words} for t in terms}
+    implied = {}
+    for term in terms:
+        found = set()
+        for other in terms:
+            if re.search(rf"\b{_term_pattern(other)}\b", term):
+                found |= direct[other]
+        implied[term] = frozenset(found)
+    alternatives = []
+    for term in terms:
+        plural = _plural(term)
+        if plural:
+            implied[plural] = implied[term]
+            alternatives.append(f"{re.escape(term)}(?:{plural[len(term):]})?")
+        else:
+            alternatives.append(_term_pattern(term))
+    return re.compile(rf"\b({'|'.join(alternatives)})\b"), implied
+
+
+_PATTERN, _TERM_RULES = _compile(RULES)
+_SPACES = re.compile(r"\s+")
+
+
+def _rules_for(match: str) -> FrozenSet[str]:
+    return _TERM_RULES[_SPACES.sub(" ", match)]
+
+
+def match_rules(keyword: str) -> FrozenSet[str]:
+    """Names of the RULES lists with a term in `keyword`."""
+    rules = set()
+    for match in _PATTERN.finditer(keyword.lower().replace("\n", " ")):
+        rules |= _rules_for(match.group(1))
+    return frozenset(rules)
+
+
+def match_rules_batch(keywords: List[str]) -> List[FrozenSet[str]]:
+    """match_rules for every keyword, in one scan over the whole list."""
+    lowered = [k.lower().replace("\n", " ") for k in keywords]
+    starts = []
+    offset = 0
+    for keyword in lowered:
+        starts.append(offset)
+        offset += len(keyword) + 1
+    text = "\n".join(lowered)
+
+    rules = [set() for _ in keywords]
+    for match in _PATTERN.finditer(text):
+        rules[bisect_right(starts, match.start()) - 1] |= _rules_for(match.group(1))
+    return [frozenset(r) for r in rules]
+
+
+def search_intent(rules: FrozenSet[str]) -> str:
+    for intent in ("transactional", "navigational", "commercial"):
+        if f"intent_{intent}" in rules:
+            return intent
+    return "informational"
+
+
+def keyword_difficulty(keyword: str, rules: FrozenSet[str]) -> int:
+    """Keyword difficulty (0-100), higher is harder to rank."""
+    difficulty = 50
+    word_count = len(keyword.split())
+    if word_count == 1:
+        difficulty += 20
+    elif word_count >= 4:
+        difficulty -= 15
+    if "brand" in rules:
+        difficulty += 25
+    if "how_to" in rules:
+        difficulty -= 10
+    if len(keyword) > 30:
+        difficulty -= 5
+    if "hard_transactional" in rules:
+        difficulty += 10
+    if "local" in rules:
+        difficulty -= 15
+    return max(0, min(100, difficulty))
+
+
+def heuristic_volume(keyword: str, rules: FrozenSet[str]) -> int:
+    """Monthly search volume guessed from keyword type and length."""
+    if "volume_informational" in rules:
+        volume = 5000
+    elif "volume_commercial" in rules:
+        volume = 8000
+    elif "volume_local" in rules:
+        volume = 3000
+    else:
+        volume = 4000
+
+    word_count = len(keyword.split())
+    if word_count == 1:
+        volume *= 2.5  # Single word keywords are usually higher volume
+    elif word_count == 2:
+        volume *= 1.8
+    elif word_count >= 4:
+        volume *= 0.6  # Long-tail keywords are lower volume
+    if len(keyword) > 20:
+        volume *= 0.7
+    return max(100, int(volume))
+
+
+def estimate_cpc(rules: FrozenSet[str], difficulty: int) -> float:
+    for rule, base, per_point in CPC_RATES:
+        if rule in rules:
+            return round(base + difficulty * per_point, 2)
+    return round(0.5 + difficulty * 0.01, 2)
+
+
+def competition_level(difficulty: int) -> str:
+    if difficulty < 30:
+        return "Low"
+    if difficulty < 60:
+        return "Medium"
+    return "High"
+
+
+def _scores(keyword: str, rules: FrozenSet[str]) -> Dict[str, Any]:
+    difficulty = keyword_difficulty(keyword, rules)
+    return {
+        "keyword": keyword,
+        "search_volume": heuristic_volume(keyword, rules),
+        "keyword_difficulty": difficulty,
+        "intent": search_intent(rules),
+        "cpc": estimate_cpc(rules, difficulty),
+        "competition": competition_level(difficulty),
+    }
+
+
+def score_keyword(keyword: str) -> Dict[str, Any]:
+    """Heuristic volume, difficulty, intent, CPC and competition for a keyword."""
+    return _scores(keyword, match_rules(keyword))
+
+
+def score_keywords(keywords: List[str]) -> List[Dict[str, Any]]:
+    """score_keyword for every keyword, sharing one classification scan."""
+    return [_scores(k, r) for k, r in zip(keywords, match_rules_batch(keywords))]
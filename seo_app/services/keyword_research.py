@@ -12,8 +12,17 @@ import logging
 import os
 from typing import Dict, List
 
-import requests
-from django.core.cache import cache
+from .cache_tier import TieredCache
+from .http_client import http_get
+from .keyword_classifier import (
+    competition_level,
+    estimate_cpc,
+    heuristic_volume,
+    keyword_difficulty,
+    match_rules,
+    score_keyword,
+    search_intent,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +30,7 @@ logger = logging.getLogger(__name__)
 SERPAPI_KEY = os.getenv("SERPAPI_KEY", "")  # Free tier available
 GOOGLE_TRENDS_ENABLED = True  # Built-in analysis
 CACHE_DURATION = 86400 * 7  # Cache for 7 days
+search_cache = TieredCache("keyword_search")
 
 
 class KeywordResearcher:
@@ -35,26 +45,9 @@ class KeywordResearcher:
         Returns search volume, difficulty, intent, and related terms.
         """
         try:
-            # Check cache first
-            cache_key = f"keyword_search:{keyword}"
-            cached = cache.get(cache_key)
-            if cached:
-                return cached
-
-            result = {
-                "keyword": keyword,
-                "search_volume": self._estimate_search_volume(keyword),
-                "keyword_difficulty": self._calculate_keyword_difficulty(keyword),
-                "intent": self._classify_search_intent(keyword),
-                "related_keywords": self._get_related_keywords(keyword, limit),
-                "cpc": self._estimate_cpc(keyword),
-                "competition": self._estimate_competition(keyword),
-                "trend_score": self._get_trend_score(keyword),
-            }
-
-            # Cache the result
-            cache.set(cache_key, result, CACHE_DURATION)
-            return result
+            return search_cache.get_or_compute(
+                keyword, lambda: self._search_keywords(keyword, limit), CACHE_DURATION
+            )
 
         except Exception as e:
             logger.error(f"Error in keyword search: {e}")
@@ -63,6 +56,23 @@ class KeywordResearcher:
                 "keyword": keyword,
             }
 
+    def _search_keywords(self, keyword: str, limit: int) -> Dict:
+        """Compute search_keywords' result (uncached)."""
+        scores = score_keyword(keyword)
+        search_volume = scores["search_volume"]
+        if self.serpapi_key:
+            search_volume = self._estimate_search_volume(keyword)
+        return {
+            "keyword": keyword,
+            "search_volume": search_volume,
+            "keyword_difficulty": scores["keyword_difficulty"],
+            "intent": scores["intent"],
+            "related_keywords": self._get_related_keywords(keyword, limit),
+            "cpc": scores["cpc"],
+            "competition": scores["competition"],
+            "trend_score": self._get_trend_score(keyword),
+        }
+
     def _estimate_search_volume(self, keyword: str) -> int:
         """
         Estimate search volume for a keyword.
@@ -89,7 +99,7 @@ class KeywordResearcher:
                 "api_key": self.serpapi_key,
                 "engine": "google",
             }
-            response = requests.get(url, params=params, timeout=5)
+            response = http_get(url, params=params, timeout=5)
             data = response.json()
 
             # Extract search volume from response
@@ -116,7 +126,7 @@ class KeywordResearcher:
                     "api_key": self.serpapi_key,
                     "engine": "google",
                 }
-                response = requests.get(url, params=params, timeout=10)
+                response = http_get(url, params=params, timeout=10)
                 data = response.json()
 
                 logger.info(f"SerpAPI response keys: {list(data.keys())}")
@@ -152,34 +162,7 @@ class KeywordResearcher:
         Estimate search volume using heuristics.
         Based on keyword length, type, and common patterns.
         """
-        keyword_lower = keyword.lower()
-
-        # Base scores for different keyword types
-        if any(
-            word in keyword_lower for word in ["how to", "what is", "best", "guide"]
-        ):
-            base_volume = 5000  # Informational keywords
-        elif any(word in keyword_lower for word in ["buy", "shop", "price", "cost"]):
-            base_volume = 8000  # Commercial keywords
-        elif any(word in keyword_lower for word in ["near me", "local", "in", "near"]):
-            base_volume = 3000  # Local keywords
-        else:
-            base_volume = 4000  # Generic keywords
-
-        # Adjust by keyword length
-        word_count = len(keyword.split())
-        if word_count == 1:
-            base_volume *= 2.5  # Single word keywords are usually higher volume
-        elif word_count == 2:
-            base_volume *= 1.8
-        elif word_count >= 4:
-            base_volume *= 0.6  # Long-tail keywords are lower volume
-
-        # Add some randomness based on keyword specificity
-        if len(keyword) > 20:
-            base_volume *= 0.7
-
-        return max(100, int(base_volume))
+        return heuristic_volume(keyword, match_rules(keyword))
 
     def _calculate_keyword_difficulty(self, keyword: str) -> int:
         """
@@ -187,74 +170,13 @@ class KeywordResearcher:
         Higher = harder to rank.
         Based on keyword length, type, and competition indicators.
         """
-        keyword_lower = keyword.lower()
-        difficulty = 50  # Base difficulty
-
-        # Single word keywords are harder
-        word_count = len(keyword.split())
-        if word_count == 1:
-            difficulty += 20
-        elif word_count >= 4:
-            difficulty -= 15
-
-        # Brand keywords usually have high difficulty
-        if any(
-            word in keyword_lower
-            for word in ["amazon", "ebay", "apple", "google", "facebook"]
-        ):
-            difficulty += 25
-
-        # How-to and guides are easier
-        if any(word in keyword_lower for word in ["how to", "guide", "tutorial"]):
-            difficulty -= 10
-
-        # Long-tail usually easier
-        if len(keyword) > 30:
-            difficulty -= 5
-
-        # Transactional keywords harder
-        if any(word in keyword_lower for word in ["buy", "cheap", "best price"]):
-            difficulty += 10
-
-        # Local keywords easier
-        if any(word in keyword_lower for word in ["near me", "in ", "local"]):
-            difficulty -= 15
-
-        return max(0, min(100, difficulty))
+        return keyword_difficulty(keyword, match_rules(keyword))
 
     def _classify_search_intent(self, keyword: str) -> str:
         """
         Classify search intent: informational, commercial, transactional, navigational.
         """
-        keyword_lower = keyword.lower()
-
-        # Transactional intent
-        transactional_words = [
-            "buy",
-            "shop",
-            "order",
-            "price",
-            "cost",
-            "cheap",
-            "deal",
-            "discount",
-            "coupon",
-        ]
-        if any(word in keyword_lower for word in transactional_words):
-            return "transactional"
-
-        # Navigational intent
-        navigational_words = ["login", "account", "official", "website", "app"]
-        if any(word in keyword_lower for word in navigational_words):
-            return "navigational"
-
-        # Commercial intent
-        commercial_words = ["best", "top", "review", "comparison", "vs", "alternative"]
-        if any(word in keyword_lower for word in commercial_words):
-            return "commercial"
-
-        # Default: Informational
-        return "informational"
+        return search_intent(match_rules(keyword))
 
     def _get_related_keywords(self, keyword: str, limit: int = 10) -> List[str]:
         """
@@ -297,35 +219,14 @@ class KeywordResearcher:
         Estimate CPC (Cost Per Click) for the keyword.
         Based on keyword type and difficulty.
         """
-        keyword_lower = keyword.lower()
-
-        # Base CPC by type
-        if any(
-            word in keyword_lower
-            for word in ["insurance", "lawyer", "mortgage", "loan"]
-        ):
-            return round(5.0 + (self._calculate_keyword_difficulty(keyword) * 0.1), 2)
-        elif any(word in keyword_lower for word in ["software", "app", "tool"]):
-            return round(2.5 + (self._calculate_keyword_difficulty(keyword) * 0.05), 2)
-        elif any(word in keyword_lower for word in ["health", "medical", "doctor"]):
-            return round(2.0 + (self._calculate_keyword_difficulty(keyword) * 0.08), 2)
-        elif any(word in keyword_lower for word in ["buy", "shop", "order"]):
-            return round(1.5 + (self._calculate_keyword_difficulty(keyword) * 0.03), 2)
-        else:
-            return round(0.5 + (self._calculate_keyword_difficulty(keyword) * 0.01), 2)
+        rules = match_rules(keyword)
+        return estimate_cpc(rules, keyword_difficulty(keyword, rules))
 
     def _estimate_competition(self, keyword: str) -> str:
         """
         Estimate competition level: Low, Medium, High.
         """
-        difficulty = self._calculate_keyword_difficulty(keyword)
-
-        if difficulty < 30:
-            return "Low"
-        elif difficulty < 60:
-            return "Medium"
-        else:
-            return "High"
+        return competition_level(self._calculate_keyword_difficulty(keyword))
 
     def _get_trend_score(self, keyword: str) -> List[int]:
         """
@@ -0,0 +1,143 @@
+# seo_app/services/llm_batch.py
+"""
+Multi-page LLM prompts.
+- build_batch_prompt() packs several pages' metadata into one request that
+  asks for {"results": [{"page_id": ..., <suggestion keys>}, ...]}
+- parse_batch_response() reads the reply item by item, so one malformed or
+  truncated entry only loses that page
+- generate_batch() ties them to a provider's call function and falls back
+  to single-page calls for pages missing from the reply
+
+Used by LLMProvider.generate_suggestions_batch() (see llm_providers).
+"""
+
+import json
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional
+
+from .llm_prompts import SUGGESTION_KEYS, issues_text, normalize_suggestions
+
+# Output budget per page in a batched request
+BATCH_TOKENS_PER_PAGE = 400
+
+
+def _page_block(page_id: str, parsed: Dict[str, Any]) -> str:
+    h1s = parsed.get("h1", [])
+    h1_text = " | ".join(h1s[:3]) if isinstance(h1s, list) else str(h1s)
+    # A shorter snippet than the single-page prompt keeps K pages in budget
+    snippet = parsed.get("raw_html_snippet", "")[:800]
+    return f"""PAGE_ID: {page_id}
+TITLE: {parsed.get("title", "")}
+META: {parsed.get("meta_description", "")}
+H1: {h1_text}
+WORD_COUNT: {parsed.get("word_count", 0)}
+ISSUES: {issues_text(parsed.get("issues", []))}
+HTML_SNIPPET: {snippet}"""
+
+
+def build_batch_prompt(pages: Dict[str, Dict[str, Any]]) -> str:
+    """Prompt for {page_id: parsed}; page ids are echoed back in the reply."""
+    blocks = "\n\n".join(_page_block(pid, parsed) for pid, parsed in pages.items())
+    prompt = f"""
+You are an SEO assistant. For EACH page below, generate SEO suggestions.
+Return a JSON object ONLY (no explanation, no commentary) that parses cleanly
+by `json.loads()`, of the form {{"results": [ ... ]}} with one entry per page.
+Each entry must contain exactly these keys:
+- page_id (string, copied from PAGE_ID)
+- improved_title (string)
+- improved_meta_description (string)
+- improved_h1 (string)
+- seo_summary (string)
+- suggestions (array of strings)
+
+Pages:
+
+{blocks}
+
+Output example:
+{{"results": [
+  {{"page_id": "1", "improved_title": "string", "improved_meta_description": "string",
+    "improved_h1": "string", "seo_summary": "string", "suggestions": ["string"]}}
+]}}
+
+Produce ONLY the JSON object (no markdown, no commentary). Values should be \
+concise and avoid newlines.
+"""
+    return prompt.strip()
+
+
+def _iter_objects(text: str) -> Iterator[Dict[str, Any]]:
+    """
+    JSON objects in `text` that decode on their own. An object that does not
+    (like an unterminated wrapper) is skipped into, so its complete children
+    are still found.
+    """
+    decoder = json.JSONDecoder()
+    pos = text.find("{")
+    while pos != -1:
+        try:
+            obj, end = decoder.raw_decode(text, pos)
+        except ValueError:
+            pos = text.find("{", pos + 1)
+            continue
+        if isinstance(obj, dict):
+            yield obj
+        pos = text.find("{", end)
+
+
+def parse_batch_response(
+    text: str,
+    page_ids: List[str],
+    extract_json: Callable[[str], Optional[Any]],
+) -> Dict[str, Dict[str, Any]]:
+    """
+    {page_id: suggestions} for the entries of a batched reply that parse and
+    name one of `page_ids`. `extract_json` is the provider module's
+    _extract_json_from_text; entries are salvaged one by one when the reply
+    as a whole does not parse (e.g. it was cut off at the token limit).
+    """
+    text = text or ""
+    doc = extract_json(text)
+    if isinstance(doc, dict):
+        items = doc.get("results")
+    else:
+        items = doc
+    if not isinstance(items, list):
+        # e.g. the "results" array was cut short: keep the entries that completed
+        items = [obj for obj in _iter_objects(text) if "page_id" in obj]
+
+    wanted = set(page_ids)
+    results = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        page_id = str(item.pop("page_id", ""))
+        if page_id in wanted and page_id not in results:
+            if any(k in item for k in SUGGESTION_KEYS):
+                results[page_id] = normalize_suggestions(item)
+    return results
+
+
+def generate_batch(
+    pages: Dict[Hashable, Dict[str, Any]],
+    call: Callable[[str, int], str],
+    extract_json: Callable[[str], Optional[Any]],
+    single: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+) -> Dict[Hashable, Dict[str, Any]]:
+    """
+    Suggestions for {key: parsed} with one `call(prompt, max_tokens)`.
+    Pages the reply does not cover are passed to `single` (a single-page
+    generate_suggestions) when given, and otherwise left out of the result.
+    Exceptions from `call` propagate, so callers can retry the whole batch.
+    """
+    keys = list(pages)
+    ids = {str(i + 1): key for i, key in enumerate(keys)}
+    prompt = build_batch_prompt({pid: pages[key] for pid, key in ids.items()})
+    text = call(prompt, BATCH_TOKENS_PER_PAGE * len(keys))
+    parsed = parse_batch_response(text, list(ids), extract_json)
+
+    results = {ids[pid]: item for pid, item in parsed.items()}
+    if single is not None:
+        for key in keys:
+            if key not in results:
+                results[key] = single(pages[key])
+    return results
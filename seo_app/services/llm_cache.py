@@ -0,0 +1,102 @@
+# seo_app/services/llm_cache.py
+"""
+Reuse of LLM suggestions across analyses.
+- Suggestions are stored on each PageAnalysis together with llm_input_hash, a
+  hash of the page data the prompt is built from (title, meta description,
+  H1s, issues) and the model name
+- A new analysis of the same page with the same inputs, within LLM_CACHE_DAYS
+  of the original generation, reuses those suggestions instead of calling
+  the LLM again
+- Rule-based fallback output and failed LLM calls are never reused, so they
+  are retried on the next analysis
+"""
+
+import hashlib
+import json
+import os
+from datetime import timedelta
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from django.utils import timezone
+
+from ..models import PageAnalysis
+
+LLM_CACHE_DAYS = int(os.getenv("LLM_CACHE_DAYS", "7"))
+
+
+def _issue_text(issue: Any) -> str:
+    # Same rendering as llm_prompts.issues_text
+    if isinstance(issue, dict):
+        return f"{issue.get('code')}: {issue.get('message')}"
+    return str(issue)
+
+
+def llm_input_hash(parsed: Dict[str, Any], model: str = "") -> str:
+    """
+    Hash of the prompt inputs taken from a parse_page() dict and of the
+    `model` the suggestions come from (see llm_registry.provider_model).
+    """
+    h1s = parsed.get("h1", [])
+    inputs = {
+        "model": model,
+        "title": parsed.get("title", ""),
+        "meta": parsed.get("meta_description", ""),
+        "h1": h1s[:3] if isinstance(h1s, list) else str(h1s),
+        "issues": [_issue_text(i) for i in parsed.get("issues", [])],
+    }
+    payload = json.dumps(inputs, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_reusable(suggestions: Any) -> bool:
+    """False for empty, failed (ok: false) or rule-based fallback suggestions."""
+    return (
+        isinstance(suggestions, dict)
+        and bool(suggestions)
+        and suggestions.get("ok") is not False
+        and not suggestions.get("fallback")
+    )
+
+
+def _candidates(ttl_days: int):
+    cutoff = timezone.now() - timedelta(days=ttl_days)
+    return (
+        PageAnalysis.objects.filter(llm_generated_at__gte=cutoff)
+        .exclude(llm_input_hash="")
+        .order_by("-llm_generated_at")
+    )
+
+
+def find_cached_suggestions(
+    page, input_hash: str, ttl_days: int = LLM_CACHE_DAYS
+) -> Optional[PageAnalysis]:
+    """Most recent analysis of `page` with reusable suggestions for `input_hash`."""
+    found = find_cached_suggestions_bulk([(page.pk, input_hash)], ttl_days)
+    return found.get((page.pk, input_hash))
+
+
+def find_cached_suggestions_bulk(
+    keys: Iterable[Tuple[int, str]], ttl_days: int = LLM_CACHE_DAYS
+) -> Dict[Tuple[int, str], PageAnalysis]:
+    """find_cached_suggestions for many (page_id, input_hash) pairs in one query."""
+    keys = set(keys)
+    if ttl_days <= 0 or not keys:
+        return {}
+    found = {}
+    candidates = _candidates(ttl_days).filter(
+        page_id__in={page_id for page_id, _ in keys},
+        llm_input_hash__in={h for _, h in keys},
+    )
+    for pa in candidates:
+        key = (pa.page_id, pa.llm_input_hash)
+        if key in keys and is_reusable(pa.llm_suggestions):
+            found.setdefault(key, pa)
+    return found
+
+
+def copy_suggestions(source: PageAnalysis, target: PageAnalysis):
+    """Give `target` the suggestions of `source`, keeping the original timestamp."""
+    target.llm_suggestions = source.llm_suggestions
+    target.llm_model = source.llm_model
+    target.llm_generated_at = source.llm_generated_at
+    target.llm_input_hash = source.llm_input_hash
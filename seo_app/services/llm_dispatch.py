@@ -0,0 +1,277 @@
+# seo_app/services/llm_dispatch.py
+"""
+Concurrent LLM suggestion generation for crawls.
+- Calls run on their own thread pool, at most LLM_MAX_IN_FLIGHT at a time,
+  so slow providers never hold up fetching, scoring or persistence
+- A token bucket per provider (LLM_RATE_PER_MIN, bursts of LLM_RATE_BURST),
+  shared by every dispatcher in the process, keeps the request rate inside
+  the provider quota however many crawls run at once
+- Failed calls are retried with exponential backoff and jitter; calls
+  waiting for a token or a retry sit in one queue that a single scheduler
+  thread per dispatcher releases as they come due, so no worker thread
+  sits in time.sleep
+- An optional circuit breaker (llm_health) skips calls while the provider
+  is down
+- Pages can be grouped LLM_BATCH_SIZE to a request (see llm_batch)
+- Results are collected with completed() / wait() on the caller's thread,
+  which writes them to the database (see persistence.CrawlResultWriter)
+"""
+
+import heapq
+import itertools
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+from .llm_health import CircuitBreaker, fallback_suggestions
+from .rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "4"))
+LLM_RATE_PER_MIN = float(os.getenv("LLM_RATE_PER_MIN", "60"))  # 0 = unlimited
+LLM_RATE_BURST = float(os.getenv("LLM_RATE_BURST", str(LLM_MAX_IN_FLIGHT)))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "1.0"))  # seconds
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "30.0"))
+# Pages per request when the provider supports batched prompts (see llm_batch)
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "5"))
+# How long a crawl waits at the end for each outstanding call (seconds)
+LLM_WAIT_TIMEOUT = float(os.getenv("LLM_WAIT_TIMEOUT", "120"))
+
+# Put on the results queue when calls are dropped, to wake wait()
+_DROPPED = object()
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def bucket_for(provider: str) -> TokenBucket:
+    """The process-wide request budget for `provider`."""
+    with _buckets_lock:
+        if provider not in _buckets:
+            _buckets[provider] = TokenBucket.per_minute(
+                LLM_RATE_PER_MIN, LLM_RATE_BURST
+            )
+        return _buckets[provider]
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff for retry number `attempt` (0-based)."""
+    return random.uniform(0, min(cap, base * (2**attempt)))
+
+
+class LLMDispatcher:
+    """
+    Run `suggest(parsed)` for submitted pages concurrently.
+
+    submit(key, parsed) queues a call; completed() returns the (key, result)
+    pairs finished so far without blocking, wait() yields the rest as they
+    finish. A call that still fails after `max_retries` retries yields
+    {"ok": False, "error": ...}, the shape the analyzers use for errors.
+
+    With `suggest_batch` ({key: parsed} -> {key: result}, see llm_batch),
+    pages are sent `batch_size` at a time, one token and one round-trip per
+    group; pages missing from a batched reply are retried on their own with
+    `suggest`. Call flush() to send a partially filled group.
+
+    Without a `bucket`, calls draw on bucket_for(the breaker's provider).
+
+    With a `breaker` (see llm_health), outcomes are recorded on it and, while
+    it is open, pages get the rule-based suggestions instead of a call; so
+    do pages whose calls keep failing.
+    """
+
+    def __init__(
+        self,
+        suggest: Callable[[dict], dict],
+        max_in_flight: int = LLM_MAX_IN_FLIGHT,
+        bucket: Optional[TokenBucket] = None,
+        max_retries: int = LLM_MAX_RETRIES,
+        backoff_base: float = LLM_BACKOFF_BASE,
+        backoff_max: float = LLM_BACKOFF_MAX,
+        suggest_batch: Optional[Callable[[Dict[Hashable, dict]], Dict]] = None,
+        batch_size: int = LLM_BATCH_SIZE,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.suggest = suggest
+        self.breaker = breaker
+        self.suggest_batch = suggest_batch
+        self.batch_size = max(1, batch_size) if suggest_batch else 1
+        self.bucket = bucket or bucket_for(breaker.name if breaker else "")
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, max_in_flight), thread_name_prefix="llm"
+        )
+        self._results: "queue.Queue[Tuple[Hashable, Dict[str, Any]]]" = queue.Queue()
+        # Re-entrant: a future cancelled as it is submitted runs its done
+        # callback (which takes the lock) on the submitting thread
+        self._lock = threading.RLock()
+        self._wakeup = threading.Condition(self._lock)
+        # (due, seq, items, attempt) heap of calls waiting for a token or retry
+        self._waiting: List[Tuple[float, int, List[Tuple], int]] = []
+        self._seq = itertools.count()
+        self._scheduler: Optional[threading.Thread] = None
+        self._group: List[Tuple[Hashable, dict]] = []
+        self._outstanding = 0
+        self._closed = False
+
+    @property
+    def outstanding(self) -> int:
+        """Calls submitted whose result has not been collected yet."""
+        return self._outstanding
+
+    def submit(self, key: Hashable, parsed: dict):
+        with self._lock:
+            self._outstanding += 1
+        self._group.append((key, parsed))
+        if len(self._group) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Send the pages submitted since the last full group."""
+        group, self._group = self._group, []
+        if group:
+            self._start(group, 0)
+
+    def _start(self, items: List[Tuple[Hashable, dict]], attempt: int, delay=0.0):
+        """Call for `items` now if a token is free, else queue it for the scheduler."""
+        with self._lock:
+            if self._closed:
+                self._drop(len(items))
+                return
+            if delay <= 0 and not self._waiting and self.bucket.try_acquire() == 0:
+                self._submit(items, attempt)
+                return
+            due = time.monotonic() + max(0.0, delay)
+            heapq.heappush(self._waiting, (due, next(self._seq), items, attempt))
+            if self._scheduler is None:
+                self._scheduler = threading.Thread(
+                    target=self._schedule, name="llm-scheduler", daemon=True
+                )
+                self._scheduler.start()
+            self._wakeup.notify()
+
+    def _schedule(self):
+        """Release queued calls as they come due and tokens refill."""
+        with self._lock:
+            while not self._closed:
+                if not self._waiting:
+                    self._wakeup.wait()
+                    continue
+                wait = self._waiting[0][0] - time.monotonic()
+                if wait <= 0:
+                    wait = self.bucket.try_acquire()
+                if wait > 0:
+                    self._wakeup.wait(wait)
+                    continue
+                _, _, items, attempt = heapq.heappop(self._waiting)
+                self._submit(items, attempt)
+
+    def _submit(self, items: List[Tuple[Hashable, dict]], attempt: int):
+        try:
+            future = self._pool.submit(self._call, items, attempt)
+        except RuntimeError:
+            self._drop(len(items))  # shut down meanwhile
+            return
+        future.add_done_callback(
+            lambda f: self._drop(len(items)) if f.cancelled() else None
+        )
+
+    def _drop(self, count: int):
+        """Forget `count` calls that will never produce a result."""
+        if not count:
+            return
+        with self._lock:
+            self._outstanding -= count
+        self._results.put(_DROPPED)
+
+    def _call(self, items: List[Tuple[Hashable, dict]], attempt: int):
+        if self.breaker is not None and not self.breaker.allow():
+            # provider is down: rule-based suggestions, no call, no retry
+            for key, parsed in items:
+                self._results.put((key, fallback_suggestions(parsed)))
+            return
+
+        started = time.monotonic()
+        try:
+            if len(items) > 1:
+                results = self.suggest_batch(dict(items))
+            else:
+                key, parsed = items[0]
+                results = {key: self.suggest(parsed)}
+                if results[key] and results[key].get("ok") is False:
+                    raise ValueError(results[key].get("error", "LLM call failed"))
+        except Exception as e:
+            if self.breaker is not None:
+                self.breaker.record_failure(str(e))
+            if attempt < self.max_retries and not self._closed:
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                logger.warning(f"LLM call failed ({e}), retrying in {delay:.1f}s")
+                self._start(items, attempt + 1, delay)
+                return
+            if self.breaker is not None:
+                results = {key: fallback_suggestions(parsed) for key, parsed in items}
+            else:
+                results = {key: {"ok": False, "error": str(e)} for key, _ in items}
+        else:
+            if self.breaker is not None:
+                self.breaker.record_success(time.monotonic() - started)
+
+        for key, parsed in items:
+            if key in results:
+                self._results.put((key, results[key] or {}))
+            else:
+                # left out of a batched reply: ask for this page alone
+                self._start([(key, parsed)], 0)
+
+    def completed(self) -> List[Tuple[Hashable, Dict[str, Any]]]:
+        """Results finished so far; never blocks."""
+        done = []
+        while True:
+            try:
+                item = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _DROPPED:
+                done.append(item)
+        with self._lock:
+            self._outstanding -= len(done)
+        return done
+
+    def wait(self, timeout: float = None) -> Iterator[Tuple[Hashable, Dict[str, Any]]]:
+        """
+        Yield the remaining results as they finish. With `timeout` (seconds
+        per result), stops early when nothing finishes in time.
+        """
+        self.flush()
+        while self._outstanding > 0:
+            try:
+                item = self._results.get(timeout=timeout)
+            except queue.Empty:
+                logger.warning(f"Gave up waiting for {self._outstanding} LLM calls")
+                return
+            if item is _DROPPED:
+                continue
+            with self._lock:
+                self._outstanding -= 1
+            yield item
+
+    def shutdown(self):
+        """Drop unsent groups, queued calls and retries; running calls finish."""
+        with self._lock:
+            self._closed = True
+            dropped = len(self._group) + sum(len(w[2]) for w in self._waiting)
+            self._group, self._waiting = [], []
+            self._wakeup.notify_all()
+            self._drop(dropped)
+        # Cancelled calls are dropped by their futures' done callbacks
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,174 @@
+# seo_app/services/llm_health.py
+"""
+LLM provider health tracking with a circuit breaker.
+- Each provider ("gemini", "openai") has one CircuitBreaker per process
+- LLM_BREAKER_FAILURES consecutive failures or latency-SLO breaches
+  (calls slower than LLM_LATENCY_SLO seconds) open the circuit
+- While open, calls are skipped and callers use the rule-based suggestions
+  straight away; after LLM_BREAKER_COOLDOWN seconds one probe call is let
+  through (half-open) and its outcome closes or re-opens the circuit
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .analyzer_suggestions import generate_suggestions_from_issues
+
+logger = logging.getLogger(__name__)
+
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "3"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "60"))  # seconds
+LLM_LATENCY_SLO = float(os.getenv("LLM_LATENCY_SLO", "10"))  # seconds, 0 = off
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Thread-safe consecutive-failure circuit breaker for one provider."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = LLM_BREAKER_FAILURES,
+        cooldown: float = LLM_BREAKER_COOLDOWN,
+        latency_slo: float = LLM_LATENCY_SLO,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.latency_slo = latency_slo
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.calls = 0
+        self.failures = 0
+        self.short_circuited = 0
+        self.last_error = ""
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go to the provider now."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if (
+                self.state == OPEN
+                and time.monotonic() - self.opened_at >= self.cooldown
+            ):
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True  # exactly one probe at a time
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record_success(self, latency: float = 0.0):
+        if self.latency_slo and latency > self.latency_slo:
+            self.record_failure(f"latency {latency:.1f}s over {self.latency_slo}s SLO")
+            return
+        with self._lock:
+            self.calls += 1
+            self.consecutive_failures = 0
+            if self.state != CLOSED:
+                logger.info(f"LLM provider '{self.name}' recovered, closing circuit")
+            self.state = CLOSED
+            self._probing = False
+
+    def record_failure(self, error: str = ""):
+        with self._lock:
+            self.calls += 1
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_error = error
+            self._probing = False
+            if (
+                self.state == HALF_OPEN
+                or self.consecutive_failures >= self.failure_threshold
+            ):
+                if self.state != OPEN:
+                    logger.warning(
+                        f"LLM provider '{self.name}' failing ({error}), "
+                        f"skipping calls for {self.cooldown:.0f}s"
+                    )
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def reset(self):
+        """Close the circuit and forget past outcomes."""
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self._probing = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "provider": self.name,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "calls": self.calls,
+            "failures": self.failures,
+            "short_circuited": self.short_circuited,
+            "last_error": self.last_error,
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(provider: str) -> CircuitBreaker:
+    with _breakers_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker(provider)
+        return _breakers[provider]
+
+
+def health_snapshot() -> Dict[str, Dict[str, Any]]:
+    """State of every provider's breaker, for logging and status endpoints."""
+    with _breakers_lock:
+        return {name: b.snapshot() for name, b in _breakers.items()}
+
+
+def reset_breakers():
+    """Close every provider's circuit."""
+    with _breakers_lock:
+        for breaker in _breakers.values():
+            breaker.reset()
+
+
+def fallback_suggestions(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    """Rule-based suggestions, marked the way analyze_url stores them."""
+    return {**generate_suggestions_from_issues(parsed), "fallback": True}
+
+
+def guarded_call(
+    breaker: CircuitBreaker,
+    generate: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]],
+    parsed: Dict[str, Any],
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    (suggestions, from_llm). Calls `generate` when the breaker allows it and
+    records the outcome; an {"ok": False} result counts as a failure. Falls
+    back to the rule-based suggestions otherwise.
+    """
+    if generate is None or not breaker.allow():
+        return fallback_suggestions(parsed), False
+    started = time.monotonic()
+    try:
+        out = generate(parsed)
+    except Exception as e:
+        breaker.record_failure(str(e))
+        logger.warning(f"LLM generation failed: {e}")
+        return fallback_suggestions(parsed), False
+    if not out or out.get("ok") is False:
+        breaker.record_failure((out or {}).get("error", "empty response"))
+        return fallback_suggestions(parsed), False
+    breaker.record_success(time.monotonic() - started)
+    return out, True
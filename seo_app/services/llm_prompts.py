@@ -0,0 +1,158 @@
+# seo_app/services/llm_prompts.py
+"""
+Prompt building and reply parsing shared by every LLM provider.
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+
+SUGGESTION_KEYS = [
+    "improved_title",
+    "improved_meta_description",
+    "improved_h1",
+    "seo_summary",
+    "suggestions",
+]
+
+
+def issues_text(issues: List[Any]) -> str:
+    # Handle both dict format (from crawler) and string format (from analyzer_rules)
+    return (
+        "; ".join(
+            (
+                f"{it.get('code')}: {it.get('message')}"
+                if isinstance(it, dict)
+                else str(it)
+            )
+            for it in issues
+        )
+        or "none"
+    )
+
+
+def build_prompt(parsed: Dict[str, Any]) -> str:
+    snippet = parsed.get("raw_html_snippet", "")[:2000]
+    title = parsed.get("title", "")
+    meta = parsed.get("meta_description", "")
+    h1s = parsed.get("h1", [])
+    h1_text = " | ".join(h1s[:3]) if isinstance(h1s, list) else str(h1s)
+    wc = parsed.get("word_count", 0)
+
+    prompt = f"""
+You are an SEO assistant. Given page metadata below, generate a JSON object \
+ONLY (no explanation, no commentary).
+The JSON must parse cleanly by `json.loads()` and must contain exactly these keys:
+- improved_title (string)
+- improved_meta_description (string)
+- improved_h1 (string)
+- seo_summary (string)
+- suggestions (array of strings)
+
+Page context:
+TITLE: {title}
+META: {meta}
+H1: {h1_text}
+WORD_COUNT: {wc}
+ISSUES: {issues_text(parsed.get("issues", []))}
+HTML_SNIPPET: {snippet}
+
+Output example:
+{{
+  "improved_title": "string",
+  "improved_meta_description": "string",
+  "improved_h1": "string",
+  "seo_summary": "string",
+  "suggestions": ["string","string"]
+}}
+
+Produce ONLY the JSON object (no markdown, no commentary). Values should be \
+concise and avoid newlines.
+"""
+    return prompt.strip()
+
+
+def extract_json_from_text(text: str) -> Optional[Dict[str, Any]]:
+    text = text.strip()
+    try:
+        return json.loads(text)
+    except Exception:
+        pass
+    start = text.find("{")
+    end = text.rfind("}")
+    if start != -1 and end != -1 and end > start:
+        cand = text[start : end + 1]
+        try:
+            return json.loads(cand)
+        except Exception:
+            try:
+                return json.loads(cand.replace("'", '"'))
+            except Exception:
+                return None
+    return None
+
+
+def normalize_suggestions(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill in missing suggestion keys and make `suggestions` a list."""
+    for k in SUGGESTION_KEYS:
+        if k not in item:
+            item[k] = "" if k != "suggestions" else []
+    if not isinstance(item.get("suggestions", []), list):
+        item["suggestions"] = [str(item.get("suggestions"))]
+    return item
+
+
+class JSONObjectDetector:
+    """
+    Fed streamed text, reports when the first top-level JSON object is
+    complete, so a streaming call can stop reading right there. Tracks
+    brace depth outside of strings; text before the object (such as a
+    markdown fence) is kept but ignored.
+    """
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._start = -1
+        self._end = -1
+        self._length = 0
+
+    @property
+    def complete(self) -> bool:
+        return self._end != -1
+
+    @property
+    def text(self) -> str:
+        """The complete object once found, otherwise everything received."""
+        text = "".join(self._parts)
+        if self.complete:
+            return text[self._start : self._end]
+        return text
+
+    def feed(self, chunk: str) -> bool:
+        """Add a chunk; True once the first object has closed."""
+        if self.complete or not chunk:
+            return self.complete
+        self._parts.append(chunk)
+        for i, ch in enumerate(chunk):
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"' and self._depth > 0:
+                self._in_string = True
+            elif ch == "{":
+                if self._depth == 0:
+                    self._start = self._length + i
+                self._depth += 1
+            elif ch == "}" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._end = self._length + i + 1
+                    break
+        self._length += len(chunk)
+        return self.complete
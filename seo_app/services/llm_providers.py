@@ -0,0 +1,480 @@
+# seo_app/services/llm_providers.py
+"""
+LLM providers behind one interface.
+- LLMProvider implements suggestion generation once (prompt, JSON parsing,
+  retries, batching); providers only supply setup() and the transport,
+  stream() and astream()
+- Suggestion calls stream the reply and stop reading as soon as a complete
+  JSON object has arrived (see llm_prompts.JSONObjectDetector)
+- Every call is timed; per-provider totals are in LLMProvider.stats()
+- Providers: "gemini" (google.generativeai), "openai" (openai SDK, including
+  the pre-1.0 API) and "local", an OpenAI-compatible HTTP endpoint at
+  LLM_LOCAL_URL, used for local models and a stub server in tests
+- Each provider reads its model from its own setting (GEMINI_MODEL,
+  OPENAI_MODEL, LLM_LOCAL_MODEL), so falling back from one provider to
+  another never sends it the other's model name. Gemini, the default
+  provider, still honours the old shared LLM_MODEL (with a deprecation warning)
+
+SDKs are imported in setup(), which llm_registry calls on first use.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Hashable, Iterator, Optional, Tuple
+
+from .llm_batch import generate_batch
+from .llm_prompts import (
+    JSONObjectDetector,
+    build_prompt,
+    extract_json_from_text,
+    normalize_suggestions,
+)
+
+logger = logging.getLogger(__name__)
+
+LLM_TIMEOUT = int(os.getenv("LLM_TIMEOUT", "20"))
+LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", "500"))
+LLM_LOCAL_URL = os.getenv("LLM_LOCAL_URL", "http://127.0.0.1:8080/v1")
+
+SYSTEM_PROMPT = "You are a helpful SEO assistant that must output ONLY JSON."
+
+
+@dataclass
+class LLMResponse:
+    text: str
+    seconds: float
+    provider: str
+    model: str
+    stopped_early: bool = False
+
+
+_legacy_warned = set()
+
+
+class LLMProvider:
+    """Base class; see the module docstring."""
+
+    name = "base"
+    default_model = ""
+    model_setting = "LLM_MODEL"  # environment variable naming the model
+    legacy_model_setting = ""  # read when model_setting is unset (deprecated)
+
+    def __init__(
+        self,
+        model: str = None,
+        max_tokens: int = LLM_MAX_TOKENS,
+        timeout: float = LLM_TIMEOUT,
+    ):
+        self.model = model or self.configured_model()
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+        self._stats = {"calls": 0, "seconds": 0.0, "early_stops": 0}
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def configured_model(cls) -> str:
+        """The model named in the environment, else default_model."""
+        model = os.getenv(cls.model_setting)
+        if not model and cls.legacy_model_setting:
+            model = os.getenv(cls.legacy_model_setting)
+            if model and cls.name not in _legacy_warned:
+                _legacy_warned.add(cls.name)
+                logger.warning(
+                    f"{cls.legacy_model_setting} is deprecated for the {cls.name} "
+                    f"provider; set {cls.model_setting} instead"
+                )
+        return model or cls.default_model
+
+    # --- transport, overridden by providers ---
+
+    def setup(self):
+        """Import the SDK and configure the client; raise if unusable."""
+
+    def stream(self, prompt: str, max_tokens: int, temperature: float) -> Iterator[str]:
+        raise NotImplementedError
+
+    async def astream(
+        self, prompt: str, max_tokens: int, temperature: float
+    ) -> AsyncIterator[str]:
+        # Providers without an async client run the blocking call on a thread
+        yield await asyncio.to_thread(
+            self._read_all, self.stream(prompt, max_tokens, temperature)
+        )
+
+    @staticmethod
+    def _read_all(chunks: Iterator[str]) -> str:
+        return "".join(chunks)
+
+    # --- calls ---
+
+    def _record(self, response: LLMResponse) -> LLMResponse:
+        with self._stats_lock:
+            self._stats["calls"] += 1
+            self._stats["seconds"] += response.seconds
+            self._stats["early_stops"] += int(response.stopped_early)
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            calls = self._stats["calls"]
+            return {
+                "model": self.model,
+                **self._stats,
+                "avg_seconds": round(self._stats["seconds"] / calls, 3) if calls else 0,
+            }
+
+    def complete(
+        self, prompt: str, max_tokens: int = None, temperature: float = 0.0
+    ) -> LLMResponse:
+        """The whole reply text."""
+        started = time.perf_counter()
+        text = self._read_all(
+            self.stream(prompt, max_tokens or self.max_tokens, temperature)
+        )
+        return self._record(
+            LLMResponse(text, time.perf_counter() - started, self.name, self.model)
+        )
+
+    async def acomplete(
+        self, prompt: str, max_tokens: int = None, temperature: float = 0.0
+    ) -> LLMResponse:
+        started = time.perf_counter()
+        parts = [
+            chunk
+            async for chunk in self.astream(
+                prompt, max_tokens or self.max_tokens, temperature
+            )
+        ]
+        return self._record(
+            LLMResponse(
+                "".join(parts), time.perf_counter() - started, self.name, self.model
+            )
+        )
+
+    def complete_json(
+        self, prompt: str, max_tokens: int = None, temperature: float = 0.0
+    ) -> Tuple[Optional[Any], LLMResponse]:
+        """Stream the reply until its first JSON object is complete."""
+        started = time.perf_counter()
+        detector = JSONObjectDetector()
+        chunks = self.stream(prompt, max_tokens or self.max_tokens, temperature)
+        try:
+            for chunk in chunks:
+                if detector.feed(chunk):
+                    break
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()  # ends the HTTP stream when stopping early
+        return self._json_response(detector, started)
+
+    async def acomplete_json(
+        self, prompt: str, max_tokens: int = None, temperature: float = 0.0
+    ) -> Tuple[Optional[Any], LLMResponse]:
+        started = time.perf_counter()
+        detector = JSONObjectDetector()
+        chunks = self.astream(prompt, max_tokens or self.max_tokens, temperature)
+        try:
+            async for chunk in chunks:
+                if detector.feed(chunk):
+                    break
+        finally:
+            await chunks.aclose()
+        return self._json_response(detector, started)
+
+    def _json_response(self, detector: JSONObjectDetector, started: float):
+        response = self._record(
+            LLMResponse(
+                detector.text,
+                time.perf_counter() - started,
+                self.name,
+                self.model,
+                stopped_early=detector.complete,
+            )
+        )
+        return extract_json_from_text(response.text or ""), response
+
+    # --- suggestions ---
+
+    def _suggestions(self, data: Optional[Any], response: LLMResponse) -> Dict:
+        if not isinstance(data, dict):
+            raise ValueError("LLM returned unparsable output", response.text)
+        return normalize_suggestions(data)
+
+    def generate_suggestions(
+        self, parsed: Dict[str, Any], max_retries: int = 1, max_tokens: int = None
+    ) -> Dict[str, Any]:
+        """
+        Return a dict:
+          { improved_title, improved_meta_description, improved_h1, seo_summary,
+            suggestions }
+        or {"ok": False, "error": ...} once `max_retries` retries have failed.
+        """
+        prompt = build_prompt(parsed)
+        for attempt in range(max_retries + 1):
+            try:
+                data, response = self.complete_json(prompt, max_tokens)
+                return self._suggestions(data, response)
+            except Exception as e:
+                if attempt < max_retries:
+                    time.sleep(1)
+                    continue
+                # structured failure object instead of raising inside a view
+                return {"ok": False, "error": str(e)}
+        return {"ok": False, "error": "LLM failure after retries"}
+
+    async def agenerate_suggestions(
+        self, parsed: Dict[str, Any], max_retries: int = 1, max_tokens: int = None
+    ) -> Dict[str, Any]:
+        """generate_suggestions without blocking the event loop."""
+        prompt = build_prompt(parsed)
+        for attempt in range(max_retries + 1):
+            try:
+                data, response = await self.acomplete_json(prompt, max_tokens)
+                return self._suggestions(data, response)
+            except Exception as e:
+                if attempt < max_retries:
+                    await asyncio.sleep(1)
+                    continue
+                return {"ok": False, "error": str(e)}
+        return {"ok": False, "error": "LLM failure after retries"}
+
+    def generate_suggestions_batch(
+        self,
+        pages: Dict[Hashable, Dict[str, Any]],
+        max_retries: int = 1,
+        fallback: bool = True,
+    ) -> Dict[Hashable, Dict[str, Any]]:
+        """
+        Suggestions for several pages ({key: parsed}) from one request; see
+        llm_batch. With `fallback`, pages missing from the reply get a
+        single-page generate_suggestions call, otherwise they are left out.
+        Errors from the batched request itself are raised after `max_retries`.
+        """
+
+        def call(prompt: str, max_tokens: int) -> str:
+            # The whole reply: it may be a bare array, which the early-stopping
+            # JSON detector would cut off after its first object
+            for attempt in range(max_retries + 1):
+                try:
+                    return self.complete(prompt, max_tokens).text
+                except Exception:
+                    if attempt < max_retries:
+                        time.sleep(1)
+                        continue
+                    raise
+
+        single = (
+            (lambda parsed: self.generate_suggestions(parsed, max_retries))
+            if fallback
+            else None
+        )
+        return generate_batch(pages, call, extract_json_from_text, single=single)
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+    default_model = "gemini-2.0-flash"
+    model_setting = "GEMINI_MODEL"
+    legacy_model_setting = "LLM_MODEL"  # shared by all providers before
+
+    def setup(self):
+        import google.generativeai as genai
+
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY not set in environment")
+        genai.configure(api_key=api_key)
+        self._genai = genai
+        self._model = genai.GenerativeModel(self.model)
+
+    def _request(self, max_tokens: int, temperature: float) -> Dict[str, Any]:
+        return {
+            "generation_config": self._genai.types.GenerationConfig(
+                max_output_tokens=max_tokens, temperature=temperature
+            ),
+            "request_options": {"timeout": self.timeout},
+            "stream": True,
+        }
+
+    def stream(self, prompt, max_tokens, temperature):
+        try:
+            response = self._model.generate_content(
+                prompt, **self._request(max_tokens, temperature)
+            )
+            for chunk in response:
+                yield chunk.text or ""
+        except Exception as e:
+            raise ValueError(f"Gemini API error: {str(e)}")
+
+    async def astream(self, prompt, max_tokens, temperature):
+        try:
+            response = await self._model.generate_content_async(
+                prompt, **self._request(max_tokens, temperature)
+            )
+            async for chunk in response:
+                yield chunk.text or ""
+        except Exception as e:
+            raise ValueError(f"Gemini API error: {str(e)}")
+
+
+class OpenAIProvider(LLMProvider):
+    name = "openai"
+    default_model = "gpt-4o-mini"
+    model_setting = "OPENAI_MODEL"
+
+    def setup(self):
+        import openai
+
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY not set in environment")
+        self._legacy = not hasattr(openai, "OpenAI")
+        if self._legacy:
+            # Old openai (pre-1.0): module-level functions, no streaming client
+            openai.api_key = api_key
+            self._openai = openai
+        else:
+            self._client = openai.OpenAI(api_key=api_key, timeout=self.timeout)
+            self._async_client = openai.AsyncOpenAI(
+                api_key=api_key, timeout=self.timeout
+            )
+
+    def _messages(self, prompt: str):
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt},
+        ]
+
+    def stream(self, prompt, max_tokens, temperature):
+        if self._legacy:
+            resp = self._openai.ChatCompletion.create(
+                model=self.model,
+                messages=self._messages(prompt),
+                max_tokens=max_tokens,
+                temperature=temperature,
+                timeout=self.timeout,
+            )
+            yield _legacy_text(resp)
+            return
+        chunks = self._client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(prompt),
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True,
+        )
+        try:
+            for chunk in chunks:
+                if chunk.choices:
+                    yield chunk.choices[0].delta.content or ""
+        finally:
+            chunks.close()
+
+    async def astream(self, prompt, max_tokens, temperature):
+        if self._legacy:
+            async for text in super().astream(prompt, max_tokens, temperature):
+                yield text
+            return
+        chunks = await self._async_client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(prompt),
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True,
+        )
+        try:
+            async for chunk in chunks:
+                if chunk.choices:
+                    yield chunk.choices[0].delta.content or ""
+        finally:
+            await chunks.close()
+
+
+def _legacy_text(resp) -> str:
+    # older packages may return choices[0].message.content or choices[0].text
+    if "choices" in resp and len(resp["choices"]) > 0:
+        ch = resp["choices"][0]
+        if ch.get("message") and ch["message"].get("content"):
+            return ch["message"]["content"]
+        if ch.get("text"):
+            return ch["text"]
+    return json.dumps(resp)
+
+
+class LocalProvider(LLMProvider):
+    """
+    Any server speaking the OpenAI chat-completions protocol with SSE
+    streaming (llama.cpp, vLLM, Ollama, or a stub in tests), over httpx.
+    """
+
+    name = "local"
+    default_model = "local"
+    model_setting = "LLM_LOCAL_MODEL"
+
+    def __init__(self, base_url: str = None, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = (base_url or LLM_LOCAL_URL).rstrip("/")
+
+    def setup(self):
+        import httpx
+
+        self._httpx = httpx
+
+    def _body(self, prompt, max_tokens, temperature):
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True,
+        }
+
+    @staticmethod
+    def _delta(line: str) -> Optional[str]:
+        """Text in one SSE line; None at the end of the stream."""
+        if not line.startswith("data:"):
+            return ""
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return None
+        choices = json.loads(data).get("choices") or [{}]
+        return (choices[0].get("delta") or {}).get("content") or ""
+
+    def stream(self, prompt, max_tokens, temperature):
+        url = f"{self.base_url}/chat/completions"
+        body = self._body(prompt, max_tokens, temperature)
+        with self._httpx.stream("POST", url, json=body, timeout=self.timeout) as resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines():
+                text = self._delta(line)
+                if text is None:
+                    break
+                yield text
+
+    async def astream(self, prompt, max_tokens, temperature):
+        url = f"{self.base_url}/chat/completions"
+        body = self._body(prompt, max_tokens, temperature)
+        async with self._httpx.AsyncClient(timeout=self.timeout) as client:
+            async with client.stream("POST", url, json=body) as resp:
+                resp.raise_for_status()
+                async for line in resp.aiter_lines():
+                    text = self._delta(line)
+                    if text is None:
+                        break
+                    yield text
+
+
+PROVIDER_CLASSES = {
+    "gemini": GeminiProvider,
+    "openai": OpenAIProvider,
+    "local": LocalProvider,
+}
@@ -0,0 +1,130 @@
+# seo_app/services/llm_registry.py
+"""
+Lazy registry of LLM providers (see llm_providers).
+- Provider SDKs (google.generativeai / openai) are only imported the first
+  time a suggestion is actually requested, so workers serving
+  keyword/backlink traffic and management commands never load them
+- Each provider is set up (SDK imported, client configured) at most once per
+  process; failures such as a missing SDK or API key are remembered, so
+  they cost one attempt
+- import_metrics() reports how long each setup took, or why it failed, and
+  the provider's call timings
+- LLM_PROVIDERS sets the preference order (default "gemini,openai")
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from .llm_providers import PROVIDER_CLASSES, LLMProvider
+
+logger = logging.getLogger(__name__)
+
+LLM_PROVIDERS = [
+    p.strip()
+    for p in os.getenv("LLM_PROVIDERS", "gemini,openai").split(",")
+    if p.strip()
+]
+
+
+@dataclass
+class ProviderImport:
+    name: str
+    provider: Optional[LLMProvider] = None
+    import_seconds: float = 0.0
+    error: str = ""
+
+
+_imports: Dict[str, ProviderImport] = {}
+_lock = threading.Lock()
+
+
+def load_provider(name: str) -> Optional[LLMProvider]:
+    """The named provider, set up on first use; None if unusable."""
+    with _lock:
+        if name not in _imports:
+            _imports[name] = _import(name)
+        return _imports[name].provider
+
+
+def _import(name: str) -> ProviderImport:
+    record = ProviderImport(name=name)
+    provider_class = PROVIDER_CLASSES.get(name)
+    if provider_class is None:
+        record.error = "unknown provider"
+        return record
+    started = time.perf_counter()
+    try:
+        provider = provider_class()
+        provider.setup()
+        record.provider = provider
+    except Exception as e:
+        record.error = str(e)
+        logger.warning(f"Could not set up LLM provider '{name}': {e}")
+    record.import_seconds = time.perf_counter() - started
+    return record
+
+
+def require_provider(name: str) -> LLMProvider:
+    """load_provider, raising ValueError with the setup error if unusable."""
+    provider = load_provider(name)
+    if provider is None:
+        record = _imports.get(name)
+        raise ValueError(
+            record.error if record else f"LLM provider '{name}' unavailable"
+        )
+    return provider
+
+
+def default_provider(preference: List[str] = None) -> Optional[str]:
+    """Name of the first provider in `preference` (LLM_PROVIDERS) that imports."""
+    for name in preference or LLM_PROVIDERS:
+        if load_provider(name) is not None:
+            return name
+    return None
+
+
+def provider_function(name: str, attr: str):
+    """Bound method `attr` of the named provider, or None if unavailable."""
+    provider = load_provider(name) if name else None
+    return getattr(provider, attr, None) if provider is not None else None
+
+
+def provider_model(name: str) -> str:
+    """Model the named provider calls; "" when it is unavailable."""
+    provider = load_provider(name) if name else None
+    return provider.model if provider is not None else ""
+
+
+def generate_suggestions(parsed: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+    """generate_suggestions of the default provider, set up on first call."""
+    name = default_provider()
+    if name is None:
+        raise ValueError("No LLM provider available")
+    return load_provider(name).generate_suggestions(parsed, **kwargs)
+
+
+def import_metrics() -> Dict[str, Dict[str, Any]]:
+    """
+    Per provider: whether it is loaded, setup time in seconds, any error and,
+    once loaded, its call statistics.
+    """
+    with _lock:
+        return {
+            name: {
+                "loaded": record.provider is not None,
+                "import_seconds": round(record.import_seconds, 4),
+                "error": record.error,
+                **({"calls": record.provider.stats()} if record.provider else {}),
+            }
+            for name, record in _imports.items()
+        }
+
+
+def reset():
+    """Forget set-up providers (imported SDKs stay in sys.modules)."""
+    with _lock:
+        _imports.clear()
@@ -0,0 +1,373 @@
+# seo_app/services/persistence.py
+"""
+Batched persistence for crawl results.
+- Page rows for a whole batch are resolved with one url__in query (plus one
+  bulk insert for new URLs), keyed by canonical URL
+- PageAnalysis and AuditHistory rows are written with bulk_create, one
+  transaction per batch; AuditHistory upserts on (page, recorded_date)
+- LLM suggestions are generated concurrently after the insert, outside the
+  transaction (see llm_dispatch), and written back with bulk_update as they
+  finish; suggestions still valid for the same prompt inputs are reused
+  (see llm_cache)
+- Each Page's fetch validators (etag, last_modified, content_hash) are
+  refreshed with one bulk_update per batch
+"""
+
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import AuditHistory, Page, PageAnalysis
+from .crawl_engine import CrawlResult
+from .llm_cache import copy_suggestions, find_cached_suggestions_bulk, llm_input_hash
+from .llm_dispatch import LLM_WAIT_TIMEOUT, LLMDispatcher
+from .llm_health import CircuitBreaker
+from .url_canonicalizer import canonicalize_url, dedupe_key, equivalent_urls
+
+logger = logging.getLogger(__name__)
+
+CRAWL_WRITE_BATCH_SIZE = int(os.getenv("CRAWL_WRITE_BATCH_SIZE", "50"))
+# Flush a partial batch once its oldest result has waited this long (seconds),
+# so streamed progress does not stall behind a slow crawl
+CRAWL_WRITE_MAX_DELAY = float(os.getenv("CRAWL_WRITE_MAX_DELAY", "1.0"))
+
+CRITICAL_ISSUE_KEYWORDS = ["missing", "no h1", "noindex", "ssl", "https"]
+
+
+def count_critical_issues(issues: List[str]) -> int:
+    return len(
+        [i for i in issues if any(kw in i.lower() for kw in CRITICAL_ISSUE_KEYWORDS)]
+    )
+
+
+def find_pages(urls: List[str]) -> Dict[str, Page]:
+    """
+    Existing Page rows for `urls`, keyed by dedupe_key. URLs are matched by
+    canonical form, so http/https and trailing-slash spellings of a stored
+    page resolve to that row.
+    """
+    lookups = {v for url in set(urls) for v in equivalent_urls(url)}
+    by_key = {}
+    for page in Page.objects.filter(url__in=lookups).order_by("id"):
+        by_key.setdefault(dedupe_key(page.url), page)
+    return by_key
+
+
+def resolve_pages(urls: List[str]) -> Dict[str, Page]:
+    """Return {url: Page} for `urls`, creating the missing rows in bulk."""
+    keys = {url: dedupe_key(url) for url in urls}
+    by_key = find_pages(urls)
+
+    missing = {
+        keys[url]: canonicalize_url(url) for url in urls if keys[url] not in by_key
+    }
+    if missing:
+        Page.objects.bulk_create(
+            [Page(url=url) for url in missing.values()], ignore_conflicts=True
+        )
+        # ignore_conflicts leaves pks unset, so read the new rows back
+        for page in Page.objects.filter(url__in=missing.values()):
+            by_key.setdefault(dedupe_key(page.url), page)
+    return {url: by_key[keys[url]] for url in urls}
+
+
+def _page_url(res: CrawlResult) -> str:
+    """Pages are stored under their <link rel="canonical"> target when on-site."""
+    return res.parsed.get("canonical_url") or res.fetch["url"]
+
+
+def unchanged_summary(url: str, analysis: PageAnalysis) -> Dict[str, Any]:
+    """Crawl summary entry for a page whose previous analysis is reused."""
+    return {
+        "url": url,
+        "status": "success",
+        "status_code": analysis.status_code,
+        "score": analysis.score,
+        "title": analysis.title,
+        "issues_count": len(analysis.rule_issues or []),
+        "unchanged": True,
+        "analyzed_at": analysis.created_at.isoformat(),
+    }
+
+
+def _store_validators(page: Page, fetch_res: dict) -> bool:
+    """
+    Copy a fetch's etag / last_modified / content_hash onto `page`.
+    Returns True when anything changed.
+    """
+    # Only for the page's own URL, not for another page declaring it canonical
+    if dedupe_key(page.url) != dedupe_key(fetch_res["url"]):
+        return False
+    before = (page.etag, page.last_modified, page.content_hash)
+    page.etag = (fetch_res.get("etag") or page.etag)[:255]
+    page.last_modified = (fetch_res.get("last_modified") or page.last_modified)[:64]
+    page.content_hash = fetch_res.get("content_hash") or page.content_hash
+    return (page.etag, page.last_modified, page.content_hash) != before
+
+
+def _page_summary(res: CrawlResult) -> Dict[str, Any]:
+    return {
+        "url": res.fetch["url"],
+        "status": "success",
+        "status_code": res.fetch["status_code"],
+        "score": res.score,
+        "title": res.parsed.get("title", ""),
+        "issues_count": len(res.issues),
+    }
+
+
+class CrawlResultWriter:
+    """
+    Buffer analyzed pages and persist them in batches.
+
+    add() returns the (index, summary) pairs of any batch it flushed; call
+    poll() while waiting for more results so a partial batch is still written
+    once it is max_delay old, and close() once the crawl is done to write the
+    remainder.
+    `suggest`, when given, is called with each page's parsed dict and its
+    return value stored as the analysis' LLM suggestions. Calls run on an
+    llm_dispatch.LLMDispatcher; finished suggestions are written on each
+    add() / poll() / flush(), and close() waits for the rest. `suggest_batch`, when
+    given, lets the dispatcher cover several pages per request; `breaker`
+    is the provider's llm_health.CircuitBreaker.
+    With `reuse_suggestions`, suggestions stored for the same page and prompt
+    inputs (see llm_cache) are copied instead of calling `suggest` again.
+    `previous` (see incremental.load_previous) supplies the analysis reused
+    for results the engine reported as unchanged.
+    `model` is the provider model `suggest` calls; it is recorded as each
+    analysis' llm_model and is part of the suggestion cache key.
+    `on_saved`, when given, is called with each batch's (index, summary)
+    pairs inside the transaction that saves the batch, so callers can record
+    progress atomically with the analyses (an exception rolls both back).
+    """
+
+    def __init__(
+        self,
+        batch_size: int = CRAWL_WRITE_BATCH_SIZE,
+        max_delay: float = CRAWL_WRITE_MAX_DELAY,
+        suggest: Optional[Callable[[dict], dict]] = None,
+        previous: Dict[str, Any] = None,
+        reuse_suggestions: bool = True,
+        dispatcher: Optional[LLMDispatcher] = None,
+        suggest_batch: Optional[Callable[[dict], dict]] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        on_saved: Optional[Callable[[List[Tuple[int, dict]]], None]] = None,
+        model: str = "",
+    ):
+        self.batch_size = max(1, batch_size)
+        self.max_delay = max_delay
+        self.suggest = suggest
+        self.reuse_suggestions = reuse_suggestions
+        self.previous = previous or {}
+        self.suggest_batch = suggest_batch
+        self.breaker = breaker
+        self.dispatcher = dispatcher
+        self.on_saved = on_saved
+        self.model = model
+        self._pending: List[CrawlResult] = []
+        self._oldest = 0.0
+        # analysis pk -> (PageAnalysis, llm_input_hash) awaiting suggestions
+        self._awaiting: Dict[int, Tuple[PageAnalysis, str]] = {}
+
+    def add(self, res: CrawlResult) -> List[Tuple[int, Dict[str, Any]]]:
+        if not self._pending:
+            self._oldest = time.monotonic()
+        self._pending.append(res)
+        if len(self._pending) >= self.batch_size:
+            return self.flush()
+        return self.poll()
+
+    def poll(self) -> List[Tuple[int, Dict[str, Any]]]:
+        """Flush the partial batch if its oldest result has waited max_delay."""
+        if self._pending and time.monotonic() - self._oldest >= self.max_delay:
+            return self.flush()
+        self._collect_suggestions()
+        return []
+
+    def close(self) -> List[Tuple[int, Dict[str, Any]]]:
+        """Flush the last batch and wait for outstanding LLM suggestions."""
+        summaries = self.flush()
+        if self._awaiting:
+            self._collect_suggestions(wait=True)
+        self.shutdown()
+        return summaries
+
+    def shutdown(self):
+        """Stop LLM calls that have not started; safe to call more than once."""
+        if self.dispatcher is not None:
+            self.dispatcher.shutdown()
+
+    def flush(self) -> List[Tuple[int, Dict[str, Any]]]:
+        batch, self._pending = self._pending, []
+        if not batch:
+            return []
+
+        summaries = []
+        analyzed, unchanged = [], []
+        for res in batch:
+            if not res.unchanged:
+                analyzed.append(res)
+            elif res.url in self.previous:
+                unchanged.append(res)
+            else:
+                error = "Page not modified but no previous analysis is stored"
+                summaries.append(
+                    (res.index, {"url": res.url, "status": "error", "error": error})
+                )
+
+        try:
+            analyses = self._write_batch(analyzed, unchanged)
+        except Exception as e:
+            logger.error(f"Failed to save {len(batch)} crawled pages: {e}")
+            return summaries + [
+                (res.index, {"url": res.url, "status": "error", "error": str(e)})
+                for res in analyzed + unchanged
+            ]
+
+        if self.suggest and analyzed:
+            self._write_suggestions(analyzed, analyses)
+        self._collect_suggestions()
+        return summaries + self._summaries(analyzed, unchanged)
+
+    def _summaries(
+        self, batch: List[CrawlResult], unchanged: List[CrawlResult]
+    ) -> List[Tuple[int, Dict[str, Any]]]:
+        summaries = [(res.index, _page_summary(res)) for res in batch]
+        summaries += [
+            (res.index, unchanged_summary(res.url, self.previous[res.url].analysis))
+            for res in unchanged
+        ]
+        return summaries
+
+    def _write_batch(
+        self, batch: List[CrawlResult], unchanged: List[CrawlResult] = ()
+    ) -> List[PageAnalysis]:
+        with transaction.atomic():
+            # Unchanged pages only get their validators refreshed
+            touched = {}
+            for res in unchanged:
+                page = self.previous[res.url].page
+                if _store_validators(page, res.fetch):
+                    touched[page.pk] = page
+            if not batch:
+                self._save_validators(touched)
+                self._notify_saved(batch, unchanged)
+                return []
+
+            pages = resolve_pages([_page_url(res) for res in batch])
+            for res in batch:
+                page = pages[_page_url(res)]
+                if _store_validators(page, res.fetch):
+                    touched[page.pk] = page
+            self._save_validators(touched)
+
+            analyses = PageAnalysis.objects.bulk_create(
+                [
+                    PageAnalysis(
+                        page=pages[_page_url(res)],
+                        status_code=res.fetch["status_code"],
+                        title=res.parsed.get("title", ""),
+                        meta_description=res.parsed.get("meta_description", ""),
+                        h1=res.parsed.get("h1", []),
+                        h2=res.parsed.get("h2", []),
+                        h3=res.parsed.get("h3", []),
+                        images=res.parsed.get("images", []),
+                        word_count=res.parsed.get("word_count", 0),
+                        score=res.score,
+                        score_breakdown=res.breakdown,
+                        rule_issues=res.issues,
+                        raw_html_snippet=res.parsed.get("raw_html_snippet", ""),
+                    )
+                    for res in batch
+                ]
+            )
+
+            # One history row per page and day; the latest result wins
+            history = {
+                pages[_page_url(res)].pk: AuditHistory(
+                    page=pages[_page_url(res)],
+                    score=res.score,
+                    issues_count=len(res.issues),
+                    critical_issues=count_critical_issues(res.issues),
+                )
+                for res in batch
+            }
+            AuditHistory.objects.bulk_create(
+                list(history.values()),
+                update_conflicts=True,
+                unique_fields=["page", "recorded_date"],
+                update_fields=["score", "issues_count", "critical_issues"],
+            )
+            self._notify_saved(batch, unchanged)
+        return analyses
+
+    def _notify_saved(self, batch: List[CrawlResult], unchanged: List[CrawlResult]):
+        if self.on_saved is not None:
+            self.on_saved(self._summaries(batch, unchanged))
+
+    def _save_validators(self, pages: Dict[int, Page]):
+        if pages:
+            Page.objects.bulk_update(
+                list(pages.values()), ["etag", "last_modified", "content_hash"]
+            )
+
+    def _write_suggestions(
+        self, batch: List[CrawlResult], analyses: List[PageAnalysis]
+    ):
+        """Reuse cached suggestions and queue LLM calls for the rest."""
+        hashes = [llm_input_hash(res.parsed, self.model) for res in batch]
+        cached = {}
+        if self.reuse_suggestions:
+            cached = find_cached_suggestions_bulk(
+                (pa.page_id, h) for pa, h in zip(analyses, hashes)
+            )
+        if self.dispatcher is None and len(cached) < len(batch):
+            self.dispatcher = LLMDispatcher(
+                self.suggest, suggest_batch=self.suggest_batch, breaker=self.breaker
+            )
+
+        reused = []
+        for res, pa, input_hash in zip(batch, analyses, hashes):
+            if (pa.page_id, input_hash) in cached:
+                copy_suggestions(cached[pa.page_id, input_hash], pa)
+                reused.append(pa)
+            else:
+                self._awaiting[pa.pk] = (pa, input_hash)
+                self.dispatcher.submit(pa.pk, res.parsed)
+        if self.dispatcher is not None:
+            self.dispatcher.flush()
+        self._save_suggestions(reused)
+
+    def _collect_suggestions(self, wait: bool = False):
+        """Write the suggestions finished so far (all of them with `wait`)."""
+        if not self._awaiting:
+            return
+        if wait:
+            done = list(self.dispatcher.wait(timeout=LLM_WAIT_TIMEOUT))
+        else:
+            done = self.dispatcher.completed()
+        finished = []
+        for pk, llm_out in done:
+            pa, input_hash = self._awaiting.pop(pk)
+            pa.llm_suggestions = llm_out or {}
+            pa.llm_model = self.model or pa.llm_model
+            pa.llm_generated_at = timezone.now()
+            pa.llm_input_hash = input_hash
+            finished.append(pa)
+        self._save_suggestions(finished)
+
+    def _save_suggestions(self, analyses: List[PageAnalysis]):
+        if not analyses:
+            return
+        try:
+            PageAnalysis.objects.bulk_update(
+                analyses,
+                ["llm_suggestions", "llm_model", "llm_generated_at", "llm_input_hash"],
+            )
+        except Exception as e:
+            # don't let LLM failures break the crawl
+            logger.error(f"Failed to save LLM suggestions: {e}")
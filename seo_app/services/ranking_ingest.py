@@ -0,0 +1,175 @@
+# seo_app/services/ranking_ingest.py
+"""
+Bulk keyword ranking ingestion.
+- Rows are (domain, keyword, position, url); invalid rows (including values
+  longer than their model field) are skipped and reported with the reason,
+  so one bad row cannot abort the import, and repeated (domain, keyword)
+  pairs keep their last row
+- Domain and Keyword ids are resolved with one IN query per chunk, and the
+  missing ones are inserted with a single bulk_create
+- KeywordRanking rows are upserted on (domain, keyword, recorded_date) with
+  bulk_create(update_conflicts=True), RANKING_BATCH_SIZE rows per statement
+"""
+
+import csv
+import io
+import logging
+import os
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+
+from ..models import Domain, Keyword, KeywordRanking
+
+logger = logging.getLogger(__name__)
+
+RANKING_BATCH_SIZE = int(os.getenv("RANKING_BATCH_SIZE", "500"))
+# Keeps IN (...) lookups under SQLite's bound-parameter limit
+LOOKUP_CHUNK = 500
+
+MAX_DOMAIN_LENGTH = Domain._meta.get_field("domain").max_length
+MAX_KEYWORD_LENGTH = Keyword._meta.get_field("keyword").max_length
+MAX_URL_LENGTH = KeywordRanking._meta.get_field("url").max_length
+
+
+def parse_ranking_csv(text: str) -> List[Dict[str, str]]:
+    """Rows from CSV text with a domain,keyword,position[,url] header."""
+    reader = csv.DictReader(io.StringIO(text))
+    return [
+        {(k or "").strip().lower(): v for k, v in row.items()} for row in reader if row
+    ]
+
+
+def _clean_row(row: Any) -> Tuple[Optional[tuple], str]:
+    """((domain, keyword, position, url), "") or (None, why the row is skipped)."""
+    try:
+        domain = str(row.get("domain") or "").strip()
+        keyword = str(row.get("keyword") or "").strip()
+        url = str(row.get("url") or "").strip()
+    except AttributeError:
+        return None, "row must be an object"
+    try:
+        position = int(row.get("position"))
+    except (TypeError, ValueError):
+        position = -1
+    if not domain or not keyword:
+        return None, "domain and keyword are required"
+    if position < 0:
+        return None, "position must be a non-negative integer"
+    for field, value, limit in (
+        ("domain", domain, MAX_DOMAIN_LENGTH),
+        ("keyword", keyword, MAX_KEYWORD_LENGTH),
+        ("url", url, MAX_URL_LENGTH),
+    ):
+        if len(value) > limit:
+            return None, f"{field} is longer than {limit} characters"
+    return (domain, keyword, position, url), ""
+
+
+def _clean_rows(
+    rows: Iterable[Dict[str, Any]],
+) -> Tuple[Dict[tuple, tuple], List[Dict[str, Any]]]:
+    """
+    {(domain, keyword): (position, url)} and the skipped rows, as
+    {"row": index, "reason": ...}.
+    """
+    cleaned = {}
+    skipped = []
+    for index, row in enumerate(rows):
+        values, reason = _clean_row(row)
+        if values is None:
+            skipped.append({"row": index, "reason": reason})
+            continue
+        domain, keyword, position, url = values
+        cleaned[(domain, keyword)] = (position, url)
+    return cleaned, skipped
+
+
+def _chunks(values: List[Any], size: int = LOOKUP_CHUNK):
+    for i in range(0, len(values), size):
+        yield values[i : i + size]
+
+
+def _resolve(model, field: str, values: Iterable[str], extra: Tuple[str, ...] = ()):
+    """
+    {value: (id, *extra)} for every value of the unique `field`, creating
+    rows for the missing ones; also returns how many were created.
+    """
+    values = list(dict.fromkeys(values))
+    columns = (field, "id") + extra
+
+    def lookup(wanted):
+        found = {}
+        for chunk in _chunks(wanted):
+            lookup_filter = {f"{field}__in": chunk}
+            for row in model.objects.filter(**lookup_filter).values_list(*columns):
+                found[row[0]] = row[1:]
+        return found
+
+    found = lookup(values)
+    missing = [v for v in values if v not in found]
+    if missing:
+        model.objects.bulk_create(
+            [model(**{field: v}) for v in missing],
+            batch_size=RANKING_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        found.update(lookup(missing))
+    return found, len(missing)
+
+
+def ingest_rankings(
+    rows: Iterable[Dict[str, Any]], recorded_date: date = None
+) -> Dict[str, int]:
+    """
+    Upsert rankings for `recorded_date` (default today). Returns counts:
+    rows upserted, rows skipped, and domains / keywords created, plus
+    "skipped_rows": the index and reason of each skipped row.
+    """
+    recorded_date = recorded_date or date.today()
+    cleaned, skipped_rows = _clean_rows(rows)
+    skipped = len(skipped_rows)
+    if not cleaned:
+        return {
+            "upserted": 0,
+            "skipped": skipped,
+            "skipped_rows": skipped_rows,
+            "domains_created": 0,
+            "keywords_created": 0,
+        }
+
+    with transaction.atomic():
+        domains, domains_created = _resolve(Domain, "domain", (d for d, _ in cleaned))
+        keywords, keywords_created = _resolve(
+            Keyword, "keyword", (k for _, k in cleaned), extra=("search_volume",)
+        )
+        rankings = [
+            KeywordRanking(
+                domain_id=domains[domain][0],
+                keyword_id=keywords[keyword][0],
+                position=position,
+                url=url,
+                search_volume=keywords[keyword][1],
+                recorded_date=recorded_date,
+            )
+            for (domain, keyword), (position, url) in cleaned.items()
+        ]
+        KeywordRanking.objects.bulk_create(
+            rankings,
+            batch_size=RANKING_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["domain", "keyword", "recorded_date"],
+            update_fields=["position", "url", "search_volume"],
+        )
+
+    logger.info(
+        f"Ingested {len(rankings)} rankings for {recorded_date} ({skipped} skipped)"
+    )
+    return {
+        "upserted": len(rankings),
+        "skipped": skipped,
+        "skipped_rows": skipped_rows,
+        "domains_created": domains_created,
+        "keywords_created": keywords_created,
+    }
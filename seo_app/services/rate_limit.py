@@ -0,0 +1,43 @@
+# seo_app/services/rate_limit.py
+"""
+Token-bucket rate limiting for calls to quota-limited providers.
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    `rate` tokens per second, holding at most `capacity` (the allowed burst).
+    Thread-safe; try_acquire() never blocks, it reports how long to wait
+    instead, so callers can reschedule rather than sleep.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = max(1.0, capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, calls: float, burst: float = None) -> "TokenBucket":
+        return cls(calls / 60.0, burst)
+
+    def _refill(self, now: float):
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """Take `tokens` and return 0, or the seconds until they are available."""
+        if self.rate <= 0:
+            return 0.0  # unlimited
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
@@ -0,0 +1,51 @@
+# seo_app/services/singleflight.py
+"""
+Per-key call coalescing for threads in one process (see SingleFlight).
+
+Kept free of Django imports: the crawler uses it, and the crawl engine's CPU
+workers import the crawler in spawned processes.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time; callers arriving while it is
+    in flight wait for it and get the same result (or exception).
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """(result of fn, whether it came from another caller's call)."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+        try:
+            call.value = fn()
+            return call.value, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
@@ -1,28 +1,29 @@
 # seo_app/services/sitemap_crawler.py
+import asyncio
 import os
-import xml.etree.ElementTree as ET
-from collections import deque
-from typing import Any, Dict, List
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Tuple
 from urllib.parse import urljoin, urlparse
 
-import requests
-from bs4 import BeautifulSoup
 from django.utils import timezone
 
-from ..models import Page, PageAnalysis
-from .analyzer_rules import run_all_rules
-from .crawler import fetch_html, parse_page
+from .crawl_engine import AsyncCrawlEngine, CrawlEngine
+from .crawler import fetch_html
+from .document import ParsedDocument
+from .frontier import CrawlFrontier, SeenURLs
+from .http_client import async_client, http_get
+from .incremental import CRAWL_INCREMENTAL, is_fresh, load_previous
+from .llm_health import breaker_for
+from .llm_registry import default_provider, provider_function, provider_model
+from .persistence import CrawlResultWriter, unchanged_summary
+from .sitemap_parser import fetch_sitemap_entries
+from .url_canonicalizer import resolve_canonical
 
-# Optional LLM hook: try to import generate_suggestions (Gemini/OpenAI wrappers)
-try:
-    from .analyzer_gemini import generate_suggestions
-except Exception:
-    try:
-        from .analyzer_llm import generate_suggestions
-    except Exception:
-        generate_suggestions = None
+# Optional LLM hook: the provider (Gemini/OpenAI wrappers) is resolved through
+# llm_registry when a crawl first needs it, so its SDK is imported lazily
 
-DEFAULT_HEADERS = {"User-Agent": "SEO-AI-Checker/1.0 (+https://example.com)"}
+# Use the asyncio/httpx pipeline instead of the thread pool for page fetching
+CRAWL_ASYNC = os.getenv("CRAWL_ASYNC", "false").lower() == "true"
 
 
 def _get_domain(url: str) -> str:
@@ -46,7 +47,7 @@ def _find_sitemaps(base_url: str, timeout: int = 10) -> List[str]:
     # 1. Try robots.txt
     robots_url = f"{base_domain}/robots.txt"
     try:
-        resp = requests.get(robots_url, headers=DEFAULT_HEADERS, timeout=timeout)
+        resp = http_get(robots_url, timeout=timeout)
         if resp.status_code == 200:
             for line in resp.text.split("\n"):
                 line = line.strip().lower()
@@ -72,87 +73,18 @@ def _find_sitemaps(base_url: str, timeout: int = 10) -> List[str]:
     return sitemaps
 
 
-def _parse_sitemap_xml(xml_content: str, base_url: str) -> List[str]:
-    """
-    Parse sitemap XML and extract URLs.
-    Handles both <url> entries and nested sitemaps.
-    Returns list of page URLs
-    """
-    urls = []
-    try:
-        root = ET.fromstring(xml_content)
-
-        # Try with namespace first
-        ns = {"sm": "http://www.sitemaps.org/schemas/sitemap/0.9"}
-
-        # Check if this is a sitemap index (contains sitemaps)
-        sitemaps = root.findall("sm:sitemap/sm:loc", ns)
-        if not sitemaps:
-            # Try without namespace
-            sitemaps = root.findall("sitemap/loc")
-
-        if sitemaps:
-            # This is a sitemap index, return nested sitemap URLs
-            return [sm.text for sm in sitemaps if sm.text]
-
-        # Extract page URLs - try with namespace first
-        url_elements = root.findall("sm:url/sm:loc", ns)
-        if not url_elements:
-            # Try without namespace
-            url_elements = root.findall("url/loc")
-
-        urls = [url.text for url in url_elements if url.text]
-
-        if urls:
-            print(f"Extracted {len(urls)} URLs from sitemap")
-        else:
-            print(
-                f"No URLs found in sitemap. Root tag: {root.tag}, Children: {[child.tag for child in root[:5]]}"
-            )
-    except Exception as e:
-        print(f"Error parsing sitemap XML: {e}")
-
-    return urls
-
-
-def _fetch_all_urls_from_sitemaps(
-    sitemap_urls: List[str], max_urls: int = 500, timeout: int = 10
-) -> List[str]:
+def _page_links(fetch_res: dict, domain: str) -> Tuple[str, List[str]]:
     """
-    Recursively fetch all URLs from sitemaps (handles sitemap indices)
-    Returns flattened list of all page URLs
+    Canonical URL (honouring <link rel="canonical">) and same-domain links of a
+    fetched page.
     """
-    all_urls = []
-    visited_sitemaps = set()
-    to_process = sitemap_urls[:]
-
-    while to_process and len(all_urls) < max_urls:
-        sitemap_url = to_process.pop(0)
-
-        if sitemap_url in visited_sitemaps:
-            continue
-        visited_sitemaps.add(sitemap_url)
-
-        try:
-            resp = requests.get(sitemap_url, headers=DEFAULT_HEADERS, timeout=timeout)
-            if resp.status_code == 200:
-                urls = _parse_sitemap_xml(resp.text, sitemap_url)
-
-                # Check if URLs look like sitemaps (contain sitemap in domain)
-                for url in urls:
-                    if url.endswith(".xml") and "sitemap" in url.lower():
-                        # It's another sitemap, add to processing queue
-                        to_process.append(url)
-                    else:
-                        # It's a page URL
-                        if url not in all_urls:
-                            all_urls.append(url)
-                            if len(all_urls) >= max_urls:
-                                break
-        except Exception as e:
-            print(f"Error fetching sitemap {sitemap_url}: {e}")
-
-    return all_urls[:max_urls]
+    doc = ParsedDocument(fetch_res["html"], base_url=fetch_res["url"])
+    links = []
+    for link in doc.links:
+        abs_url = urljoin(fetch_res["url"], link["href"])
+        if _get_domain(abs_url) == domain:
+            links.append(abs_url.split("#")[0])
+    return resolve_canonical(fetch_res["url"], doc.canonical_href), links
 
 
 def _crawl_site_bfs_fallback(base_url: str, max_pages: int = 50) -> List[str]:
@@ -162,39 +94,32 @@ def _crawl_site_bfs_fallback(base_url: str, max_pages: int = 50) -> List[str]:
     Returns list of discovered page URLs
     """
     domain = _get_domain(base_url)
-    visited = set()
-    queue = deque([(base_url, 0)])
+    frontier = CrawlFrontier()
+    frontier.add(base_url)
+    discovered = SeenURLs()
     discovered_urls = []
 
-    while queue and len(discovered_urls) < max_pages:
-        url, depth = queue.popleft()
-
-        if url in visited or depth > 2:  # Max depth 2
-            continue
-
-        visited.add(url)
+    while frontier and len(discovered_urls) < max_pages:
+        url, depth = frontier.pop()
 
         try:
             fetch_res = fetch_html(url)
             if not fetch_res["ok"]:
                 continue
 
-            discovered_urls.append(fetch_res["url"])
-
-            # Extract links from page
-            soup = BeautifulSoup(fetch_res["html"], "html.parser")
-            for link in soup.find_all("a", href=True):
-                href = link["href"]
-                abs_url = urljoin(fetch_res["url"], href)
-
-                # Only crawl internal links (same domain)
-                if _get_domain(abs_url) == domain:
-                    # Remove fragment
-                    clean_url = abs_url.split("#")[0]
-                    if clean_url not in visited and clean_url not in [
-                        u for u, _ in queue
-                    ]:
-                        queue.append((clean_url, depth + 1))
+            # Redirect targets count as visited too
+            frontier.seen.add(fetch_res["url"])
+            canonical_url, links = _page_links(fetch_res, domain)
+            final_url = discovered.add(canonical_url)
+            if final_url:
+                discovered_urls.append(final_url)
+
+            if depth >= 2:  # Max depth 2
+                continue
+
+            # Only crawl internal links (same domain)
+            for clean_url in links:
+                frontier.add(clean_url, depth + 1)
         except Exception as e:
             print(f"Error crawling {url}: {e}")
             continue
@@ -203,13 +128,68 @@ def _crawl_site_bfs_fallback(base_url: str, max_pages: int = 50) -> List[str]:
     return discovered_urls
 
 
-def crawl_site_from_sitemap(
-    base_url: str, max_pages: int = 500, force_llm: bool = False
+async def _crawl_site_bfs_fallback_async(
+    base_url: str, max_pages: int = 50, max_depth: int = 2
+) -> List[str]:
+    """
+    Async variant of _crawl_site_bfs_fallback: pages are fetched concurrently
+    on one event loop (bounded per host), and outstanding requests are
+    cancelled as soon as max_pages pages have been discovered.
+    """
+    domain = _get_domain(base_url)
+    engine = AsyncCrawlEngine()
+    limit = asyncio.Semaphore(engine.concurrency)
+    seen = SeenURLs()
+    seen.add(base_url)
+    discovered = SeenURLs()
+    discovered_urls: List[str] = []
+    tasks = set()
+
+    async def visit(url: str, depth: int, client):
+        fetch_res = await engine.fetch_one(url, client, limit)
+        if not fetch_res["ok"] or len(discovered_urls) >= max_pages:
+            return
+        seen.add(fetch_res["url"])
+        canonical_url, links = await asyncio.to_thread(_page_links, fetch_res, domain)
+        final_url = discovered.add(canonical_url)
+        if final_url:
+            discovered_urls.append(final_url)
+        if depth >= max_depth:
+            return
+        for link in links:
+            key = seen.add(link)
+            if key:
+                tasks.add(asyncio.create_task(visit(key, depth + 1, client)))
+
+    async with async_client(max_connections=engine.concurrency) as client:
+        tasks.add(asyncio.create_task(visit(base_url, 0, client)))
+        try:
+            while tasks and len(discovered_urls) < max_pages:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                tasks.difference_update(done)
+                for task in done:
+                    if not task.cancelled() and task.exception():
+                        print(f"Error crawling: {task.exception()}")
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    print(f"Async BFS fallback discovered {len(discovered_urls)} pages")
+    return discovered_urls[:max_pages]
+
+
+def discover_page_urls(
+    base_url: str, max_pages: int = 500, use_async: bool = None
 ) -> Dict[str, Any]:
     """
-    Main function: crawl site using sitemaps
-    Returns summary of crawled pages
+    Find the pages to crawl: sitemap URLs first, BFS link crawl as fallback.
+    Returns { ok, sitemaps_found, page_urls, lastmods, error } where lastmods
+    maps page URLs to their sitemap <lastmod>, when given.
     """
+    if use_async is None:
+        use_async = CRAWL_ASYNC
+
     # Find sitemaps
     sitemap_urls = _find_sitemaps(base_url)
 
@@ -217,108 +197,225 @@ def crawl_site_from_sitemap(
         return {
             "ok": False,
             "error": "No sitemaps found for this domain",
-            "base_url": base_url,
-            "pages_analyzed": 0,
-            "pages": [],
+            "sitemaps_found": [],
+            "page_urls": [],
+            "lastmods": {},
         }
 
     # Fetch all URLs from sitemaps
-    page_urls = _fetch_all_urls_from_sitemaps(sitemap_urls, max_urls=max_pages)
+    entries = fetch_sitemap_entries(sitemap_urls, max_urls=max_pages)
+    page_urls = [entry.loc for entry in entries]
+    lastmods = {entry.loc: entry.lastmod for entry in entries if entry.lastmod}
 
     # If sitemap extraction failed, fall back to BFS crawling
     if not page_urls:
         print("No URLs from sitemap, falling back to BFS crawler")
-        page_urls = _crawl_site_bfs_fallback(base_url, max_pages=min(50, max_pages))
+        if use_async:
+            page_urls = asyncio.run(
+                _crawl_site_bfs_fallback_async(base_url, max_pages=min(50, max_pages))
+            )
+        else:
+            page_urls = _crawl_site_bfs_fallback(base_url, max_pages=min(50, max_pages))
 
     if not page_urls:
         return {
             "ok": False,
             "error": "Could not discover pages from sitemap or by crawling",
-            "base_url": base_url,
-            "pages_analyzed": 0,
-            "pages": [],
+            "sitemaps_found": sitemap_urls,
+            "page_urls": [],
+            "lastmods": {},
         }
 
-    # Analyze each page
-    analyzed_pages = []
-    for page_url in page_urls:
-        try:
-            # Fetch page
-            fetch_res = fetch_html(page_url)
-            if not fetch_res["ok"]:
-                analyzed_pages.append(
-                    {"url": page_url, "status": "error", "error": fetch_res["error"]}
-                )
+    return {
+        "ok": True,
+        "error": None,
+        "sitemaps_found": sitemap_urls,
+        "page_urls": page_urls,
+        "lastmods": lastmods,
+    }
+
+
+def iter_crawled_pages(
+    page_urls: List[str],
+    force_llm: bool = False,
+    use_async: bool = None,
+    incremental: bool = None,
+    lastmods: Dict[str, str] = None,
+    on_saved: Callable[[List[Tuple[int, Dict[str, Any]]]], None] = None,
+) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Fetch, analyze and persist `page_urls` concurrently.
+    Yields (index into page_urls, page summary) as each batch of pages is saved
+    (see persistence.CrawlResultWriter); failed fetches are yielded right away.
+    `on_saved` is passed to the writer: it sees each saved batch inside the
+    batch's transaction.
+
+    With incremental (default: CRAWL_INCREMENTAL setting), pages analyzed
+    before are skipped when their sitemap lastmod is not newer, and otherwise
+    fetched conditionally; unchanged pages reuse their previous analysis and
+    are reported with "unchanged": true.
+    """
+    if use_async is None:
+        use_async = CRAWL_ASYNC
+    if incremental is None:
+        incremental = CRAWL_INCREMENTAL
+
+    previous = load_previous(page_urls) if incremental else {}
+    positions = []
+    for index, url in enumerate(page_urls):
+        prev = previous.get(url)
+        if prev and is_fresh(prev, (lastmods or {}).get(url)):
+            yield index, unchanged_summary(url, prev.analysis)
+        else:
+            positions.append(index)
+
+    urls = [page_urls[i] for i in positions]
+    # Optionally call LLM per-page (if available). Use force_llm to bypass any cache.
+    provider = None
+    if force_llm or os.getenv("FORCE_LLM_PER_PAGE", "false").lower() == "true":
+        provider = default_provider()
+    suggest = provider_function(provider, "generate_suggestions")
+    suggest_batch = provider_function(provider, "generate_suggestions_batch")
+    # Retries are left to the dispatcher, which backs off without sleeping
+    writer = CrawlResultWriter(
+        suggest=partial(suggest, max_retries=0) if suggest else None,
+        suggest_batch=(
+            partial(suggest_batch, max_retries=0, fallback=False)
+            if suggest and suggest_batch
+            else None
+        ),
+        breaker=breaker_for(provider) if suggest else None,
+        previous=previous,
+        reuse_suggestions=not force_llm,
+        on_saved=on_saved,
+        model=provider_model(provider) if suggest else "",
+    )
+
+    # The engine ticks at least every max_delay so a partial batch is written
+    # even when the next page is slow to arrive
+    validators = {url: prev.validator for url, prev in previous.items()}
+    if use_async:
+        results = AsyncCrawlEngine().iter_results_sync(
+            urls, validators, tick=writer.max_delay
+        )
+    else:
+        results = CrawlEngine().iter_results(urls, validators, tick=writer.max_delay)
+
+    try:
+        for res in results:
+            if res is None:  # nothing finished within the tick
+                yield from writer.poll()
+                continue
+            res.index = positions[res.index]
+            if not res.ok:
+                yield res.index, {"url": res.url, "status": "error", "error": res.error}
+                yield from writer.poll()
                 continue
+            yield from writer.add(res)
+        yield from writer.close()
+    finally:
+        writer.shutdown()
+
+
+def iter_crawl_events(
+    base_url: str,
+    max_pages: int = 500,
+    force_llm: bool = False,
+    use_async: bool = None,
+    incremental: bool = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Crawl like crawl_site_from_sitemap() but yield progress records instead of
+    collecting them: one "start" record after discovery, one "page" record per
+    analyzed page (completion order, with running counts) and a final "done".
+    A failed discovery yields a single "error" record.
+    """
+    discovery = discover_page_urls(base_url, max_pages=max_pages, use_async=use_async)
+    if not discovery["ok"]:
+        yield {"type": "error", "base_url": base_url, "error": discovery["error"]}
+        return
+
+    total = len(discovery["page_urls"])
+    yield {
+        "type": "start",
+        "base_url": base_url,
+        "sitemaps_found": discovery["sitemaps_found"],
+        "total_urls": total,
+    }
 
-            # Parse and analyze
-            parsed = parse_page(fetch_res["html"], base_url=fetch_res["url"])
-            parsed["issues"] = []  # Will be populated by rules
-
-            score, breakdown, issues = run_all_rules(parsed)
-            parsed["issues"] = issues
-
-            # Save to database
-            page, _ = Page.objects.get_or_create(url=fetch_res["url"])
-            pa = PageAnalysis.objects.create(
-                page=page,
-                status_code=fetch_res["status_code"],
-                title=parsed.get("title", ""),
-                meta_description=parsed.get("meta_description", ""),
-                h1=parsed.get("h1", []),
-                h2=parsed.get("h2", []),
-                h3=parsed.get("h3", []),
-                images=parsed.get("images", []),
-                word_count=parsed.get("word_count", 0),
-                score=score,
-                score_breakdown=breakdown,
-                rule_issues=issues,
-                raw_html_snippet=parsed.get("raw_html_snippet", ""),
-            )
+    counts = {"success": 0, "error": 0}
+    unchanged = 0
+    pages = iter_crawled_pages(
+        discovery["page_urls"],
+        force_llm=force_llm,
+        use_async=use_async,
+        incremental=incremental,
+        lastmods=discovery["lastmods"],
+    )
+    for index, summary in pages:
+        counts[summary["status"]] += 1
+        unchanged += bool(summary.get("unchanged"))
+        yield {
+            "type": "page",
+            "index": index,
+            "page": summary,
+            "pages_analyzed": counts["success"],
+            "pages_failed": counts["error"],
+            "total_urls": total,
+        }
 
-            # Optionally call LLM per-page (if available). Use force_llm to bypass any cache.
-            try:
-                if generate_suggestions and (
-                    force_llm
-                    or os.getenv("FORCE_LLM_PER_PAGE", "false").lower() == "true"
-                ):
-                    try:
-                        llm_out = generate_suggestions(parsed)
-                    except Exception as le:
-                        llm_out = {"ok": False, "error": str(le)}
-                    pa.llm_suggestions = llm_out or {}
-                    pa.llm_model = os.getenv("LLM_MODEL", "") or pa.llm_model
-                    pa.llm_generated_at = timezone.now()
-                    pa.save(
-                        update_fields=[
-                            "llm_suggestions",
-                            "llm_model",
-                            "llm_generated_at",
-                        ]
-                    )
-            except Exception:
-                # don't let LLM failures break the crawl
-                pass
-
-            analyzed_pages.append(
-                {
-                    "url": fetch_res["url"],
-                    "status": "success",
-                    "status_code": fetch_res["status_code"],
-                    "score": score,
-                    "title": parsed.get("title", ""),
-                    "issues_count": len(issues),
-                }
-            )
-        except Exception as e:
-            analyzed_pages.append({"url": page_url, "status": "error", "error": str(e)})
+    yield {
+        "type": "done",
+        "base_url": base_url,
+        "pages_analyzed": counts["success"],
+        "pages_failed": counts["error"],
+        "pages_unchanged": unchanged,
+        "total_urls": total,
+        "analyzed_at": timezone.now().isoformat(),
+    }
+
+
+def crawl_site_from_sitemap(
+    base_url: str,
+    max_pages: int = 500,
+    force_llm: bool = False,
+    use_async: bool = None,
+    incremental: bool = None,
+) -> Dict[str, Any]:
+    """
+    Main function: crawl site using sitemaps
+    Set use_async (default: CRAWL_ASYNC setting) to fetch on an asyncio loop,
+    and incremental (default: CRAWL_INCREMENTAL) to skip unchanged pages.
+    Returns summary of crawled pages
+    """
+    discovery = discover_page_urls(base_url, max_pages=max_pages, use_async=use_async)
+    if not discovery["ok"]:
+        return {
+            "ok": False,
+            "error": discovery["error"],
+            "base_url": base_url,
+            "pages_analyzed": 0,
+            "pages": [],
+        }
+
+    summaries = dict(
+        iter_crawled_pages(
+            discovery["page_urls"],
+            force_llm=force_llm,
+            use_async=use_async,
+            incremental=incremental,
+            lastmods=discovery["lastmods"],
+        )
+    )
+    analyzed_pages = [summaries[i] for i in sorted(summaries)]
 
     return {
         "ok": True,
         "base_url": base_url,
-        "sitemaps_found": sitemap_urls,
+        "sitemaps_found": discovery["sitemaps_found"],
         "pages_analyzed": len([p for p in analyzed_pages if p["status"] == "success"]),
         "pages_failed": len([p for p in analyzed_pages if p["status"] == "error"]),
+        "pages_unchanged": len([p for p in analyzed_pages if p.get("unchanged")]),
         "pages": analyzed_pages,
         "analyzed_at": timezone.now().isoformat(),
     }
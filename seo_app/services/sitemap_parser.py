@@ -0,0 +1,186 @@
+# seo_app/services/sitemap_parser.py
+"""
+Streaming sitemap parser.
+- iter_sitemap_entries() walks a sitemap with ElementTree.iterparse and clears
+  each <url>/<sitemap> element once read, so memory stays flat for 50k-URL /
+  50 MB sitemaps
+- Bodies are read straight from the socket; gzip is decoded on the fly, both
+  for Content-Encoding: gzip and for .xml.gz files served as-is
+- fetch_sitemap_entries() fans out over sitemap indexes, fetching child
+  sitemaps concurrently (SITEMAP_FETCH_WORKERS)
+"""
+
+import gzip
+import io
+import os
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, List, Optional
+
+from .frontier import CrawlFrontier, SeenURLs
+from .http_client import http_get
+
+SITEMAP_FETCH_WORKERS = int(os.getenv("SITEMAP_FETCH_WORKERS", "8"))
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+@dataclass
+class SitemapEntry:
+    """One <url> (page) or <sitemap> (child of a sitemap index) entry."""
+
+    loc: str
+    lastmod: Optional[str] = None
+    priority: Optional[float] = None
+    changefreq: Optional[str] = None
+    is_sitemap: bool = False
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _looks_like_sitemap(url: str) -> bool:
+    path = url.lower().split("?", 1)[0]
+    return "sitemap" in path and (path.endswith(".xml") or path.endswith(".xml.gz"))
+
+
+def iter_sitemap_entries(stream: BinaryIO) -> Iterator[SitemapEntry]:
+    """
+    Yield entries from a sitemap or sitemap index as they are parsed.
+    Works with or without the sitemaps.org namespace. Raises ET.ParseError on
+    malformed XML (entries before the error have already been yielded).
+    """
+    root = None
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+            continue
+
+        name = _local_name(elem.tag)
+        if name not in ("url", "sitemap"):
+            continue
+
+        fields = {_local_name(child.tag): (child.text or "").strip() for child in elem}
+        loc = fields.get("loc")
+        if loc:
+            try:
+                priority = float(fields["priority"]) if fields.get("priority") else None
+            except ValueError:
+                priority = None
+            yield SitemapEntry(
+                loc=loc,
+                lastmod=fields.get("lastmod") or None,
+                priority=priority,
+                changefreq=fields.get("changefreq") or None,
+                # Some sites list child sitemaps as plain <url> entries
+                is_sitemap=name == "sitemap" or _looks_like_sitemap(loc),
+            )
+        # Drop everything parsed so far; the root keeps no children around
+        root.clear()
+
+
+class _PrefixedStream(io.RawIOBase):
+    """Replays bytes already read from `raw` before reading on from it."""
+
+    def __init__(self, prefix: bytes, raw):
+        self._prefix = prefix
+        self._raw = raw
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        if self._prefix:
+            if size is None or size < 0:
+                data, self._prefix = self._prefix + self._raw.read(), b""
+                return data
+            data, self._prefix = self._prefix[:size], self._prefix[size:]
+            return data
+        return self._raw.read(size if size is not None and size >= 0 else None)
+
+
+def open_sitemap_body(resp) -> BinaryIO:
+    """
+    Readable stream over a `stream=True` response body with any
+    Content-Encoding removed and gzip files decompressed.
+    """
+    resp.raw.decode_content = True
+    head = resp.raw.read(2)
+    body = _PrefixedStream(head, resp.raw)
+    if head == GZIP_MAGIC:
+        return gzip.GzipFile(fileobj=body)
+    return body
+
+
+def read_sitemap(
+    url: str, max_urls: int = 500, timeout: int = 10
+) -> List[SitemapEntry]:
+    """
+    Fetch one sitemap and return its entries, stopping after `max_urls` page
+    entries. Network and parse errors are logged and yield what was read.
+    """
+    entries = []
+    try:
+        resp = http_get(url, timeout=timeout, stream=True)
+    except Exception as e:
+        print(f"Error fetching sitemap {url}: {e}")
+        return entries
+
+    with resp:
+        if resp.status_code != 200:
+            return entries
+        pages = 0
+        try:
+            for entry in iter_sitemap_entries(open_sitemap_body(resp)):
+                entries.append(entry)
+                if not entry.is_sitemap:
+                    pages += 1
+                    if pages >= max_urls:
+                        break
+        except Exception as e:
+            # Parse errors, and network or gzip errors partway through the body
+            # (urllib3's, which are not OSErrors)
+            print(f"Error reading sitemap {url}: {e}")
+
+    if pages:
+        print(f"Extracted {pages} URLs from sitemap")
+    return entries
+
+
+def fetch_sitemap_entries(
+    sitemap_urls: List[str],
+    max_urls: int = 500,
+    timeout: int = 10,
+    workers: int = SITEMAP_FETCH_WORKERS,
+) -> List[SitemapEntry]:
+    """
+    Collect up to `max_urls` unique page entries from `sitemap_urls`, following
+    sitemap indexes. Sitemaps are fetched `workers` at a time; results keep
+    the order in which sitemaps were listed.
+    """
+    pages: List[SitemapEntry] = []
+    seen_pages = SeenURLs()
+    to_process = CrawlFrontier()
+    for url in sitemap_urls:
+        to_process.add(url)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while to_process and len(pages) < max_urls:
+            chunk = [to_process.pop()[0] for _ in range(min(workers, len(to_process)))]
+
+            remaining = max_urls - len(pages)
+            results = pool.map(lambda u: read_sitemap(u, remaining, timeout), chunk)
+            for entries in results:
+                for entry in entries:
+                    if entry.is_sitemap:
+                        to_process.add(entry.loc)
+                    elif len(pages) < max_urls:
+                        loc = seen_pages.add(entry.loc)
+                        if loc:
+                            entry.loc = loc
+                            pages.append(entry)
+
+    return pages
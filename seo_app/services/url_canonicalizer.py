@@ -0,0 +1,156 @@
+# seo_app/services/url_canonicalizer.py
+"""
+URL canonicalization for crawl dedupe and Page storage.
+- canonicalize_url(): the URL we fetch and store. Lowercase scheme/host, IDNA
+  (punycode) host, no default port or fragment, tracking parameters removed
+  (URL_STRIP_PARAMS) and query parameters sorted (URL_SORT_QUERY). Each
+  parameter keeps its original spelling, so "?flag" is not turned into "?flag="
+- dedupe_key(): what two URLs must share to count as the same page. Also folds
+  http/https and, with URL_STRIP_TRAILING_SLASH, "/path" vs "/path/"
+- resolve_canonical(): honours <link rel="canonical"> when it stays on-site
+"""
+
+import os
+from typing import List
+from urllib.parse import unquote_plus, urljoin, urlsplit, urlunsplit
+
+DEFAULT_STRIP_PARAMS = [
+    "utm_*",
+    "gclid",
+    "dclid",
+    "gbraid",
+    "wbraid",
+    "fbclid",
+    "msclkid",
+    "yclid",
+    "twclid",
+    "igshid",
+    "mc_cid",
+    "mc_eid",
+    "_ga",
+    "_gl",
+    "_hsenc",
+    "_hsmi",
+]
+# Extra names to strip, comma separated; a trailing * matches a prefix
+URL_STRIP_PARAMS = DEFAULT_STRIP_PARAMS + [
+    p.strip().lower() for p in os.getenv("URL_STRIP_PARAMS", "").split(",") if p.strip()
+]
+URL_SORT_QUERY = os.getenv("URL_SORT_QUERY", "true").lower() == "true"
+URL_STRIP_TRAILING_SLASH = (
+    os.getenv("URL_STRIP_TRAILING_SLASH", "true").lower() == "true"
+)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def _param_matcher(names: List[str]):
+    exact = {n for n in names if not n.endswith("*")}
+    prefixes = tuple(n[:-1] for n in names if n.endswith("*"))
+    return lambda key: key.lower() in exact or key.lower().startswith(prefixes)
+
+
+_is_tracking_param = _param_matcher(URL_STRIP_PARAMS)
+
+
+def _idna_host(host: str) -> str:
+    host = host.lower().rstrip(".")
+    if host.isascii():
+        return host
+    try:
+        return host.encode("idna").decode("ascii")
+    except UnicodeError:
+        return host
+
+
+def _clean_query(query: str, is_tracking) -> str:
+    """`query` without tracking parameters, sorted with URL_SORT_QUERY."""
+    params = []
+    for param in query.split("&"):
+        if not param:
+            continue
+        key, _, value = param.partition("=")
+        key = unquote_plus(key)
+        if not is_tracking(key):
+            params.append(((key, unquote_plus(value)), param))
+    if URL_SORT_QUERY:
+        params.sort(key=lambda p: p[0])
+    return "&".join(param for _, param in params)
+
+
+def canonicalize_url(url: str, strip_params: List[str] = None) -> str:
+    """
+    Canonical form of an absolute http(s) URL. Anything that does not parse
+    as one is returned stripped of its fragment.
+    """
+    url = (url or "").strip()
+    parts = urlsplit(url)
+    try:
+        port = parts.port
+    except ValueError:
+        return url.split("#", 1)[0]
+    if not parts.scheme or not parts.hostname:
+        return url.split("#", 1)[0]
+
+    scheme = parts.scheme.lower()
+    host = _idna_host(parts.hostname)
+    if ":" in host:  # IPv6 literal
+        host = f"[{host}]"
+    if port and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+
+    is_tracking = (
+        _param_matcher(strip_params) if strip_params is not None else _is_tracking_param
+    )
+    query = _clean_query(parts.query, is_tracking)
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def dedupe_key(url: str) -> str:
+    """Scheme-less canonical URL; equal keys mean "same page" for the crawlers."""
+    parts = urlsplit(canonicalize_url(url))
+    path = parts.path
+    if URL_STRIP_TRAILING_SLASH and len(path) > 1:
+        path = path.rstrip("/") or "/"
+    return urlunsplit(("", parts.netloc, path, parts.query, "")).lstrip("/")
+
+
+def equivalent_urls(url: str) -> List[str]:
+    """Canonical URL plus the http/https and trailing-slash variants sharing its key."""
+    canonical = canonicalize_url(url)
+    parts = urlsplit(canonical)
+    if parts.scheme not in DEFAULT_PORTS:
+        return [canonical]
+
+    paths = [parts.path]
+    if URL_STRIP_TRAILING_SLASH and len(parts.path) > 1:
+        bare = parts.path.rstrip("/") or "/"
+        paths = list(dict.fromkeys([parts.path, bare, bare + "/"]))
+
+    variants = [canonical]
+    for scheme in ("https", "http"):
+        for path in paths:
+            variant = urlunsplit((scheme, parts.netloc, path, parts.query, ""))
+            if variant not in variants:
+                variants.append(variant)
+    return variants
+
+
+def _site(host: str) -> str:
+    host = _idna_host(host or "")
+    return host[4:] if host.startswith("www.") else host
+
+
+def resolve_canonical(page_url: str, canonical_href: str = "") -> str:
+    """
+    Canonical URL for a fetched page: its <link rel="canonical"> target when
+    that points at the same site, otherwise the page URL itself.
+    """
+    if canonical_href:
+        target = urljoin(page_url, canonical_href.strip())
+        target_parts = urlsplit(target)
+        if target_parts.scheme in DEFAULT_PORTS and _site(
+            target_parts.hostname
+        ) == _site(urlsplit(page_url).hostname):
+            return canonicalize_url(target)
+    return canonicalize_url(page_url)
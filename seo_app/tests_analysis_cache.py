@@ -0,0 +1,89 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from seo_app.services import crawl_engine
+from seo_app.services.analysis_cache import AnalysisCache, analysis_cache, analysis_key
+from seo_app.services.crawl_engine import CrawlEngine
+from seo_app.services.crawler import parse_page
+
+PAGE_HTML = """<html><head><title>Same page everywhere</title></head>
+<body><h1>Hello</h1><p>Some words about nothing in particular.</p></body></html>"""
+
+
+def fake_fetch(url, **kwargs):
+    return {
+        "ok": True,
+        "url": url,
+        "status_code": 200,
+        "html": PAGE_HTML,
+        "error": None,
+    }
+
+
+class AnalysisCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        analysis_cache.clear()
+
+    def tearDown(self):
+        analysis_cache.clear()
+
+    def test_key_ignores_whitespace_but_not_directory(self):
+        url = "https://example.com/a/page"
+        self.assertEqual(
+            analysis_key("<p>hi   there</p>\n", url),
+            analysis_key("<p>hi there</p>", "https://example.com/a/other"),
+        )
+        self.assertNotEqual(
+            analysis_key("<p>hi there</p>", url),
+            analysis_key("<p>hi there</p>", "https://example.com/b/page"),
+        )
+
+    def test_lru_eviction_and_copies(self):
+        cache = AnalysisCache(max_entries=2)
+        for name in "abc":
+            cache.set(name, "https://example.com/", {"parsed": {"title": name}})
+        self.assertIsNone(cache.get("a", "https://example.com/"))
+        entry = cache.get("b", "https://example.com/")
+        entry["parsed"]["title"] = "changed"
+        self.assertEqual(cache.get("b", "https://example.com/")["parsed"]["title"], "b")
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_self_canonical_follows_url(self):
+        cache = AnalysisCache(max_entries=4)
+        parsed = {"canonical_url": "https://example.com/a"}
+        cache.set("k", "https://example.com/a", {"parsed": parsed})
+        entry = cache.get("k", "https://example.com/b")
+        self.assertEqual(entry["parsed"]["canonical_url"], "https://example.com/b")
+
+    def test_explicit_canonical_survives_reuse(self):
+        html = '<html><head><link rel="canonical" href="/product"></head></html>'
+        source, variant = (
+            "https://example.com/product",
+            "https://example.com/product?color=red",
+        )
+        self.assertEqual(analysis_key(html, source), analysis_key(html, variant))
+        cache = AnalysisCache(max_entries=4)
+        cache.set("k", source, {"parsed": parse_page(html, base_url=source)})
+
+        entry = cache.get("k", variant)
+        self.assertEqual(
+            entry["parsed"]["canonical_url"], "https://example.com/product"
+        )
+
+    def test_duplicate_pages_scored_once(self):
+        urls = [f"https://example.com/dup-{i}" for i in range(5)]
+        engine = CrawlEngine(fetch_workers=2, cpu_workers=0, fetch=fake_fetch)
+        with patch.object(
+            crawl_engine, "analyze_html", wraps=crawl_engine.analyze_html
+        ) as analyze:
+            results = list(engine.iter_results(urls))
+
+        self.assertEqual(analyze.call_count, 1)
+        self.assertTrue(all(r.ok for r in results))
+        self.assertEqual(len({r.score for r in results}), 1)
+        self.assertEqual(
+            {r.parsed["canonical_url"] for r in results if r.parsed["canonical_url"]},
+            {r.url for r in results if r.parsed["canonical_url"]},
+        )
@@ -0,0 +1,293 @@
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from seo_app.services import backlink_analysis, cache_tier, crawler
+from seo_app.services.backlink_analysis import BacklinkAnalyzer
+from seo_app.services.cache_tier import TieredCache, cache_stats
+
+SHARED_DIR = tempfile.mkdtemp(prefix="shared-cache-test-")
+
+
+# LocMemCache.add() is atomic, which the L2 lock needs; instances with one
+# LOCATION share their data like separate workers sharing Redis
+ATOMIC_SHARED = override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "shared": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "tier-lock-tests",
+        },
+    }
+)
+
+CRAWLER_IMPORT_CHECK = """
+import sys
+import seo_app.services.crawl_engine
+print(sorted(m for m in sys.modules if m.startswith("django")))
+"""
+
+
+def tearDownModule():
+    shutil.rmtree(SHARED_DIR, ignore_errors=True)
+
+
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "shared": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": SHARED_DIR,
+        },
+    }
+)
+class TieredCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        caches["shared"].clear()
+
+    def tearDown(self):
+        caches["shared"].clear()
+
+    def test_second_worker_reads_first_workers_result(self):
+        # Two instances of one namespace stand in for two worker processes
+        first = TieredCache("tier_test_share")
+        second = TieredCache("tier_test_share")
+        first.set("example.com", {"score": 42}, 60)
+
+        self.assertEqual(second.get("example.com"), {"score": 42})
+        self.assertEqual(second.stats["l2_hits"], 1)
+        self.assertEqual(second.get("example.com"), {"score": 42})
+        self.assertEqual(second.stats["l1_hits"], 1)
+
+    @ATOMIC_SHARED
+    def test_workers_share_one_computation_through_l2_lock(self):
+        caches["shared"].clear()
+        # Separate instances have separate SingleFlights, like two processes
+        workers = [TieredCache("tier_test_lock") for _ in range(3)]
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.3)
+            return {"volume": 10}
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda w=w: results.append(w.get_or_compute("kw", compute, 60))
+            )
+            for w in workers
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"volume": 10}] * 3)
+
+    @ATOMIC_SHARED
+    def test_refresh_skipped_while_another_worker_holds_the_lock(self):
+        caches["shared"].clear()
+        tier = TieredCache("tier_test_refresh_lock", stale_ttl=60)
+        tier.set("kw", "old", 0)
+        caches["shared"].add(tier._lock_key("kw"), 1, 30)
+        calls = []
+
+        self.assertEqual(tier.get_or_compute("kw", lambda: calls.append(1), 60), "old")
+        for _ in range(50):
+            if not tier._refreshing:
+                break
+            time.sleep(0.01)
+        self.assertEqual(calls, [])
+
+    @ATOMIC_SHARED
+    def test_wait_for_held_lock_is_bounded(self):
+        caches["shared"].clear()
+        tier = TieredCache("tier_test_lock_wait", stale_ttl=60)
+        caches["shared"].add(tier._lock_key("kw"), 1, 30)
+
+        with patch.object(cache_tier, "CACHE_LOCK_WAIT", 0.2):
+            started = time.monotonic()
+            self.assertEqual(tier.get_or_compute("kw", lambda: "local", 60), "local")
+            self.assertLess(time.monotonic() - started, 1)
+
+            # A stale entry is served once the wait runs out
+            tier.set("kw", "old", 0)
+            self.assertEqual(tier._wait_for_l2("kw")[1], "old")
+
+    @ATOMIC_SHARED
+    def test_expired_lock_holder_leaves_the_new_lock_alone(self):
+        caches["shared"].clear()
+        first = TieredCache("tier_test_lock_owner")
+        second = TieredCache("tier_test_lock_owner")
+        token = first._acquire_lock("kw")
+        self.assertIsNone(second._acquire_lock("kw"))
+
+        # The first worker overran CACHE_LOCK_TIMEOUT and the second took over
+        caches["shared"].delete(first._lock_key("kw"))
+        second_token = second._acquire_lock("kw")
+        first._release_lock("kw", token)
+        self.assertTrue(second._locked("kw"))
+        second._release_lock("kw", second_token)
+        self.assertFalse(second._locked("kw"))
+
+    def test_lock_skipped_without_atomic_add(self):
+        # FileBasedCache.add() is check-then-set, so it cannot exclude workers
+        tier = TieredCache("tier_test_file_lock")
+        self.assertTrue(tier._acquire_lock("kw"))
+        self.assertTrue(tier._acquire_lock("kw"))
+        self.assertFalse(tier._locked("kw"))
+
+    def test_unsafe_keys_are_hashed_for_l2(self):
+        tier = TieredCache("tier_test_keys")
+        tier.set("best seo tools", 1, 60)
+        self.assertEqual(TieredCache("tier_test_keys").get("best seo tools"), 1)
+        self.assertNotIn(" ", tier._key("best seo tools"))
+        self.assertEqual(tier._key("example.com"), "tier_test_keys:example.com")
+
+    def test_l1_evicts_least_recently_used(self):
+        tier = TieredCache("tier_test_lru", l1_size=2, alias="")
+        tier.set("a", 1, 60)
+        tier.set("b", 2, 60)
+        tier.get("a")
+        tier.set("c", 3, 60)
+
+        self.assertEqual(tier.get("a"), 1)
+        self.assertIsNone(tier.get("b"))
+        self.assertEqual(tier.stats["misses"], 1)
+
+    def test_l1_hands_out_copies(self):
+        tier = TieredCache("tier_test_copies", alias="")
+        value = {"keywords": ["seo"]}
+        tier.set("k", value, 60)
+        value["keywords"].append("set")
+        tier.get("k")["keywords"].append("get")
+        tier.get_or_compute("k", dict, 60)["keywords"].append("compute")
+
+        self.assertEqual(tier.get("k"), {"keywords": ["seo"]})
+
+    def test_large_values_are_compressed_and_oversized_ones_not_shared(self):
+        value = {"rows": ["same text"] * 500}
+        stored, size = cache_tier.encode_value((0, value))
+        self.assertIsInstance(stored, bytes)
+        self.assertLess(size, 1024)
+        self.assertEqual(cache_tier.decode_value(stored), (0, value))
+        small = (0, {"score": 1})
+        self.assertIs(cache_tier.encode_value(small)[0], small)
+
+        tier = TieredCache("tier_test_size")
+        with patch.object(cache_tier, "CACHE_MAX_VALUE_BYTES", 10):
+            tier.set("big", value, 60)
+        self.assertIsNone(caches["shared"].get("tier_test_size:big"))
+        self.assertEqual(tier.get("big"), value)
+
+    def test_stats_per_namespace(self):
+        tier = TieredCache("tier_test_stats")
+        tier.get("missing")
+        tier.set("k", "v", 60)
+        tier.get("k")
+
+        stats = cache_stats("tier_test_stats")["tier_test_stats"]
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["l1_hits"], 1)
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_backlink_analysis_served_from_shared_cache(self):
+        backlink_analysis.analysis_cache.clear_local()
+        first = BacklinkAnalyzer().analyze_domain("example.com")
+        backlink_analysis.analysis_cache.clear_local()
+
+        with patch.object(
+            BacklinkAnalyzer, "_estimate_total_backlinks", side_effect=AssertionError
+        ):
+            again = BacklinkAnalyzer().analyze_domain("example.com")
+        self.assertEqual(again, first)
+        self.assertEqual(backlink_analysis.analysis_cache.stats["l2_hits"], 1)
+
+
+def _run_concurrently(fn, n=5):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(fn())) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    return results
+
+
+class StampedeTests(SimpleTestCase):
+
+    def test_concurrent_misses_share_one_computation(self):
+        tier = TieredCache("tier_test_flight", alias="")
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {"volume": 10}
+
+        results = _run_concurrently(lambda: tier.get_or_compute("kw", compute, 60))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"volume": 10}] * 5)
+        self.assertEqual(tier.stats["coalesced"], 4)
+
+    def test_stale_entry_served_while_refreshing(self):
+        tier = TieredCache("tier_test_stale", alias="", stale_ttl=60)
+        tier.set("kw", "old", 0)
+        refreshed = threading.Event()
+
+        def compute():
+            refreshed.set()
+            return "new"
+
+        self.assertIsNone(tier.get("kw"))
+        self.assertEqual(tier.get_or_compute("kw", compute, 60), "old")
+        self.assertTrue(refreshed.wait(5))
+        for _ in range(50):
+            if tier.get("kw") == "new":
+                break
+            time.sleep(0.01)
+        self.assertEqual(tier.get("kw"), "new")
+        self.assertEqual(tier.stats["stale_hits"], 1)
+        self.assertEqual(tier.stats["refreshes"], 1)
+
+    def test_failures_are_not_cached(self):
+        tier = TieredCache("tier_test_fail", alias="")
+        with self.assertRaises(ValueError):
+            tier.get_or_compute("kw", self._fail, 60)
+        self.assertEqual(tier.get_or_compute("kw", lambda: "ok", 60), "ok")
+
+    def _fail(self):
+        raise ValueError("provider down")
+
+    def test_crawl_engine_imports_without_django(self):
+        # Spawned CPU workers import the engine (and crawler) without Django
+        out = subprocess.run(
+            [sys.executable, "-c", CRAWLER_IMPORT_CHECK],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.assertEqual(out.stdout.strip().splitlines()[-1], "[]")
+
+    def test_concurrent_fetches_of_one_url_share_a_request(self):
+        calls = []
+
+        def slow_fetch(url, timeout, etag, last_modified):
+            calls.append(url)
+            time.sleep(0.2)
+            return {"ok": True, "url": url, "html": "<p>x</p>"}
+
+        with patch.object(crawler, "_fetch_html", side_effect=slow_fetch):
+            results = _run_concurrently(lambda: crawler.fetch_html("example.com/a"))
+        self.assertEqual(calls, ["https://example.com/a"])
+        self.assertEqual(len(results), 5)
+        self.assertIsNot(results[0], results[1])
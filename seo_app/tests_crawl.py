@@ -0,0 +1,370 @@
+import asyncio
+import json
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from seo_app.models import CrawlJob, CrawlJobURL, Page, PageAnalysis
+from seo_app.services import crawl_jobs, http_client
+from seo_app.services.crawl_engine import AsyncCrawlEngine, CrawlEngine
+from seo_app.services.crawl_jobs import claim_next_job, run_crawl_job, run_pending_jobs
+from seo_app.services.crawler import fetch_html_async
+from seo_app.services.sitemap_crawler import (
+    _crawl_site_bfs_fallback,
+    _crawl_site_bfs_fallback_async,
+    crawl_site_from_sitemap,
+)
+
+PAGE_COUNT = 6
+
+
+def _page_html(i: int) -> str:
+    links = "".join(f'<a href="/page-{j}">Page {j}</a>' for j in range(PAGE_COUNT))
+    return (
+        f"<html><head><title>Test page number {i} for the crawler</title></head>"
+        f"<body><h1>Page {i}</h1><nav>{links}</nav>"
+        f"<main><p>{'Some page copy. ' * 40}</p></main></body></html>"
+    )
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    """
+    Serves robots.txt, a sitemap and PAGE_COUNT pages; /page-3 is a 404.
+    Pages carry an ETag and answer If-None-Match with 304; the sitemap gives
+    /page-5 an old <lastmod>. Requested paths are recorded in `hits`.
+    """
+
+    protocol_version = "HTTP/1.1"
+    hits = []
+
+    def do_GET(self):
+        host = f"http://{self.headers['Host']}"
+        path = self.path.split("?")[0]
+        SiteHandler.hits.append(path)
+        if path == "/robots.txt":
+            body, ctype = f"Sitemap: {host}/sitemap.xml\n", "text/plain"
+        elif path == "/sitemap.xml":
+            locs = "".join(
+                f"<url><loc>{host}/page-{i}</loc>"
+                + ("<lastmod>2001-01-01</lastmod>" if i == 5 else "")
+                + "</url>"
+                for i in range(PAGE_COUNT)
+            )
+            body = (
+                '<?xml version="1.0" encoding="UTF-8"?>'
+                '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                f"{locs}</urlset>"
+            )
+            ctype = "application/xml"
+        elif path.startswith("/page-") and path != "/page-3":
+            etag = f'"{path}-v1"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body, ctype = _page_html(int(path.rsplit("-", 1)[1])), "text/html"
+            self._send(200, body, ctype, {"ETag": etag})
+            return
+        else:
+            body, ctype = "not found", "text/plain"
+            self._send(404, body, ctype)
+            return
+        self._send(200, body, ctype)
+
+    def _send(self, status, body, ctype, headers=None):
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalSiteMixin:
+    """Runs SiteHandler on a random localhost port for the test class."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        http_client.reset_session()
+        super().tearDownClass()
+
+
+class CrawlEngineTests(LocalSiteMixin, TestCase):
+
+    def test_engine_with_process_pool(self):
+        urls = [f"{self.base_url}/page-{i}" for i in range(PAGE_COUNT)]
+        engine = CrawlEngine(fetch_workers=4, cpu_workers=2, per_host_limit=2)
+        results = sorted(engine.iter_results(urls), key=lambda r: r.index)
+
+        self.assertEqual([r.url for r in results], urls)
+        self.assertFalse(results[3].ok)
+        ok = [r for r in results if r.ok]
+        self.assertEqual(len(ok), PAGE_COUNT - 1)
+        self.assertTrue(ok[0].parsed["title"].startswith("Test page number 0"))
+
+    def test_engine_ticks_while_pages_are_slow(self):
+        def slow_fetch(url, **kwargs):
+            time.sleep(0.3)
+            raise OSError("timed out")
+
+        engine = CrawlEngine(fetch=slow_fetch)
+        results = list(engine.iter_results([f"{self.base_url}/a"], tick=0.05))
+
+        self.assertIsNone(results[0])
+        self.assertEqual(results[-1].error, "timed out")
+
+    def test_crawl_site_from_sitemap(self):
+        result = crawl_site_from_sitemap(self.base_url + "/", max_pages=50)
+
+        self.assertTrue(result["ok"])
+        self.assertEqual(result["pages_analyzed"], PAGE_COUNT - 1)
+        self.assertEqual(result["pages_failed"], 1)
+        # Summary keeps sitemap order
+        self.assertEqual(
+            [p["url"] for p in result["pages"]],
+            [f"{self.base_url}/page-{i}" for i in range(PAGE_COUNT)],
+        )
+        self.assertEqual(Page.objects.count(), PAGE_COUNT - 1)
+        self.assertEqual(PageAnalysis.objects.count(), PAGE_COUNT - 1)
+
+    def test_bfs_discovers_each_page_once(self):
+        urls = _crawl_site_bfs_fallback(f"{self.base_url}/page-0", max_pages=50)
+        self.assertEqual(len(urls), PAGE_COUNT - 1)
+        self.assertEqual(len(set(urls)), len(urls))
+
+
+class AsyncCrawlTests(LocalSiteMixin, TestCase):
+
+    def test_fetch_html_async(self):
+        res = asyncio.run(fetch_html_async(f"{self.base_url}/page-1"))
+        self.assertTrue(res["ok"])
+        self.assertIn("Test page number 1", res["html"])
+
+        missing = asyncio.run(fetch_html_async(f"{self.base_url}/page-3"))
+        self.assertFalse(missing["ok"])
+        self.assertEqual(missing["status_code"], 404)
+
+    def test_busy_host_does_not_hold_global_slots(self):
+        finished = []
+
+        async def fetch(url, client=None, **kwargs):
+            await asyncio.sleep(0.3 if "slow" in url else 0)
+            finished.append(url)
+            return {"ok": True, "url": url}
+
+        async def crawl():
+            engine = AsyncCrawlEngine(concurrency=2, per_host_limit=1, fetch=fetch)
+            limit = asyncio.Semaphore(engine.concurrency)
+            urls = ["http://slow.test/1", "http://slow.test/2", "http://fast.test/"]
+            await asyncio.gather(*(engine.fetch_one(u, None, limit) for u in urls))
+
+        asyncio.run(crawl())
+        self.assertEqual(finished[0], "http://fast.test/")
+
+    def test_async_bfs_stops_at_max_pages(self):
+        urls = asyncio.run(
+            _crawl_site_bfs_fallback_async(f"{self.base_url}/page-0", max_pages=3)
+        )
+        self.assertEqual(len(urls), 3)
+
+    def test_crawl_site_from_sitemap_async(self):
+        result = crawl_site_from_sitemap(
+            self.base_url + "/", max_pages=50, use_async=True
+        )
+        self.assertEqual(result["pages_analyzed"], PAGE_COUNT - 1)
+        self.assertEqual(result["pages"][3]["status"], "error")
+        self.assertEqual(PageAnalysis.objects.count(), PAGE_COUNT - 1)
+
+
+class CrawlJobTests(LocalSiteMixin, TestCase):
+
+    def test_submit_run_and_poll(self):
+        resp = self.client.post(
+            "/api/crawl-jobs/",
+            {"url": self.base_url + "/"},
+            content_type="application/json",
+        )
+        self.assertEqual(resp.status_code, 202)
+        job_id = resp.json()["job"]["id"]
+
+        self.assertEqual(run_pending_jobs(), 1)
+
+        job = self.client.get(f"/api/crawl-jobs/{job_id}/").json()["job"]
+        self.assertEqual(job["status"], "completed")
+        self.assertEqual(job["total_urls"], PAGE_COUNT)
+        self.assertEqual(job["pages_analyzed"], PAGE_COUNT - 1)
+        self.assertEqual(job["progress"], 1.0)
+
+        results = self.client.get(f"/api/crawl-jobs/{job_id}/results/").json()
+        self.assertEqual(len(results["pages"]), PAGE_COUNT)
+        self.assertEqual(results["pages"][3]["status"], "error")
+
+    def test_interrupted_job_resumes_pending_urls(self):
+        job = CrawlJob.objects.create(
+            base_url=self.base_url + "/", status="running", total_urls=2
+        )
+        CrawlJobURL.objects.create(
+            job=job,
+            position=0,
+            url=f"{self.base_url}/page-0",
+            status="success",
+            result={"url": f"{self.base_url}/page-0", "status": "success"},
+        )
+        CrawlJobURL.objects.create(job=job, position=1, url=f"{self.base_url}/page-1")
+        job.pages_analyzed = 1
+        job.save()
+
+        run_crawl_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, "completed")
+        self.assertEqual(job.pages_analyzed, 2)
+        # Only the pending URL was fetched again
+        self.assertEqual(PageAnalysis.objects.count(), 1)
+
+    def test_running_job_reclaimed_only_after_heartbeat_expires(self):
+        job = CrawlJob.objects.create(
+            base_url=self.base_url + "/", status="running", worker_id="worker-a"
+        )
+        self.assertIsNone(claim_next_job("worker-b"))
+
+        expired = timezone.now() - timedelta(
+            seconds=crawl_jobs.CRAWL_JOB_LEASE_TIMEOUT + 1
+        )
+        CrawlJob.objects.filter(pk=job.pk).update(updated_at=expired)
+        self.assertEqual(claim_next_job("worker-b").worker_id, "worker-b")
+        self.assertIsNone(claim_next_job("worker-c"))
+
+    def test_worker_stops_after_losing_its_lease(self):
+        job = CrawlJob.objects.create(
+            base_url=self.base_url + "/", status="running", worker_id="worker-b"
+        )
+        CrawlJobURL.objects.create(job=job, position=0, url=f"{self.base_url}/page-0")
+
+        job = run_crawl_job(job, "worker-a")
+        self.assertEqual((job.status, job.worker_id), ("running", "worker-b"))
+        self.assertEqual(job.urls.get().status, "pending")
+
+    def test_lease_renewed_between_saved_batches(self):
+        job = CrawlJob.objects.create(base_url=self.base_url + "/")
+        with patch.object(crawl_jobs, "_heartbeat") as heartbeat:
+            with crawl_jobs._LeaseKeeper(job, "worker-a", interval=0.01):
+                # e.g. a slow discovery or the final wait for LLM suggestions
+                time.sleep(0.1)
+            calls = heartbeat.call_count
+            time.sleep(0.05)
+        self.assertGreater(calls, 1)
+        self.assertEqual(heartbeat.call_count, calls)
+        heartbeat.assert_called_with(job, "worker-a")
+
+    def test_url_rows_marked_in_the_analysis_transaction(self):
+        job = CrawlJob.objects.create(base_url=self.base_url + "/")
+        for i in range(2):
+            CrawlJobURL.objects.create(
+                job=job, position=i, url=f"{self.base_url}/page-{i}"
+            )
+
+        with patch.object(crawl_jobs, "_record", side_effect=RuntimeError("db")):
+            self.assertEqual(run_crawl_job(job).status, "failed")
+        # Marking the rows failed, so the analyses were rolled back with it
+        self.assertEqual(PageAnalysis.objects.count(), 0)
+        self.assertEqual(job.urls.filter(status="pending").count(), 2)
+
+
+class CrawlStreamTests(LocalSiteMixin, TestCase):
+
+    def test_ndjson_stream(self):
+        resp = self.client.post(
+            "/api/analyze/stream/",
+            {"url": self.base_url + "/"},
+            content_type="application/json",
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["Content-Type"], "application/x-ndjson")
+        records = [
+            json.loads(line)
+            for line in b"".join(resp.streaming_content).decode().splitlines()
+        ]
+
+        self.assertEqual(records[0]["type"], "start")
+        self.assertEqual(records[0]["total_urls"], PAGE_COUNT)
+        pages = [r for r in records if r["type"] == "page"]
+        self.assertEqual(len(pages), PAGE_COUNT)
+        self.assertEqual(
+            pages[-1]["pages_analyzed"] + pages[-1]["pages_failed"], PAGE_COUNT
+        )
+        self.assertEqual(records[-1]["type"], "done")
+        self.assertEqual(records[-1]["pages_failed"], 1)
+
+    def test_sse_stream(self):
+        resp = self.client.get(
+            "/api/analyze/stream/",
+            {"url": self.base_url + "/", "max_pages": 2},
+            HTTP_ACCEPT="text/event-stream",
+        )
+        self.assertEqual(resp["Content-Type"], "text/event-stream")
+        body = b"".join(resp.streaming_content).decode()
+        self.assertTrue(body.startswith("event: start\ndata: "))
+        self.assertEqual(body.count("event: page\n"), 2)
+        self.assertEqual(body.rstrip().splitlines()[-2], "event: done")
+
+    def test_missing_url(self):
+        resp = self.client.post(
+            "/api/analyze/stream/", {}, content_type="application/json"
+        )
+        self.assertEqual(resp.status_code, 400)
+
+
+class IncrementalCrawlTests(LocalSiteMixin, TestCase):
+
+    def test_recrawl_reuses_unchanged_pages(self):
+        first = crawl_site_from_sitemap(self.base_url + "/", incremental=True)
+        self.assertEqual(first["pages_unchanged"], 0)
+        self.assertEqual(PageAnalysis.objects.count(), PAGE_COUNT - 1)
+        page = Page.objects.get(url=f"{self.base_url}/page-1")
+        self.assertEqual(page.etag, '"/page-1-v1"')
+        self.assertEqual(len(page.content_hash), 64)
+
+        SiteHandler.hits.clear()
+        second = crawl_site_from_sitemap(self.base_url + "/", incremental=True)
+
+        self.assertEqual(second["pages_analyzed"], PAGE_COUNT - 1)
+        self.assertEqual(second["pages_unchanged"], PAGE_COUNT - 1)
+        self.assertEqual(second["pages"][1]["score"], first["pages"][1]["score"])
+        # No new analyses; /page-5 was skipped on its sitemap lastmod alone
+        self.assertEqual(PageAnalysis.objects.count(), PAGE_COUNT - 1)
+        self.assertNotIn("/page-5", SiteHandler.hits)
+        self.assertIn("/page-1", SiteHandler.hits)
+
+    def test_unchanged_content_hash_without_etag(self):
+        crawl_site_from_sitemap(self.base_url + "/", incremental=True)
+        Page.objects.update(etag="")
+
+        second = crawl_site_from_sitemap(self.base_url + "/", incremental=True)
+        self.assertEqual(second["pages_unchanged"], PAGE_COUNT - 1)
+        self.assertEqual(PageAnalysis.objects.count(), PAGE_COUNT - 1)
+        # The ETag from the 200 response is stored again
+        self.assertEqual(
+            Page.objects.get(url=f"{self.base_url}/page-2").etag, '"/page-2-v1"'
+        )
@@ -0,0 +1,75 @@
+from django.test import TestCase
+
+from seo_app.services.analyzer_advanced import run_advanced_rules
+from seo_app.services.crawler import parse_page
+from seo_app.services.document import ParsedDocument
+
+SAMPLE_HTML = """
+<html>
+<head>
+  <title>Example product page for testing</title>
+  <meta name="Description" content="A short description of the example product.">
+  <meta name="viewport" content="width=device-width">
+  <meta property="og:title" content="Example">
+  <meta property="og:image" content="/og.png">
+  <meta property="og:description" content="OG description">
+  <script type="application/ld+json">{"@type": "Product"}</script>
+</head>
+<body>
+  <h1>Example product</h1>
+  <h2>Details</h2>
+  <img src="/a.png" alt="A">
+  <img src="b.png">
+  <a href="/about">About</a>
+  <a href="/404-page">Old</a>
+  <main><p>Some product copy that is long enough to count as main content.</p></main>
+</body>
+</html>
+"""
+
+
+class ParsedDocumentTests(TestCase):
+
+    def test_indexes(self):
+        doc = ParsedDocument(SAMPLE_HTML, base_url="https://example.com/p/")
+        self.assertIsNotNone(doc.meta_name("description"))
+        self.assertIsNotNone(doc.meta_property("og:image"))
+        self.assertEqual(len(doc.headings["h1"]), 1)
+        self.assertEqual(len(doc.links), 2)
+        self.assertEqual(len(doc.scripts_of_type("application/ld+json")), 1)
+
+    def test_shared_document_matches_string_input(self):
+        url = "https://example.com/p/"
+        doc = ParsedDocument(SAMPLE_HTML, base_url=url)
+        from_doc = parse_page(SAMPLE_HTML, base_url=url, doc=doc)
+        from_html = parse_page(SAMPLE_HTML, base_url=url)
+        self.assertEqual(from_doc, from_html)
+        self.assertEqual(from_doc["images"][1]["src"], "https://example.com/p/b.png")
+
+        self.assertEqual(
+            run_advanced_rules(from_doc, html=SAMPLE_HTML, base_url=url, doc=doc),
+            run_advanced_rules(from_html, html=SAMPLE_HTML, base_url=url),
+        )
+
+
+class MainContentTests(TestCase):
+
+    def test_link_heavy_block_loses_to_copy(self):
+        links = " ".join(f"<a href='/c{i}'>Category number {i}</a>" for i in range(40))
+        copy = " ".join(["Useful product copy sentence."] * 20)
+        html = (
+            "<html><body>"
+            f"<div id='menu'>{links}</div>"
+            f"<section id='copy'><p>{copy}</p></section>"
+            "</body></html>"
+        )
+        parsed = parse_page(html)
+        self.assertTrue(parsed["main_text"].startswith("Useful product copy"))
+        self.assertEqual(parsed["word_count"], 80)
+
+    def test_deeply_nested_layout(self):
+        depth = 3000
+        opening = "".join(f"<div>level {i}" for i in range(depth))
+        html = f"<html><body>{opening}{'</div>' * depth}</body></html>"
+        parsed = parse_page(html)
+        self.assertEqual(parsed["word_count"], depth * 2)
@@ -0,0 +1,34 @@
+from django.test import SimpleTestCase
+
+from seo_app.services.frontier import BloomFilter, CrawlFrontier, SeenURLs
+
+
+class FrontierTests(SimpleTestCase):
+
+    def test_each_url_queued_once(self):
+        frontier = CrawlFrontier()
+        self.assertTrue(frontier.add("https://example.com/a"))
+        self.assertFalse(frontier.add("https://EXAMPLE.com/a#top"))
+        self.assertFalse(frontier.add("http://example.com/a/?utm_source=x"))
+        self.assertTrue(frontier.add("https://example.com/b", depth=1))
+
+        self.assertEqual(frontier.pop(), ("https://example.com/a", 0))
+        self.assertEqual(frontier.pop(), ("https://example.com/b", 1))
+        self.assertFalse(frontier)
+        # Popped URLs stay seen
+        self.assertFalse(frontier.add("https://example.com/a"))
+
+    def test_bloom_backed_seen_set(self):
+        seen = SeenURLs(bloom_capacity=60000)
+        urls = [f"https://example.com/p/{i}" for i in range(50000)]
+        # A Bloom filter may wrongly report a handful of new URLs as seen
+        self.assertGreater(sum(1 for u in urls if seen.add(u)), len(urls) - 50)
+        self.assertTrue(all(u in seen for u in urls[:1000]))
+        self.assertEqual(sum(1 for u in urls if seen.add(u)), 0)
+
+    def test_bloom_false_positive_rate(self):
+        bloom = BloomFilter(10000, error_rate=0.01)
+        for i in range(10000):
+            bloom.add(f"in-{i}")
+        false_positives = sum(1 for i in range(10000) if f"out-{i}" in bloom)
+        self.assertLess(false_positives, 300)
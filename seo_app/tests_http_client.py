@@ -0,0 +1,82 @@
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from urllib3.exceptions import NewConnectionError
+
+from seo_app.services import http_client
+from seo_app.services.crawler import fetch_html
+from seo_app.services.http_client import _HTTPConnection
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        body = f"<html><title>{self.client_address[1]}</title></html>".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class PooledClientTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.port = cls.server.server_address[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        http_client.reset_session()
+        super().tearDownClass()
+
+    def setUp(self):
+        http_client.reset_session()
+
+    def test_connection_is_reused_for_same_host(self):
+        url = f"http://localhost:{self.port}/page"
+        first = fetch_html(url)
+        second = fetch_html(url)
+        self.assertTrue(first["ok"])
+        # The server echoes the client port; same port means same TCP connection
+        self.assertEqual(first["html"], second["html"])
+
+    def test_dns_lookups_are_cached(self):
+        fetch_html(f"http://localhost:{self.port}/a")
+        cached = http_client.dns_cache._entries.get(("localhost", self.port))
+        self.assertIsNotNone(cached)
+
+    def test_session_is_shared(self):
+        self.assertIs(http_client.get_session(), http_client.get_session())
+
+    def test_failed_cached_addresses_are_not_retried_through_urllib3(self):
+        # A port nothing listens on
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        infos = [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("127.0.0.1", port))]
+        http_client.dns_cache._entries[("gone.test", port)] = (float("inf"), infos)
+
+        real_getaddrinfo = socket.getaddrinfo
+
+        def getaddrinfo(host, *args):
+            self.assertNotEqual(host, "gone.test")  # no second lookup
+            return real_getaddrinfo(host, *args)
+
+        conn = _HTTPConnection("gone.test", port, timeout=1)
+        with patch.object(socket, "getaddrinfo", side_effect=getaddrinfo):
+            with self.assertRaises(NewConnectionError):
+                conn._new_conn()
+        self.assertNotIn(("gone.test", port), http_client.dns_cache._entries)
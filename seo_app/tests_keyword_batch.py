@@ -0,0 +1,108 @@
+import json
+import threading
+import time
+
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from seo_app.services.keyword_batch import (
+    dedupe_keywords,
+    iter_bulk_research,
+    parse_keyword_csv,
+)
+from seo_app.services.keyword_research import search_cache
+
+
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "shared": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "keyword-batch-tests",
+        },
+    }
+)
+class KeywordBulkTests(TestCase):
+
+    def setUp(self):
+        caches["shared"].clear()
+        search_cache.clear_local()
+
+    def _records(self, resp):
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["Content-Type"], "application/x-ndjson")
+        return [
+            json.loads(line)
+            for line in b"".join(resp.streaming_content).decode().splitlines()
+        ]
+
+    def test_dedupe_normalizes_and_keeps_order(self):
+        self.assertEqual(
+            dedupe_keywords(["SEO  Tools", "seo tools ", "", "crm", "x" * 501]),
+            ["seo tools", "crm"],
+        )
+
+    def test_parse_csv_uses_keyword_column(self):
+        self.assertEqual(
+            parse_keyword_csv("volume,keyword\n10,seo tools\n20,crm\n"),
+            ["seo tools", "crm"],
+        )
+        self.assertEqual(parse_keyword_csv("seo tools\ncrm\n"), ["seo tools", "crm"])
+
+    def test_cache_hits_streamed_first(self):
+        search_cache.set("crm", {"keyword": "crm", "search_volume": 1}, 60)
+        resp = self.client.post(
+            "/api/keywords/bulk/",
+            {"keywords": ["Best SEO tools", "crm", "best seo tools"]},
+            content_type="application/json",
+        )
+        records = self._records(resp)
+
+        self.assertEqual(records[0], {**records[0], "total": 2, "cached": 1})
+        self.assertEqual(records[1]["keyword"], "crm")
+        self.assertTrue(records[1]["cached"])
+        self.assertEqual(records[2]["keyword"], "best seo tools")
+        self.assertFalse(records[2]["cached"])
+        self.assertIn("search_volume", records[2]["data"])
+        self.assertEqual(records[-1]["type"], "done")
+        self.assertEqual(records[-1]["researched"], 1)
+
+    def test_csv_upload(self):
+        upload = SimpleUploadedFile(
+            "keywords.csv", b"keyword\nseo audit\nseo audit\nlink building\n"
+        )
+        records = self._records(
+            self.client.post("/api/keywords/bulk/", {"file": upload})
+        )
+        keywords = sorted(r["keyword"] for r in records if r["type"] == "keyword")
+        self.assertEqual(keywords, ["link building", "seo audit"])
+
+    def test_missing_keywords(self):
+        resp = self.client.post(
+            "/api/keywords/bulk/", {"keywords": []}, content_type="application/json"
+        )
+        self.assertEqual(resp.status_code, 400)
+
+    def test_lookups_bounded_by_worker_count(self):
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        class Researcher:
+            serpapi_key = ""
+
+            def search_keywords(self, keyword):
+                with lock:
+                    active.append(keyword)
+                    peak.append(len(active))
+                time.sleep(0.02)
+                with lock:
+                    active.remove(keyword)
+                return {"keyword": keyword}
+
+        keywords = [f"keyword {i}" for i in range(12)]
+        records = list(iter_bulk_research(keywords, Researcher(), workers=3))
+
+        self.assertEqual(len([r for r in records if r["type"] == "keyword"]), 12)
+        self.assertLessEqual(max(peak), 3)
@@ -0,0 +1,65 @@
+from django.test import SimpleTestCase
+
+from seo_app.services.keyword_classifier import (
+    match_rules,
+    match_rules_batch,
+    score_keyword,
+    score_keywords,
+)
+from seo_app.services.keyword_research import KeywordResearcher
+
+
+class KeywordClassifierTests(SimpleTestCase):
+
+    def test_intent_order(self):
+        self.assertEqual(score_keyword("buy running shoes")["intent"], "transactional")
+        self.assertEqual(score_keyword("gmail login")["intent"], "navigational")
+        self.assertEqual(score_keyword("best crm reviews")["intent"], "commercial")
+        self.assertEqual(score_keyword("what is seo")["intent"], "informational")
+
+    def test_terms_match_whole_words_and_plurals(self):
+        # "in" no longer fires inside "marketing", nor "app" inside "apple"
+        self.assertNotIn("local", match_rules("email marketing"))
+        self.assertNotIn("intent_navigational", match_rules("apple pie"))
+        self.assertIn("cpc_software", match_rules("seo tools"))
+        self.assertIn("local", match_rules("plumbers in  boston"))
+
+    def test_only_longer_nouns_match_plurals(self):
+        self.assertNotIn("local", match_rules("ins and outs"))
+        self.assertNotIn("volume_local", match_rules("ins and outs"))
+        self.assertNotIn("intent_commercial", match_rules("vses"))
+        self.assertNotIn("intent_transactional", match_rules("buyes"))
+        self.assertIn("intent_transactional", match_rules("coupons"))
+        self.assertIn("intent_commercial", match_rules("crm reviews"))
+
+    def test_phrase_implies_contained_terms(self):
+        rules = match_rules("best price laptops")
+        self.assertIn("hard_transactional", rules)
+        self.assertIn("volume_informational", rules)  # via "best"
+
+    def test_batch_matches_single_keyword_results(self):
+        keywords = ["Best SEO tools", "", "car insurance near me", "İstanbul hotels"]
+        self.assertEqual(
+            match_rules_batch(keywords), [match_rules(k) for k in keywords]
+        )
+        self.assertEqual(score_keywords(keywords), [score_keyword(k) for k in keywords])
+
+    def test_batch_phrases_do_not_span_keywords(self):
+        keywords = ["running shoes best", "price comparison", "learn how", "to cook"]
+        self.assertEqual(
+            match_rules_batch(keywords), [match_rules(k) for k in keywords]
+        )
+        self.assertEqual(score_keywords(keywords), [score_keyword(k) for k in keywords])
+
+    def test_researcher_uses_classifier(self):
+        researcher = KeywordResearcher()
+        scores = score_keyword("mortgage lawyer")
+        self.assertEqual(researcher._estimate_cpc("mortgage lawyer"), scores["cpc"])
+        self.assertEqual(
+            researcher._calculate_keyword_difficulty("mortgage lawyer"),
+            scores["keyword_difficulty"],
+        )
+        self.assertEqual(
+            researcher._heuristic_search_volume("mortgage lawyer"),
+            scores["search_volume"],
+        )
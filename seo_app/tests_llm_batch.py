@@ -0,0 +1,75 @@
+import json
+
+from django.test import SimpleTestCase
+
+from seo_app.services.llm_batch import (
+    build_batch_prompt,
+    generate_batch,
+    parse_batch_response,
+)
+
+
+def _extract(text):
+    # stand-in for the provider modules' _extract_json_from_text
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+def _entry(page_id, title):
+    return {
+        "page_id": page_id,
+        "improved_title": title,
+        "improved_meta_description": "meta",
+        "improved_h1": "h1",
+        "seo_summary": "summary",
+        "suggestions": ["one"],
+    }
+
+
+class BatchPromptTests(SimpleTestCase):
+
+    def test_prompt_lists_every_page(self):
+        prompt = build_batch_prompt(
+            {"1": {"title": "Alpha", "issues": ["Missing H1"]}, "2": {"title": "Beta"}}
+        )
+        self.assertIn("PAGE_ID: 1\nTITLE: Alpha", prompt)
+        self.assertIn("ISSUES: Missing H1", prompt)
+        self.assertIn("PAGE_ID: 2\nTITLE: Beta", prompt)
+
+    def test_parse_full_reply(self):
+        text = json.dumps({"results": [_entry("1", "A"), _entry("2", "B")]})
+        results = parse_batch_response(text, ["1", "2"], _extract)
+        self.assertEqual(results["2"]["improved_title"], "B")
+        self.assertNotIn("page_id", results["1"])
+
+    def test_truncated_reply_keeps_complete_entries(self):
+        text = json.dumps({"results": [_entry("1", "A"), _entry("2", "B")]})
+        cut = text[: text.index('"improved_h1"', text.index('"page_id": "2"'))]
+        results = parse_batch_response(cut, ["1", "2"], _extract)
+        self.assertEqual(list(results), ["1"])
+
+    def test_unknown_and_partial_items_are_normalized_or_dropped(self):
+        text = json.dumps(
+            [{"page_id": "9", "seo_summary": "x"}, {"page_id": "1", "seo_summary": "y"}]
+        )
+        results = parse_batch_response(text, ["1"], _extract)
+        self.assertEqual(results["1"]["suggestions"], [])
+        self.assertEqual(list(results), ["1"])
+
+    def test_generate_batch_falls_back_per_page(self):
+        prompts = []
+
+        def call(prompt, max_tokens):
+            prompts.append(prompt)
+            return json.dumps({"results": [_entry("1", "A")]})
+
+        pages = {101: {"title": "a"}, 102: {"title": "b"}}
+        results = generate_batch(
+            pages, call, _extract, single=lambda parsed: {"single": parsed["title"]}
+        )
+
+        self.assertEqual(len(prompts), 1)
+        self.assertEqual(results[101]["improved_title"], "A")
+        self.assertEqual(results[102], {"single": "b"})
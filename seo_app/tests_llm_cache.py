@@ -0,0 +1,71 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from seo_app.models import PageAnalysis
+from seo_app.services.analysis_cache import analysis_cache
+from seo_app.services.llm_cache import llm_input_hash
+from seo_app.services.llm_health import reset_breakers
+from seo_app.views import audit_views
+
+URL = "https://example.com/llm"
+
+
+def _fetch(title):
+    html = f"<html><head><title>{title}</title></head><body><h1>Hi</h1></body></html>"
+    return {"ok": True, "url": URL, "status_code": 200, "html": html, "error": None}
+
+
+class SuggestionCacheTests(TestCase):
+
+    def setUp(self):
+        analysis_cache.clear()
+        reset_breakers()
+        self.client = APIClient()
+        self.llm = patch.object(
+            audit_views,
+            "generate_suggestions",
+            side_effect=lambda parsed, **kwargs: {
+                "ok": True,
+                "seo_summary": parsed["title"],
+            },
+        ).start()
+        patch.object(audit_views, "default_provider", return_value="gemini").start()
+        self.addCleanup(patch.stopall)
+
+    def _analyze(self, title="First title", path="/api/analyze/", **data):
+        with patch.object(
+            audit_views, "fetch_html", return_value=_fetch(title)
+        ), patch.object(audit_views, "run_advanced_rules", return_value=(50, [], [])):
+            return self.client.post(path, {"url": URL, **data}, format="json").json()
+
+    def test_hash_covers_prompt_inputs(self):
+        parsed = {"title": "a", "h1": ["x"], "issues": ["Missing H1"]}
+        self.assertEqual(llm_input_hash(parsed), llm_input_hash(dict(parsed)))
+        self.assertNotEqual(
+            llm_input_hash(parsed), llm_input_hash({**parsed, "issues": []})
+        )
+
+    def test_unchanged_inputs_reuse_suggestions(self):
+        first = self._analyze()
+        second = self._analyze()
+
+        self.assertEqual(self.llm.call_count, 1)
+        self.assertTrue(second["llm_cached"])
+        self.assertEqual(second["llm_suggestions"], first["llm_suggestions"])
+        latest = PageAnalysis.objects.latest("id")
+        self.assertEqual(latest.llm_suggestions, first["llm_suggestions"])
+
+    def test_changed_inputs_and_force_llm_call_again(self):
+        self._analyze()
+        self._analyze(title="Second title")
+        self.assertEqual(self.llm.call_count, 2)
+        self._analyze(title="Second title", force_llm=True)
+        self.assertEqual(self.llm.call_count, 3)
+
+    def test_fallback_is_not_reused(self):
+        self.llm.side_effect = ValueError("quota")
+        self._analyze()
+        self._analyze()
+        self.assertEqual(self.llm.call_count, 2)
@@ -0,0 +1,153 @@
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from seo_app.services.llm_dispatch import LLMDispatcher, bucket_for
+from seo_app.services.llm_health import CircuitBreaker
+from seo_app.services.rate_limit import TokenBucket
+
+
+class TokenBucketTests(SimpleTestCase):
+
+    def test_burst_then_wait(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+        self.assertEqual(bucket.try_acquire(), 0)
+        self.assertEqual(bucket.try_acquire(), 0)
+        wait = bucket.try_acquire()
+        self.assertGreater(wait, 0)
+        self.assertLessEqual(wait, 0.1)
+
+    def test_zero_rate_is_unlimited(self):
+        bucket = TokenBucket(rate=0)
+        self.assertTrue(all(bucket.try_acquire() == 0 for _ in range(100)))
+
+    def test_dispatchers_share_their_providers_bucket(self):
+        first = LLMDispatcher(dict, breaker=CircuitBreaker("bucket-test"))
+        second = LLMDispatcher(dict, breaker=CircuitBreaker("bucket-test"))
+        other = LLMDispatcher(dict, breaker=CircuitBreaker("other-bucket-test"))
+        for dispatcher in (first, second, other):
+            dispatcher.shutdown()
+
+        self.assertIs(first.bucket, second.bucket)
+        self.assertIs(first.bucket, bucket_for("bucket-test"))
+        self.assertIsNot(first.bucket, other.bucket)
+
+
+class LLMDispatcherTests(SimpleTestCase):
+
+    def test_in_flight_limit(self):
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0}
+
+        def suggest(parsed):
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.02)
+            with lock:
+                state["running"] -= 1
+            return {"ok": True, "n": parsed["n"]}
+
+        dispatcher = LLMDispatcher(suggest, max_in_flight=3, bucket=TokenBucket(rate=0))
+        for n in range(12):
+            dispatcher.submit(n, {"n": n})
+        results = dict(dispatcher.wait(timeout=5))
+        dispatcher.shutdown()
+
+        self.assertEqual(results, {n: {"ok": True, "n": n} for n in range(12)})
+        self.assertEqual(state["peak"], 3)
+        self.assertEqual(dispatcher.outstanding, 0)
+
+    def test_retries_then_reports_error(self):
+        calls = []
+
+        def flaky(parsed):
+            calls.append(parsed["n"])
+            if parsed["n"] == 0 and calls.count(0) < 3:
+                raise ValueError("429 rate limited")
+            if parsed["n"] == 1:
+                raise ValueError("bad key")
+            return {"ok": True}
+
+        dispatcher = LLMDispatcher(
+            flaky,
+            bucket=TokenBucket(rate=0),
+            max_retries=2,
+            backoff_base=0.01,
+            backoff_max=0.02,
+        )
+        dispatcher.submit(0, {"n": 0})
+        dispatcher.submit(1, {"n": 1})
+        results = dict(dispatcher.wait(timeout=5))
+        dispatcher.shutdown()
+
+        self.assertEqual(results[0], {"ok": True})
+        self.assertEqual(results[1], {"ok": False, "error": "bad key"})
+        self.assertEqual(calls.count(1), 3)
+
+    def test_rate_limited_calls_are_deferred(self):
+        dispatcher = LLMDispatcher(
+            lambda parsed: {"ok": True}, bucket=TokenBucket(rate=50, capacity=1)
+        )
+        started = time.monotonic()
+        for n in range(4):
+            dispatcher.submit(n, {})
+        self.assertEqual(len(list(dispatcher.wait(timeout=5))), 4)
+        dispatcher.shutdown()
+        # one call from the burst, three more at 50/s
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+
+    def test_one_scheduler_thread_releases_queued_calls(self):
+        dispatcher = LLMDispatcher(
+            lambda parsed: {"ok": True}, bucket=TokenBucket(rate=200, capacity=1)
+        )
+        before = threading.active_count()
+        for n in range(20):
+            dispatcher.submit(n, {})
+        # the scheduler plus at most the pool's workers, not a thread per page
+        self.assertLessEqual(threading.active_count() - before, 1 + 4)
+        self.assertEqual(len(list(dispatcher.wait(timeout=5))), 20)
+        dispatcher.shutdown()
+
+    def test_shutdown_drops_queued_calls_from_outstanding(self):
+        dispatcher = LLMDispatcher(
+            lambda parsed: {"ok": True}, bucket=TokenBucket(rate=0.01, capacity=1)
+        )
+        for n in range(5):
+            dispatcher.submit(n, {})
+        dispatcher.shutdown()
+
+        started = time.monotonic()
+        results = list(dispatcher.wait(timeout=5))
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertLessEqual(len(results), 1)
+        self.assertEqual(dispatcher.outstanding, 0)
+
+    def test_batched_calls_with_single_page_retry(self):
+        batches, singles = [], []
+
+        def suggest_batch(pages):
+            batches.append(sorted(pages))
+            # the reply leaves out one page
+            return {key: {"ok": True} for key in pages if key != 3}
+
+        def suggest(parsed):
+            singles.append(parsed["n"])
+            return {"ok": True, "single": True}
+
+        dispatcher = LLMDispatcher(
+            suggest,
+            bucket=TokenBucket(rate=0),
+            suggest_batch=suggest_batch,
+            batch_size=4,
+        )
+        for n in range(6):
+            dispatcher.submit(n, {"n": n})
+        results = dict(dispatcher.wait(timeout=5))
+        dispatcher.shutdown()
+
+        self.assertEqual(sorted(batches), [[0, 1, 2, 3], [4, 5]])
+        self.assertEqual(singles, [3])
+        self.assertEqual(results[3], {"ok": True, "single": True})
+        self.assertEqual(len(results), 6)
@@ -0,0 +1,88 @@
+import time
+
+from django.test import SimpleTestCase
+
+from seo_app.services.llm_dispatch import LLMDispatcher
+from seo_app.services.llm_health import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    guarded_call,
+)
+from seo_app.services.rate_limit import TokenBucket
+
+PARSED = {"title": "T", "issues": ["Missing meta description"]}
+
+
+def failing(parsed):
+    raise ValueError("503 unavailable")
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker("test", failure_threshold=2, cooldown=60)
+        calls = []
+
+        def generate(parsed):
+            calls.append(1)
+            return failing(parsed)
+
+        for _ in range(5):
+            out, from_llm = guarded_call(breaker, generate, PARSED)
+            self.assertFalse(from_llm)
+            self.assertTrue(out["fallback"])
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(breaker.state, OPEN)
+        self.assertEqual(breaker.short_circuited, 3)
+
+    def test_half_open_probe_closes_or_reopens(self):
+        breaker = CircuitBreaker("test", failure_threshold=1, cooldown=0.01)
+        guarded_call(breaker, failing, PARSED)
+        self.assertEqual(breaker.state, OPEN)
+
+        time.sleep(0.02)
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertFalse(breaker.allow())  # one probe at a time
+        breaker.record_failure("still down")
+        self.assertEqual(breaker.state, OPEN)
+
+        time.sleep(0.02)
+        out, from_llm = guarded_call(breaker, lambda p: {"seo_summary": "ok"}, PARSED)
+        self.assertTrue(from_llm)
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_slow_calls_count_as_failures(self):
+        breaker = CircuitBreaker("test", failure_threshold=2, latency_slo=0.5)
+        breaker.record_success(latency=2.0)
+        breaker.record_success(latency=2.0)
+        self.assertEqual(breaker.state, OPEN)
+
+    def test_error_results_count_as_failures(self):
+        breaker = CircuitBreaker("test", failure_threshold=1)
+        out, _ = guarded_call(
+            breaker, lambda p: {"ok": False, "error": "no key"}, PARSED
+        )
+        self.assertTrue(out["fallback"])
+        self.assertEqual(breaker.last_error, "no key")
+        self.assertEqual(breaker.state, OPEN)
+
+    def test_dispatcher_skips_calls_while_open(self):
+        breaker = CircuitBreaker("test", failure_threshold=1, cooldown=60)
+        breaker.record_failure("down")
+        calls = []
+        dispatcher = LLMDispatcher(
+            lambda parsed: calls.append(1) or {"ok": True},
+            bucket=TokenBucket(rate=0),
+            breaker=breaker,
+        )
+        for n in range(3):
+            dispatcher.submit(n, PARSED)
+        results = dict(dispatcher.wait(timeout=5))
+        dispatcher.shutdown()
+
+        self.assertEqual(calls, [])
+        self.assertTrue(all(r["fallback"] for r in results.values()))
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import SimpleTestCase
+
+from seo_app.services.llm_prompts import JSONObjectDetector
+from seo_app.services.llm_providers import LocalProvider
+
+REPLY = {
+    "improved_title": "Better {title}",
+    "improved_meta_description": "meta",
+    "improved_h1": "h1",
+    "seo_summary": "summary",
+    "suggestions": ["Add a meta description"],
+}
+# Sent after the JSON object; a provider that reads the whole reply waits for it
+TRAILER_DELAY = 1.0
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    """OpenAI-compatible chat completions endpoint that streams REPLY."""
+
+    def log_message(self, *args):
+        pass
+
+    def _event(self, payload):
+        self.wfile.write(f"data: {payload}\n\n".encode())
+        self.wfile.flush()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(body)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+
+        text = self.server.reply_text or "```json\n" + json.dumps(REPLY) + "\n```"
+        try:
+            for i in range(0, len(text), 16):
+                delta = {"choices": [{"delta": {"content": text[i : i + 16]}}]}
+                self._event(json.dumps(delta))
+            time.sleep(TRAILER_DELAY)
+            self._event("[DONE]")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client stopped reading early
+
+
+class LocalProviderTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubLLMHandler)
+        cls.server.requests = []
+        cls.server.reply_text = None
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        port = cls.server.server_address[1]
+        cls.provider = LocalProvider(base_url=f"http://127.0.0.1:{port}/v1")
+        cls.provider.setup()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def test_stops_reading_at_complete_json(self):
+        started = time.monotonic()
+        out = self.provider.generate_suggestions({"title": "Home"}, max_tokens=123)
+
+        self.assertLess(time.monotonic() - started, TRAILER_DELAY)
+        self.assertEqual(out["suggestions"], REPLY["suggestions"])
+        self.assertEqual(self.server.requests[-1]["max_tokens"], 123)
+        self.assertTrue(self.server.requests[-1]["stream"])
+        self.assertGreaterEqual(self.provider.stats()["early_stops"], 1)
+
+    def test_async_generation(self):
+        async def run():
+            return await asyncio.gather(
+                self.provider.agenerate_suggestions({"title": "A"}),
+                self.provider.agenerate_suggestions({"title": "B"}),
+            )
+
+        started = time.monotonic()
+        results = asyncio.run(run())
+        self.assertLess(time.monotonic() - started, TRAILER_DELAY)
+        self.assertEqual([r["improved_h1"] for r in results], ["h1", "h1"])
+
+    def test_batch_reply_may_be_a_bare_array(self):
+        items = [{**REPLY, "page_id": str(i)} for i in (1, 2, 3)]
+        self.server.reply_text = json.dumps(items)
+        self.addCleanup(setattr, self.server, "reply_text", None)
+
+        pages = {key: {"title": key} for key in ("a", "b", "c")}
+        out = self.provider.generate_suggestions_batch(pages, fallback=False)
+        self.assertEqual(sorted(out), ["a", "b", "c"])
+
+    def test_unreachable_server_is_an_error_result(self):
+        provider = LocalProvider(base_url="http://127.0.0.1:9/v1", timeout=1)
+        provider.setup()
+        out = provider.generate_suggestions({"title": "x"}, max_retries=0)
+        self.assertIs(out["ok"], False)
+
+
+class JSONObjectDetectorTests(SimpleTestCase):
+
+    def test_braces_inside_strings(self):
+        detector = JSONObjectDetector()
+        chunks = ['noise {"a": "}{", "b": {"c', '": "\\"}"}}', " trailing {"]
+        done = [detector.feed(c) for c in chunks]
+        self.assertEqual(done, [False, True, True])
+        self.assertEqual(json.loads(detector.text), {"a": "}{", "b": {"c": '"}'}})
+
+    def test_incomplete_object(self):
+        detector = JSONObjectDetector()
+        self.assertFalse(detector.feed('{"a": [1, 2'))
+        self.assertEqual(detector.text, '{"a": [1, 2')
@@ -0,0 +1,110 @@
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from seo_app.services import analyzer_gemini, llm_providers, llm_registry
+from seo_app.services.llm_providers import GeminiProvider, LLMProvider, OpenAIProvider
+
+IMPORT_CHECK = """
+import os, sys
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+import django
+django.setup()
+import seo_app.urls
+print(sorted(m for m in sys.modules if m.startswith(("openai", "google.generativeai",
+      "seo_app.services.analyzer_gemini", "seo_app.services.analyzer_llm"))))
+"""
+
+
+class LLMRegistryTests(SimpleTestCase):
+
+    def setUp(self):
+        llm_registry.reset()
+        self.addCleanup(llm_registry.reset)
+
+    def test_url_conf_does_not_import_llm_sdks(self):
+        out = subprocess.run(
+            [sys.executable, "-c", IMPORT_CHECK],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.assertEqual(out.stdout.strip().splitlines()[-1], "[]")
+
+    def test_provider_set_up_once_with_metrics(self):
+        setups = []
+
+        class FakeProvider(LLMProvider):
+            name = "fake"
+
+            def setup(self):
+                setups.append(self.name)
+
+        class BrokenProvider(LLMProvider):
+            def setup(self):
+                setups.append("gone")
+                raise ImportError("x")
+
+        with patch.dict(
+            llm_registry.PROVIDER_CLASSES,
+            {"fake": FakeProvider, "gone": BrokenProvider},
+        ):
+            self.assertEqual(llm_registry.default_provider(["gone", "fake"]), "fake")
+            self.assertEqual(llm_registry.default_provider(["gone", "fake"]), "fake")
+        self.assertEqual(setups, ["gone", "fake"])
+
+        metrics = llm_registry.import_metrics()
+        self.assertTrue(metrics["fake"]["loaded"])
+        self.assertEqual(metrics["fake"]["calls"]["calls"], 0)
+        self.assertFalse(metrics["gone"]["loaded"])
+        self.assertEqual(metrics["gone"]["error"], "x")
+        self.assertIsNone(
+            llm_registry.provider_function("gone", "generate_suggestions")
+        )
+
+    def test_each_provider_reads_its_own_model_setting(self):
+        env = {"GEMINI_MODEL": "gemini-2.0-flash", "OPENAI_MODEL": "gpt-4.1-mini"}
+        with patch.dict("os.environ", env):
+            self.assertEqual(GeminiProvider().model, "gemini-2.0-flash")
+            self.assertEqual(OpenAIProvider().model, "gpt-4.1-mini")
+
+        # The old shared LLM_MODEL still configures Gemini, never OpenAI
+        env = {"LLM_MODEL": "gemini-2.5-pro"}
+        with patch.dict("os.environ", env), patch.object(
+            llm_providers, "_legacy_warned", set()
+        ), self.assertLogs(level="WARNING"):
+            for name in ("GEMINI_MODEL", "OPENAI_MODEL"):
+                os.environ.pop(name, None)
+            self.assertEqual(GeminiProvider().model, "gemini-2.5-pro")
+            self.assertEqual(OpenAIProvider().model, OpenAIProvider.default_model)
+
+        class FakeProvider(LLMProvider):
+            name = "fake"
+            default_model = "fake-1"
+
+        with patch.dict(llm_registry.PROVIDER_CLASSES, {"fake": FakeProvider}):
+            self.assertEqual(llm_registry.provider_model("fake"), "fake-1")
+        self.assertEqual(llm_registry.provider_model(None), "")
+
+    def test_legacy_wrappers_use_the_registry_provider(self):
+        setups = []
+
+        class FakeGemini(LLMProvider):
+            name = "gemini"
+
+            def setup(self):
+                setups.append(self.name)
+
+            def stream(self, prompt, max_tokens, temperature):
+                yield '{"improved_title": "t", "suggestions": ["s"]}'
+
+        with patch.dict(llm_registry.PROVIDER_CLASSES, {"gemini": FakeGemini}):
+            out = analyzer_gemini.generate_suggestions({"title": "x"})
+            provider = llm_registry.load_provider("gemini")
+            analyzer_gemini.generate_suggestions({"title": "y"})
+        self.assertEqual(out["suggestions"], ["s"])
+        self.assertEqual(setups, ["gemini"])
+        self.assertEqual(provider.stats()["calls"], 2)
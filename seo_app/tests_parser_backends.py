@@ -0,0 +1,76 @@
+from unittest import skipUnless
+
+from bs4.builder import builder_registry
+from django.test import TestCase
+
+from seo_app.services.crawler import parse_page
+from seo_app.services.document import get_parser_features
+
+PARITY_FIELDS = ("title", "meta_description", "h1", "h2", "h3", "images", "word_count")
+
+LONG_COPY = " ".join(["Lorem ipsum dolor sit amet consectetur."] * 60)
+
+# Each entry is (name, html). Cover well-formed pages plus the kind of sloppy
+# markup real sites ship: unclosed tags, missing head/body, uppercase tags,
+# entities, lazy-loaded images and og-only descriptions.
+PARITY_CORPUS = [
+    (
+        "well_formed",
+        f"""<!DOCTYPE html>
+<html lang="en"><head>
+<title>Buy running shoes online | Example Store</title>
+<meta name="description" content="Shop the latest running shoes with free shipping.">
+</head><body>
+<h1>Running shoes</h1><h2>Road</h2><h2>Trail</h2><h3>Sizing</h3>
+<img src="/img/shoe.jpg" alt="Blue running shoe"><img src="thumb.png" alt="">
+<main><p>{LONG_COPY}</p></main>
+</body></html>""",
+    ),
+    (
+        "unclosed_tags",
+        f"""<html><head><title>Unclosed  paragraphs
+</title></head><body>
+<h1>Heading <b>bold</h1>
+<div><p>First paragraph<p>Second paragraph {LONG_COPY}
+<img src=/a.png alt=A><img data-src="/lazy.png">
+</div></body></html>""",
+    ),
+    (
+        "no_head_or_body",
+        f"""<title>Fragment page</title>
+<meta property="og:description" content="Only an OG description is present here.">
+<h1>Fragment</h1><section><p>{LONG_COPY}</p></section>""",
+    ),
+    (
+        "uppercase_and_entities",
+        f"""<HTML><HEAD><TITLE>Caf&eacute; &amp; Bar &mdash; Menu</TITLE>
+<META NAME="DESCRIPTION" CONTENT="Fresh coffee &amp; pastries every morning.">
+</HEAD><BODY><H1>Caf&eacute;</H1><H1>Second H1</H1>
+<ARTICLE><P>{LONG_COPY}</P></ARTICLE></BODY></HTML>""",
+    ),
+    (
+        "thin_page",
+        """<html><head><title>Hi</title></head>
+<body><h2>No h1 here</h2><div>Short text.</div></body></html>""",
+    ),
+    (
+        "empty",
+        "",
+    ),
+]
+
+
+class ParserBackendTests(TestCase):
+
+    def test_unknown_backend_falls_back_to_html_parser(self):
+        self.assertEqual(get_parser_features("no-such-parser"), "html.parser")
+
+    @skipUnless(builder_registry.lookup("lxml"), "lxml is not installed")
+    def test_lxml_matches_python_backend(self):
+        base_url = "https://example.com/shop/"
+        for name, html in PARITY_CORPUS:
+            with self.subTest(page=name):
+                python_res = parse_page(html, base_url=base_url, backend="python")
+                lxml_res = parse_page(html, base_url=base_url, backend="lxml")
+                for field in PARITY_FIELDS:
+                    self.assertEqual(python_res[field], lxml_res[field], field)
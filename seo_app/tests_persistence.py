@@ -0,0 +1,102 @@
+import time
+
+from django.test import TestCase
+
+from seo_app.models import AuditHistory, Page, PageAnalysis
+from seo_app.services.crawl_engine import CrawlResult
+from seo_app.services.persistence import CrawlResultWriter, resolve_pages
+
+
+def _result(i: int, url: str = None) -> CrawlResult:
+    url = url or f"https://example.com/page-{i}"
+    return CrawlResult(
+        index=i,
+        url=url,
+        fetch={"url": url, "status_code": 200, "html": ""},
+        parsed={"title": f"Page {i}", "h1": [f"Page {i}"], "word_count": 10},
+        score=80,
+        breakdown=[("title", 10)],
+        issues=["Missing meta description", "Thin content"],
+    )
+
+
+class CrawlResultWriterTests(TestCase):
+
+    def test_batch_is_written_with_bulk_queries(self):
+        writer = CrawlResultWriter(batch_size=10, max_delay=60)
+        for i in range(9):
+            self.assertEqual(writer.add(_result(i)), [])
+
+        # savepoint, page lookup/insert/re-read, analyses, history, release
+        with self.assertNumQueries(7):
+            flushed = writer.add(_result(9))
+
+        self.assertEqual([i for i, _ in flushed], list(range(10)))
+        self.assertEqual(flushed[0][1]["status"], "success")
+        self.assertEqual(Page.objects.count(), 10)
+        self.assertEqual(PageAnalysis.objects.count(), 10)
+        history = AuditHistory.objects.get(page__url="https://example.com/page-0")
+        self.assertEqual(history.critical_issues, 1)
+
+    def test_poll_flushes_partial_batch_after_max_delay(self):
+        writer = CrawlResultWriter(batch_size=10, max_delay=0.05)
+        self.assertEqual(writer.add(_result(0)), [])
+        self.assertEqual(writer.poll(), [])
+
+        time.sleep(0.06)
+        self.assertEqual([i for i, _ in writer.poll()], [0])
+        self.assertEqual(PageAnalysis.objects.count(), 1)
+
+    def test_same_day_history_is_upserted(self):
+        writer = CrawlResultWriter(batch_size=100)
+        writer.add(_result(0))
+        writer.flush()
+        again = _result(1, url="https://example.com/page-0")
+        again.score = 55
+        writer.add(again)
+        writer.flush()
+
+        self.assertEqual(PageAnalysis.objects.count(), 2)
+        self.assertEqual(AuditHistory.objects.get().score, 55)
+
+    def test_suggestions_are_bulk_updated(self):
+        writer = CrawlResultWriter(
+            batch_size=100,
+            suggest=lambda parsed: {"ok": True, "t": parsed["title"]},
+            model="gpt-4o-mini",
+        )
+        writer.add(_result(0))
+        writer.add(_result(1))
+        writer.close()
+
+        pa = PageAnalysis.objects.get(page__url="https://example.com/page-1")
+        self.assertEqual(pa.llm_suggestions, {"ok": True, "t": "Page 1"})
+        self.assertEqual(pa.llm_model, "gpt-4o-mini")
+        self.assertIsNotNone(pa.llm_generated_at)
+
+    def test_resolve_pages_reuses_existing_rows(self):
+        existing = Page.objects.create(url="https://example.com/a")
+        pages = resolve_pages(["https://example.com/a", "https://example.com/b"])
+        self.assertEqual(pages["https://example.com/a"].pk, existing.pk)
+        self.assertIsNotNone(pages["https://example.com/b"].pk)
+
+    def test_suggestions_reused_for_unchanged_inputs(self):
+        calls = []
+
+        def suggest(parsed):
+            calls.append(parsed["title"])
+            return {"ok": True, "t": parsed["title"]}
+
+        for _ in range(2):
+            writer = CrawlResultWriter(batch_size=100, suggest=suggest)
+            writer.add(_result(0))
+            writer.close()
+        self.assertEqual(calls, ["Page 0"])
+
+        writer = CrawlResultWriter(
+            batch_size=100, suggest=suggest, reuse_suggestions=False
+        )
+        writer.add(_result(0))
+        writer.close()
+        self.assertEqual(calls, ["Page 0", "Page 0"])
+        self.assertTrue(all(pa.llm_suggestions for pa in PageAnalysis.objects.all()))
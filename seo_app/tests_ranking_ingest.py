@@ -0,0 +1,113 @@
+from datetime import date
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+
+from seo_app.models import Domain, Keyword, KeywordRanking
+from seo_app.services.ranking_ingest import ingest_rankings
+
+
+class RankingIngestTests(TestCase):
+
+    def test_upserts_on_domain_keyword_date(self):
+        Keyword.objects.create(keyword="seo tools", search_volume=900)
+        day = date(2024, 5, 1)
+        rows = [
+            {"domain": "example.com", "keyword": "seo tools", "position": 4},
+            {"domain": "example.com", "keyword": "crm", "position": 9, "url": "u"},
+            {"domain": "example.org", "keyword": "seo tools", "position": "2"},
+            {"domain": "", "keyword": "crm", "position": 1},
+            {"domain": "example.com", "keyword": "crm", "position": "n/a"},
+        ]
+
+        result = ingest_rankings(rows, recorded_date=day)
+        self.assertEqual(
+            result,
+            {
+                "upserted": 3,
+                "skipped": 2,
+                "skipped_rows": [
+                    {"row": 3, "reason": "domain and keyword are required"},
+                    {"row": 4, "reason": "position must be a non-negative integer"},
+                ],
+                "domains_created": 2,
+                "keywords_created": 1,
+            },
+        )
+        ranking = KeywordRanking.objects.get(
+            domain__domain="example.com", keyword__keyword="seo tools"
+        )
+        self.assertEqual((ranking.position, ranking.search_volume), (4, 900))
+        self.assertEqual(ranking.recorded_date, day)
+
+        ingest_rankings(
+            [{"domain": "example.com", "keyword": "seo tools", "position": 1}],
+            recorded_date=day,
+        )
+        ranking.refresh_from_db()
+        self.assertEqual(ranking.position, 1)
+        self.assertEqual(KeywordRanking.objects.count(), 3)
+        self.assertEqual(Domain.objects.count(), 2)
+
+    def test_overlong_values_are_skipped_not_fatal(self):
+        rows = [
+            {"domain": "d" * 256, "keyword": "seo", "position": 1},
+            {"domain": "example.com", "keyword": "k" * 501, "position": 1},
+            {
+                "domain": "example.com",
+                "keyword": "crm",
+                "position": 1,
+                "url": "u" * 201,
+            },
+            {"domain": "example.com", "keyword": "seo", "position": 2},
+        ]
+        result = ingest_rankings(rows, recorded_date=date(2024, 5, 1))
+        self.assertEqual((result["upserted"], result["skipped"]), (1, 3))
+        self.assertEqual(
+            [row["reason"] for row in result["skipped_rows"]],
+            [
+                "domain is longer than 255 characters",
+                "keyword is longer than 500 characters",
+                "url is longer than 200 characters",
+            ],
+        )
+        self.assertEqual(KeywordRanking.objects.get().keyword.keyword, "seo")
+
+    def test_bulk_endpoint_accepts_csv(self):
+        upload = SimpleUploadedFile(
+            "rankings.csv",
+            b"Domain,Keyword,Position,URL\n"
+            b"example.com,seo tools,3,https://example.com/a\n"
+            b"example.com,seo audit,7,https://example.com/b\n",
+        )
+        resp = self.client.post(
+            "/api/keywords/track-ranking/bulk/",
+            {"file": upload, "recorded_date": "2024-05-02"},
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["upserted"], 2)
+        self.assertEqual(
+            set(KeywordRanking.objects.values_list("recorded_date", flat=True)),
+            {date(2024, 5, 2)},
+        )
+
+    def test_single_ranking_updates_todays_row(self):
+        for position in (5, 2):
+            resp = self.client.post(
+                "/api/keywords/track-ranking/",
+                {"domain": "example.com", "keyword": "seo", "position": position},
+                content_type="application/json",
+            )
+            self.assertEqual(resp.status_code, 200)
+        ranking = KeywordRanking.objects.get()
+        self.assertEqual(ranking.position, 2)
+        self.assertEqual(ranking.recorded_date, date.today())
+
+    def test_single_ranking_reports_why_it_was_skipped(self):
+        resp = self.client.post(
+            "/api/keywords/track-ranking/",
+            {"domain": "d" * 256, "keyword": "seo", "position": 1},
+            content_type="application/json",
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.json()["error"], "domain is longer than 255 characters")
@@ -0,0 +1,134 @@
+import gzip
+import io
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import SimpleTestCase
+
+from seo_app.services import http_client
+from seo_app.services.sitemap_parser import (
+    fetch_sitemap_entries,
+    iter_sitemap_entries,
+    read_sitemap,
+)
+
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+def _urlset(urls, ns=NS) -> bytes:
+    body = "".join(
+        f"<url><loc>{u}</loc><lastmod>2024-01-0{i % 9 + 1}</lastmod>"
+        f"<priority>0.{i % 9 + 1}</priority><changefreq>daily</changefreq></url>"
+        for i, u in enumerate(urls)
+    )
+    return (
+        f'<?xml version="1.0" encoding="UTF-8"?><urlset {ns}>{body}</urlset>'.encode()
+    )
+
+
+class SitemapHandler(BaseHTTPRequestHandler):
+    """Sitemap index -> plain child and .xml.gz child; also a gzip-encoded urlset."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        host = f"http://{self.headers['Host']}"
+        headers = {"Content-Type": "application/xml"}
+        if self.path == "/sitemap_index.xml":
+            body = (
+                f"<sitemapindex {NS}>"
+                f"<sitemap><loc>{host}/sitemap-a.xml</loc></sitemap>"
+                f"<sitemap><loc>{host}/sitemap-b.xml.gz</loc></sitemap>"
+                "</sitemapindex>"
+            ).encode()
+        elif self.path == "/sitemap-a.xml":
+            body = _urlset([f"{host}/a-{i}" for i in range(3)])
+        elif self.path == "/sitemap-b.xml.gz":
+            body = gzip.compress(_urlset([f"{host}/b-{i}" for i in range(3)]))
+            headers = {"Content-Type": "application/x-gzip"}
+        elif self.path == "/truncated.xml":
+            # Promises the whole body, then drops the connection partway
+            body = _urlset([f"{host}/t-{i}" for i in range(1000)])
+            self.close_connection = True
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body[: len(body) // 2])
+            return
+        elif self.path == "/encoded.xml":
+            body = gzip.compress(_urlset([f"{host}/e-{i}" for i in range(2)], ns=""))
+            headers["Content-Encoding"] = "gzip"
+        else:
+            body, headers = b"not found", {"Content-Type": "text/plain"}
+            self._send(404, body, headers)
+            return
+        self._send(200, body, headers)
+
+    def _send(self, status, body, headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class IterSitemapEntriesTests(SimpleTestCase):
+
+    def test_entries_carry_metadata(self):
+        entries = list(iter_sitemap_entries(io.BytesIO(_urlset(["https://x.com/"]))))
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0].loc, "https://x.com/")
+        self.assertEqual(entries[0].lastmod, "2024-01-01")
+        self.assertEqual(entries[0].priority, 0.1)
+        self.assertEqual(entries[0].changefreq, "daily")
+        self.assertFalse(entries[0].is_sitemap)
+
+    def test_large_sitemap_is_streamed(self):
+        urls = [f"https://x.com/p/{i}" for i in range(50000)]
+        count = sum(1 for _ in iter_sitemap_entries(io.BytesIO(_urlset(urls))))
+        self.assertEqual(count, 50000)
+
+
+class SitemapFetchTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), SitemapHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        http_client.reset_session()
+        super().tearDownClass()
+
+    def test_index_fan_out_with_gzip_child(self):
+        entries = fetch_sitemap_entries(
+            [f"{self.base_url}/missing.xml", f"{self.base_url}/sitemap_index.xml"]
+        )
+        self.assertEqual(
+            [e.loc.rsplit("/", 1)[1] for e in entries],
+            ["a-0", "a-1", "a-2", "b-0", "b-1", "b-2"],
+        )
+
+    def test_max_urls(self):
+        entries = fetch_sitemap_entries(
+            [f"{self.base_url}/sitemap_index.xml"], max_urls=4
+        )
+        self.assertEqual(len(entries), 4)
+
+    def test_body_failing_partway_keeps_entries_read(self):
+        entries = read_sitemap(f"{self.base_url}/truncated.xml", max_urls=2000)
+        self.assertGreater(len(entries), 0)
+        self.assertLess(len(entries), 1000)
+
+    def test_content_encoding_gzip(self):
+        entries = read_sitemap(f"{self.base_url}/encoded.xml")
+        self.assertEqual([e.loc[-3:] for e in entries], ["e-0", "e-1"])
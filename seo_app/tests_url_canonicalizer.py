@@ -0,0 +1,93 @@
+from django.test import SimpleTestCase, TestCase
+
+from seo_app.models import Page
+from seo_app.services.crawler import parse_page
+from seo_app.services.persistence import resolve_pages
+from seo_app.services.url_canonicalizer import (
+    canonicalize_url,
+    dedupe_key,
+    resolve_canonical,
+)
+
+
+class CanonicalizeURLTests(SimpleTestCase):
+
+    def test_canonicalize(self):
+        self.assertEqual(
+            canonicalize_url("HTTPS://Example.COM:443/a?b=2&utm_source=x&a=1#frag"),
+            "https://example.com/a?a=1&b=2",
+        )
+        self.assertEqual(canonicalize_url("http://example.com"), "http://example.com/")
+        self.assertEqual(
+            canonicalize_url("http://example.com:8080/x?gclid=1"),
+            "http://example.com:8080/x",
+        )
+        self.assertEqual(
+            canonicalize_url("https://bücher.example/"),
+            "https://xn--bcher-kva.example/",
+        )
+        self.assertEqual(canonicalize_url("/relative#x"), "/relative")
+
+    def test_query_parameters_keep_their_spelling(self):
+        self.assertEqual(
+            canonicalize_url("https://x.com/p?q=caf%C3%A9+bar&flag&a=&utm_id=1"),
+            "https://x.com/p?a=&flag&q=caf%C3%A9+bar",
+        )
+        self.assertEqual(
+            dedupe_key("https://x.com/p?flag&b=1"),
+            dedupe_key("http://x.com/p?b=1&flag"),
+        )
+
+    def test_custom_strip_params(self):
+        self.assertEqual(
+            canonicalize_url("https://x.com/?ref=a&id=3", strip_params=["ref"]),
+            "https://x.com/?id=3",
+        )
+
+    def test_dedupe_key_folds_scheme_and_trailing_slash(self):
+        self.assertEqual(
+            dedupe_key("http://example.com/blog/"),
+            dedupe_key("https://EXAMPLE.com/blog?utm_medium=mail"),
+        )
+        self.assertNotEqual(
+            dedupe_key("https://example.com/a"), dedupe_key("https://example.com/b")
+        )
+
+    def test_resolve_canonical(self):
+        page = "https://example.com/post?utm_source=x"
+        self.assertEqual(resolve_canonical(page, "/post/"), "https://example.com/post/")
+        self.assertEqual(
+            resolve_canonical(page, "https://www.example.com/post"),
+            "https://www.example.com/post",
+        )
+        # Off-site canonicals are ignored
+        self.assertEqual(
+            resolve_canonical(page, "https://other.com/post"),
+            "https://example.com/post",
+        )
+
+    def test_parse_page_reports_canonical(self):
+        html = '<html><head><link rel="Canonical" href="/main"></head></html>'
+        parsed = parse_page(html, base_url="https://example.com/main?utm_source=a")
+        self.assertEqual(parsed["canonical_url"], "https://example.com/main")
+
+
+class CanonicalPageTests(TestCase):
+
+    def test_get_or_create_uses_canonical_url(self):
+        page, created = Page.objects.get_or_create(
+            url="https://Example.com/a?utm_source=x"
+        )
+        self.assertTrue(created)
+        self.assertEqual(page.url, "https://example.com/a")
+
+        same, created = Page.objects.get_or_create(url="http://example.com/a/")
+        self.assertFalse(created)
+        self.assertEqual(same.pk, page.pk)
+
+    def test_resolve_pages_matches_variants(self):
+        page = Page.objects.create(url="https://example.com/a")
+        pages = resolve_pages(["http://example.com/a/", "https://example.com/b#x"])
+        self.assertEqual(pages["http://example.com/a/"].pk, page.pk)
+        self.assertEqual(pages["https://example.com/b#x"].url, "https://example.com/b")
+        self.assertEqual(Page.objects.count(), 2)
@@ -4,12 +4,17 @@ from .views import (
     analyze_backlinks,
     analyze_competitor,
     analyze_competitor_content,
+    analyze_site_stream,
     analyze_url,
     anchor_texts,
     backlink_audit,
     backlink_growth,
     compare_competitors,
+    crawl_job_results,
+    crawl_job_status,
+    crawl_job_submit,
     get_competitor_strategies,
+    keyword_bulk,
     keyword_compare,
     keyword_difficulty,
     keyword_list,
@@ -19,19 +24,24 @@ from .views import (
     keyword_trends,
     link_gap,
     list_competitors,
+    llm_status,
     top_referrers,
     track_keyword_ranking,
+    track_keyword_rankings_bulk,
     track_serp_positions,
 )
 
 urlpatterns = [
     # Original SEO Audit endpoints
     path("analyze/", analyze_url),
+    path("analyze/stream/", analyze_site_stream, name="analyze_site_stream"),
+    path("llm/status/", llm_status, name="llm_status"),
     # Keyword Research endpoints (Phase 3)
     path("keywords/search/", keyword_search, name="keyword_search"),
     path("keywords/difficulty/", keyword_difficulty, name="keyword_difficulty"),
     path("keywords/related/", keyword_related, name="keyword_related"),
     path("keywords/compare/", keyword_compare, name="keyword_compare"),
+    path("keywords/bulk/", keyword_bulk, name="keyword_bulk"),
     path(
         "keywords/recommendations/",
         keyword_recommendations,
@@ -41,6 +51,11 @@ urlpatterns = [
     path(
         "keywords/track-ranking/", track_keyword_ranking, name="track_keyword_ranking"
     ),
+    path(
+        "keywords/track-ranking/bulk/",
+        track_keyword_rankings_bulk,
+        name="track_keyword_rankings_bulk",
+    ),
     path("keywords/list/", keyword_list, name="keyword_list"),
     # Competitor Analysis endpoints (Phase 4)
     path("competitors/analyze/", analyze_competitor, name="analyze_competitor"),
@@ -64,4 +79,12 @@ urlpatterns = [
     path("backlinks/link-gap/", link_gap, name="backlink_link_gap"),
     path("backlinks/growth/", backlink_growth, name="backlink_growth"),
     path("backlinks/audit/", backlink_audit, name="backlink_audit"),
+    # Background site crawls
+    path("crawl-jobs/", crawl_job_submit, name="crawl_job_submit"),
+    path("crawl-jobs/<int:job_id>/", crawl_job_status, name="crawl_job_status"),
+    path(
+        "crawl-jobs/<int:job_id>/results/",
+        crawl_job_results,
+        name="crawl_job_results",
+    ),
 ]
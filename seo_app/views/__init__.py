@@ -1,5 +1,5 @@
 # seo_app/views/__init__.py
-from .audit_views import analyze_url
+from .audit_views import analyze_url, llm_status
 from .backlink_views import (
     analyze_backlinks,
     anchor_texts,
@@ -16,7 +16,10 @@ from .competitor_views import (
     list_competitors,
     track_serp_positions,
 )
+from .crawl_job_views import crawl_job_results, crawl_job_status, crawl_job_submit
+from .crawl_stream_views import analyze_site_stream
 from .keyword_views import (
+    keyword_bulk,
     keyword_compare,
     keyword_difficulty,
     keyword_list,
@@ -25,17 +28,22 @@ from .keyword_views import (
     keyword_search,
     keyword_trends,
     track_keyword_ranking,
+    track_keyword_rankings_bulk,
 )
 
 __all__ = [
     "analyze_url",
+    "llm_status",
+    "analyze_site_stream",
     "keyword_search",
     "keyword_difficulty",
     "keyword_related",
     "keyword_compare",
+    "keyword_bulk",
     "keyword_recommendations",
     "keyword_trends",
     "track_keyword_ranking",
+    "track_keyword_rankings_bulk",
     "keyword_list",
     "analyze_competitor",
     "compare_competitors",
@@ -49,4 +57,7 @@ __all__ = [
     "link_gap",
     "backlink_growth",
     "backlink_audit",
+    "crawl_job_submit",
+    "crawl_job_status",
+    "crawl_job_results",
 ]
@@ -3,10 +3,9 @@
 SEO Audit Views
 """
 
-import os
 import sys
 import traceback
-from datetime import timedelta
+from functools import partial
 
 from django.utils import timezone
 from rest_framework import status
@@ -14,19 +13,36 @@ from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
 from ..models import AuditHistory, Page, PageAnalysis
+from ..services.analysis_cache import analysis_cache, analysis_key
 from ..services.analyzer_advanced import run_advanced_rules
 from ..services.analyzer_rules import run_all_rules
-from ..services.crawler import fetch_html, parse_page
-
-# LLM service - using Gemini (free tier, no credits needed)
-try:
-    from ..services.analyzer_gemini import generate_suggestions
-except Exception as e:
-    print(f"Warning: Could not import Gemini analyzer: {e}")
-    generate_suggestions = None  # safe fallback
 
 # Fallback suggestion generator (rule-based, always available)
 from ..services.analyzer_suggestions import generate_suggestions_from_issues
+from ..services.crawl_jobs import submit_crawl_job
+from ..services.crawler import fetch_html, parse_page
+from ..services.document import ParsedDocument
+from ..services.llm_cache import (
+    copy_suggestions,
+    find_cached_suggestions,
+    llm_input_hash,
+)
+from ..services.llm_health import (
+    breaker_for,
+    fallback_suggestions,
+    guarded_call,
+    health_snapshot,
+)
+
+# LLM service - Gemini by default (free tier, no credits needed). The SDKs are
+# imported on the first suggestion request, not when this module loads.
+from ..services.llm_registry import (
+    default_provider,
+    generate_suggestions,
+    import_metrics,
+    provider_model,
+)
+from ..services.persistence import CRITICAL_ISSUE_KEYWORDS
 
 # Sitemap crawler for analyzing entire sites
 try:
@@ -42,6 +58,7 @@ def analyze_url(request):
         return Response(
             {
                 "message": "API working. Use POST {'url': '...'} or {'url': '...', 'crawl_site': true}"
+                " (add 'background': true to queue the crawl as a job)"
             }
         )
 
@@ -51,6 +68,21 @@ def analyze_url(request):
     if not url:
         return Response({"error": "URL missing"}, status=status.HTTP_400_BAD_REQUEST)
 
+    # Background crawl: queue a job and let the client poll /api/crawl-jobs/<id>/
+    if crawl_site and request.data.get("background", False):
+        force_llm = bool(request.data.get("force_llm", False))
+        job = submit_crawl_job(url, max_pages=500, force_llm=force_llm)
+        return Response(
+            {
+                "ok": True,
+                "job_id": job.id,
+                "status": job.status,
+                "status_url": f"/api/crawl-jobs/{job.id}/",
+                "results_url": f"/api/crawl-jobs/{job.id}/results/",
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
     # If crawl_site is True, use sitemap crawler
     if crawl_site and crawl_site_from_sitemap:
         try:
@@ -58,7 +90,13 @@ def analyze_url(request):
             force_llm = (
                 request.GET.get("force_llm", "false").lower() == "true"
             ) or bool(request.data.get("force_llm", False))
-            result = crawl_site_from_sitemap(url, max_pages=500, force_llm=force_llm)
+            # "incremental": true reuses analyses of pages that have not changed
+            result = crawl_site_from_sitemap(
+                url,
+                max_pages=500,
+                force_llm=force_llm,
+                incremental=request.data.get("incremental"),
+            )
             return Response(result)
         except Exception as e:
             print(f"Sitemap crawl failed: {e}", file=sys.stderr)
@@ -81,16 +119,42 @@ def analyze_url(request):
             status=502,
         )
 
-    # Parse
-    parsed = parse_page(fetch_res["html"], base_url=fetch_res["url"])
-
-    # Analyze with basic rules
-    score, breakdown, issues = run_all_rules(parsed)
-
-    # Analyze with advanced rules (Core Web Vitals, Mobile, Schema, Security, etc.)
-    advanced_score, advanced_breakdown, advanced_issues = run_advanced_rules(
-        parsed, html=fetch_res["html"], base_url=fetch_res["url"]
-    )
+    # Identical HTML (same page, or a duplicate served elsewhere) is scored once
+    cache_key = analysis_key(fetch_res["html"], fetch_res["url"])
+    cached_analysis = analysis_cache.get(cache_key, fetch_res["url"]) or {}
+
+    doc = None
+    if cached_analysis:
+        parsed = cached_analysis["parsed"]
+        score, breakdown, issues = cached_analysis["basic"]
+    else:
+        # Parse once; every analyzer below reads from the same document
+        doc = ParsedDocument(fetch_res["html"], base_url=fetch_res["url"])
+        parsed = parse_page(fetch_res["html"], base_url=fetch_res["url"], doc=doc)
+
+        # Analyze with basic rules
+        score, breakdown, issues = run_all_rules(parsed)
+
+    if cached_analysis.get("advanced"):
+        advanced_score, advanced_breakdown, advanced_issues = cached_analysis[
+            "advanced"
+        ]
+    else:
+        # Analyze with advanced rules (Core Web Vitals, Mobile, Schema, Security, etc.)
+        if doc is None:
+            doc = ParsedDocument(fetch_res["html"], base_url=fetch_res["url"])
+        advanced_score, advanced_breakdown, advanced_issues = run_advanced_rules(
+            parsed, html=fetch_res["html"], base_url=fetch_res["url"], doc=doc
+        )
+        analysis_cache.set(
+            cache_key,
+            fetch_res["url"],
+            {
+                "parsed": parsed,
+                "basic": (score, breakdown, issues),
+                "advanced": (advanced_score, advanced_breakdown, advanced_issues),
+            },
+        )
 
     # Combine scores: basic rules (40%) + advanced rules (60%)
     combined_score = int((score * 0.4) + (advanced_score * 0.6))
@@ -116,12 +180,11 @@ def analyze_url(request):
     warning_issues = []
     info_issues = []
 
-    critical_keywords = ["missing", "no h1", "noindex", "ssl", "https"]
     warning_keywords = ["short", "long", "multiple", "thin", "broken"]
 
     for issue in formatted_issues:
         msg_lower = issue["message"].lower()
-        if any(kw in msg_lower for kw in critical_keywords):
+        if any(kw in msg_lower for kw in CRITICAL_ISSUE_KEYWORDS):
             critical_issues.append(issue)
         elif any(kw in msg_lower for kw in warning_keywords):
             warning_issues.append(issue)
@@ -174,13 +237,20 @@ def analyze_url(request):
         raw_html_snippet=parsed.get("raw_html_snippet", ""),
     )
 
-    # Save audit history for trend tracking
+    # Save audit history for trend tracking (one row per page and day)
     try:
-        AuditHistory.objects.create(
-            page=page,
-            score=combined_score,
-            issues_count=len(formatted_issues),
-            critical_issues=len(critical_issues),
+        AuditHistory.objects.bulk_create(
+            [
+                AuditHistory(
+                    page=page,
+                    score=combined_score,
+                    issues_count=len(formatted_issues),
+                    critical_issues=len(critical_issues),
+                )
+            ],
+            update_conflicts=True,
+            unique_fields=["page", "recorded_date"],
+            update_fields=["score", "issues_count", "critical_issues"],
         )
     except Exception as e:
         print(f"Failed to save audit history: {e}", file=sys.stderr)
@@ -188,53 +258,54 @@ def analyze_url(request):
     # -------------------------
     # LLM suggestions & caching
     # -------------------------
-    # Try to get LLM suggestions from Gemini, fall back to rule-based suggestions
+    # Try to get LLM suggestions from Gemini, fall back to rule-based suggestions.
+    # Suggestions from an earlier analysis of this page with the same prompt
+    # inputs are reused for LLM_CACHE_DAYS unless force_llm is set.
     try:
-        force_llm = request.GET.get("force_llm", "false").lower() == "true"
-        use_cache = False
-
-        # TTL from env or default
-        try:
-            ttl_days = int(os.getenv("LLM_CACHE_DAYS", "7"))
-        except Exception:
-            ttl_days = 7
-
-        if pa.llm_suggestions and pa.llm_generated_at and not force_llm:
-            age = timezone.now() - pa.llm_generated_at
-            if age < timedelta(days=ttl_days):
-                use_cache = True
+        force_llm = (request.GET.get("force_llm", "false").lower() == "true") or bool(
+            request.data.get("force_llm", False)
+        )
+        provider = default_provider()
+        model = provider_model(provider)
+        input_hash = llm_input_hash(parsed, model)
+        cached_suggestions = (
+            None if force_llm else find_cached_suggestions(page, input_hash)
+        )
 
-        if use_cache:
+        if cached_suggestions is not None:
             # reuse cached suggestions
+            copy_suggestions(cached_suggestions, pa)
             result["llm_suggestions"] = pa.llm_suggestions or {}
-            result["llm_generated_at"] = pa.llm_generated_at
+            result["llm_cached"] = True
         else:
-            # Try LLM first (Gemini)
-            llm_out = None
-            if generate_suggestions:
-                try:
-                    llm_out = generate_suggestions(parsed)
-                    # Check if it's an error response
-                    if llm_out and llm_out.get("ok") is False:
-                        llm_out = None  # Fall back to rule-based
-                except Exception as e:
-                    # log the error but don't fail; use fallback
-                    print("LLM generation failed:", e, file=sys.stderr)
-                    llm_out = None
-
-            # Use fallback if LLM unavailable or failed
-            if llm_out is None:
-                llm_out = generate_suggestions_from_issues(parsed)
-                result["llm_suggestions"] = {**llm_out, "fallback": True}
+            # Try LLM first (Gemini); while the provider is failing the circuit
+            # breaker skips it and the rule-based suggestions are used at once.
+            # No in-call retries: a failure counts towards opening the circuit.
+            from_llm = False
+            if provider:
+                result["llm_suggestions"], from_llm = guarded_call(
+                    breaker_for(provider),
+                    partial(generate_suggestions, max_retries=0),
+                    parsed,
+                )
             else:
-                result["llm_suggestions"] = llm_out or {}
+                result["llm_suggestions"] = fallback_suggestions(parsed)
 
-            # Save to database
             pa.llm_suggestions = result["llm_suggestions"]
-            pa.llm_model = os.getenv("LLM_MODEL", "fallback-rule-based")
+            pa.llm_model = model if from_llm else "fallback-rule-based"
             pa.llm_generated_at = timezone.now()
-            pa.save(update_fields=["llm_suggestions", "llm_model", "llm_generated_at"])
-            result["llm_generated_at"] = pa.llm_generated_at
+            pa.llm_input_hash = input_hash
+
+        # Save to database
+        pa.save(
+            update_fields=[
+                "llm_suggestions",
+                "llm_model",
+                "llm_generated_at",
+                "llm_input_hash",
+            ]
+        )
+        result["llm_generated_at"] = pa.llm_generated_at
     except Exception as e:
         # defensive catch-all for any unexpected error in suggestions flow
         print("Suggestions generation error:", e, file=sys.stderr)
@@ -243,3 +314,13 @@ def analyze_url(request):
         result["llm_suggestions"] = generate_suggestions_from_issues(parsed)
 
     return Response(result)
+
+
+@api_view(["GET"])
+def llm_status(request):
+    """
+    LLM provider status: lazy SDK import metrics and circuit breaker state.
+
+    GET /api/llm/status/
+    """
+    return Response({"providers": import_metrics(), "health": health_snapshot()})
@@ -0,0 +1,134 @@
+# seo_app/views/crawl_job_views.py
+"""
+Background Crawl Job Views
+"""
+
+import logging
+
+from rest_framework import status
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+from ..models import CrawlJob
+from ..services.crawl_jobs import submit_crawl_job
+
+logger = logging.getLogger(__name__)
+
+MAX_CRAWL_PAGES = 500
+
+
+def _job_payload(job: CrawlJob) -> dict:
+    done = job.pages_analyzed + job.pages_failed
+    return {
+        "id": job.id,
+        "base_url": job.base_url,
+        "status": job.status,
+        "error": job.error,
+        "max_pages": job.max_pages,
+        "sitemaps_found": job.sitemaps_found,
+        "total_urls": job.total_urls,
+        "pages_analyzed": job.pages_analyzed,
+        "pages_failed": job.pages_failed,
+        "progress": round(done / job.total_urls, 3) if job.total_urls else 0.0,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+@api_view(["POST"])
+def crawl_job_submit(request):
+    """
+    Queue a site crawl for the run_crawl_jobs worker.
+
+    POST /api/crawl-jobs/
+    {
+        "url": "https://example.com",
+        "max_pages": 500,  (optional)
+        "force_llm": false  (optional)
+    }
+    """
+    try:
+        url = (request.data.get("url") or "").strip()
+        if not url:
+            return Response(
+                {"error": "URL missing"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            max_pages = int(request.data.get("max_pages", MAX_CRAWL_PAGES))
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "max_pages must be an integer"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        max_pages = max(1, min(MAX_CRAWL_PAGES, max_pages))
+
+        job = submit_crawl_job(
+            url, max_pages=max_pages, force_llm=bool(request.data.get("force_llm"))
+        )
+        return Response(
+            {"ok": True, "job": _job_payload(job)}, status=status.HTTP_202_ACCEPTED
+        )
+
+    except Exception as e:
+        logger.error(f"Crawl job submit error: {e}")
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(["GET"])
+def crawl_job_status(request, job_id: int):
+    """
+    Poll crawl progress.
+
+    GET /api/crawl-jobs/<id>/
+    """
+    job = CrawlJob.objects.filter(pk=job_id).first()
+    if job is None:
+        return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+    return Response({"ok": True, "job": _job_payload(job)})
+
+
+@api_view(["GET"])
+def crawl_job_results(request, job_id: int):
+    """
+    Per-page results of a crawl job, in discovery order.
+
+    GET /api/crawl-jobs/<id>/results/?status=success&offset=0&limit=100
+    """
+    try:
+        job = CrawlJob.objects.filter(pk=job_id).first()
+        if job is None:
+            return Response(
+                {"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        offset = max(0, int(request.GET.get("offset", 0)))
+        limit = max(1, min(MAX_CRAWL_PAGES, int(request.GET.get("limit", 100))))
+
+        rows = job.urls.order_by("position")
+        if request.GET.get("status"):
+            rows = rows.filter(status=request.GET["status"])
+
+        pages = [
+            row.result or {"url": row.url, "status": row.status}
+            for row in rows[offset : offset + limit]
+        ]
+        return Response(
+            {
+                "ok": True,
+                "job": _job_payload(job),
+                "offset": offset,
+                "count": len(pages),
+                "pages": pages,
+            }
+        )
+
+    except ValueError:
+        return Response(
+            {"error": "offset and limit must be integers"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    except Exception as e:
+        logger.error(f"Crawl job results error: {e}")
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,74 @@
+# seo_app/views/crawl_stream_views.py
+"""
+Streaming Site Crawl Views
+"""
+
+import logging
+
+from rest_framework import status
+from rest_framework.decorators import api_view, renderer_classes
+from rest_framework.response import Response
+
+from ..services.sitemap_crawler import iter_crawl_events
+from .crawl_job_views import MAX_CRAWL_PAGES
+from .streaming import STREAM_RENDERERS, stream_response
+
+logger = logging.getLogger(__name__)
+
+
+def _safe_events(events):
+    """Turn an exception raised mid-stream into a final "error" record."""
+    try:
+        yield from events
+    except Exception as e:
+        logger.error(f"Crawl stream error: {e}")
+        yield {"type": "error", "error": str(e)}
+
+
+def _flag(value):
+    """JSON booleans as-is, query-string "true"/"1"/"yes" as True; None stays None."""
+    if isinstance(value, str):
+        return value.lower() in ("1", "true", "yes")
+    return value
+
+
+@api_view(["GET", "POST"])
+@renderer_classes(STREAM_RENDERERS)
+def analyze_site_stream(request):
+    """
+    Crawl a site and stream one record per analyzed page as it finishes.
+
+    POST /api/analyze/stream/
+    {
+        "url": "https://example.com",
+        "max_pages": 500,  (optional)
+        "force_llm": false,  (optional)
+        "incremental": false  (optional, skip pages unchanged since last crawl)
+    }
+    GET /api/analyze/stream/?url=https://example.com  (for EventSource clients)
+
+    Responds with NDJSON, or Server-Sent Events when the client sends
+    `Accept: text/event-stream` or `?format=sse`. Records are typed
+    "start", "page" (per-page summary plus running counts), "done" or "error".
+    """
+    params = request.data if request.method == "POST" else request.GET
+    url = (params.get("url") or "").strip()
+    if not url:
+        return Response({"error": "URL missing"}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        max_pages = int(params.get("max_pages", MAX_CRAWL_PAGES))
+    except (TypeError, ValueError):
+        return Response(
+            {"error": "max_pages must be an integer"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    max_pages = max(1, min(MAX_CRAWL_PAGES, max_pages))
+
+    events = iter_crawl_events(
+        url,
+        max_pages=max_pages,
+        force_llm=bool(_flag(params.get("force_llm", False))),
+        incremental=_flag(params.get("incremental")),
+    )
+    return stream_response(request, _safe_events(events))
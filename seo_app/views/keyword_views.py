@@ -7,15 +7,23 @@ import logging
 from datetime import datetime
 
 from rest_framework import status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, renderer_classes
 from rest_framework.response import Response
 
-from ..models import Domain, Keyword, KeywordRanking
+from ..models import Keyword
+from ..services.keyword_batch import (
+    KEYWORD_BULK_MAX,
+    dedupe_keywords,
+    iter_bulk_research,
+    parse_keyword_csv,
+)
 from ..services.keyword_research import (
     compare_keywords,
     get_keyword_recommendations,
     search_keywords,
 )
+from ..services.ranking_ingest import ingest_rankings, parse_ranking_csv
+from .streaming import STREAM_RENDERERS, stream_response
 
 logger = logging.getLogger(__name__)
 
@@ -180,6 +188,47 @@ def keyword_compare(request):
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _bulk_keywords(request):
+    """Raw keywords from an uploaded CSV `file` or the `keywords` field."""
+    upload = request.FILES.get("file")
+    if upload is not None:
+        return parse_keyword_csv(upload.read().decode("utf-8-sig", "replace"))
+    keywords = request.data.get("keywords", [])
+    if isinstance(keywords, str):
+        return keywords.splitlines()
+    return keywords if isinstance(keywords, list) else []
+
+
+@api_view(["POST"])
+@renderer_classes(STREAM_RENDERERS)
+def keyword_bulk(request):
+    """
+    Research a large keyword list, streaming one NDJSON record per keyword.
+
+    POST /api/keywords/bulk/
+    {
+        "keywords": ["seo tools", "best seo tools", ...]
+    }
+    or multipart/form-data with a CSV `file` (a "keyword" column, or
+    keywords in the first column).
+
+    Keywords are normalized and deduplicated. Records are typed "start",
+    "keyword" (with "cached" and "data"), "error" (per keyword) and "done".
+    """
+    keywords = dedupe_keywords(_bulk_keywords(request))
+    if not keywords:
+        return Response(
+            {"error": "At least one keyword is required"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if len(keywords) > KEYWORD_BULK_MAX:
+        return Response(
+            {"error": f"Maximum {KEYWORD_BULK_MAX} keywords per request"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return stream_response(request, iter_bulk_research(keywords))
+
+
 @api_view(["POST"])
 def keyword_recommendations(request):
     """
@@ -285,27 +334,22 @@ def track_keyword_ranking(request):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Get or create domain
-        domain, _ = Domain.objects.get_or_create(domain=domain_str)
-
-        # Get or create keyword
-        kw, _ = Keyword.objects.get_or_create(keyword=keyword_str)
-
-        # Create ranking record
-        ranking, created = KeywordRanking.objects.get_or_create(
-            domain=domain,
-            keyword=kw,
-            recorded_date__date=datetime.now().date(),
-            defaults={
-                "position": position,
-                "url": request.data.get("url", ""),
-                "search_volume": kw.search_volume,
-            },
+        # Record (or update) today's ranking
+        result = ingest_rankings(
+            [
+                {
+                    "domain": domain_str,
+                    "keyword": keyword_str,
+                    "position": position,
+                    "url": request.data.get("url", ""),
+                }
+            ]
         )
-
-        if not created:
-            ranking.position = position
-            ranking.save()
+        if not result["upserted"]:
+            return Response(
+                {"error": result["skipped_rows"][0]["reason"]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
         return Response(
             {
@@ -322,6 +366,53 @@ def track_keyword_ranking(request):
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(["POST"])
+def track_keyword_rankings_bulk(request):
+    """
+    Upsert many keyword rankings at once (e.g. a daily rank import).
+
+    POST /api/keywords/track-ranking/bulk/
+    {
+        "recorded_date": "2024-05-01",  (optional, defaults to today)
+        "rankings": [
+            {"domain": "example.com", "keyword": "seo tools", "position": 3,
+             "url": "https://example.com/tools"},
+            ...
+        ]
+    }
+    or multipart/form-data with a CSV `file` (domain,keyword,position,url
+    header) and an optional `recorded_date` field.
+    """
+    try:
+        upload = request.FILES.get("file")
+        if upload is not None:
+            rows = parse_ranking_csv(upload.read().decode("utf-8-sig", "replace"))
+        else:
+            rows = request.data.get("rankings", [])
+        if not isinstance(rows, list) or not rows:
+            return Response(
+                {"error": "At least one ranking row is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        recorded_date = request.data.get("recorded_date")
+        if recorded_date:
+            try:
+                recorded_date = datetime.strptime(recorded_date, "%Y-%m-%d").date()
+            except (TypeError, ValueError):
+                return Response(
+                    {"error": "recorded_date must be YYYY-MM-DD"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        result = ingest_rankings(rows, recorded_date=recorded_date or None)
+        return Response({"ok": True, **result})
+
+    except Exception as e:
+        logger.error(f"Bulk ranking tracking error: {e}")
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(["GET"])
 def keyword_list(request):
     """
@@ -0,0 +1,68 @@
+# seo_app/views/streaming.py
+"""
+Helpers for streaming API responses (NDJSON and Server-Sent Events).
+
+Views list STREAM_RENDERERS in @renderer_classes so DRF content negotiation
+accepts `Accept: application/x-ndjson` / `text/event-stream` (or
+`?format=ndjson` / `?format=sse`), then build the body with stream_response().
+"""
+
+import json
+from typing import Iterable, Iterator
+
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+SSE_CONTENT_TYPE = "text/event-stream"
+
+
+def ndjson_line(record: dict) -> str:
+    return json.dumps(record, default=str) + "\n"
+
+
+def sse_event(record: dict) -> str:
+    event = record.get("type", "message")
+    return f"event: {event}\ndata: {json.dumps(record, default=str)}\n\n"
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Renders plain (non-streamed) responses such as errors as one NDJSON line."""
+
+    media_type = NDJSON_CONTENT_TYPE
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return ndjson_line(data or {}).encode()
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Renders plain (non-streamed) responses such as errors as one SSE event."""
+
+    media_type = SSE_CONTENT_TYPE
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return sse_event(data or {}).encode()
+
+
+STREAM_RENDERERS = [NDJSONRenderer, EventStreamRenderer, JSONRenderer]
+
+
+def stream_response(request, records: Iterable[dict]) -> StreamingHttpResponse:
+    """Stream `records` as SSE when the client negotiated it, NDJSON otherwise."""
+    use_sse = getattr(request.accepted_renderer, "format", "") == "sse"
+    encode = sse_event if use_sse else ndjson_line
+
+    def body() -> Iterator[str]:
+        for record in records:
+            yield encode(record)
+
+    response = StreamingHttpResponse(
+        body(), content_type=SSE_CONTENT_TYPE if use_sse else NDJSON_CONTENT_TYPE
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # disable proxy buffering (nginx)
+    return response